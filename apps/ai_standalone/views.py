@@ -1,14 +1,17 @@
 """
-Views standalone para IA - sem dependência de outros apps
+Views standalone para IA - sem modelos nem serviço de classificação; usa apenas a sessão HTTP
+(apps.classifier.http_client) e os léxicos (apps.classifier.lexicon) compartilhados
 """
 import json
 import time
-import requests
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.conf import settings
 
+from apps.classifier.http_client import get_http_session, http_timeout
+from apps.classifier.lexicon import DIRECT_LEXICON, SENTIMENT_LABEL_LEXICON
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def classify_text_direct(request):
@@ -93,7 +96,7 @@ def classify_with_huggingface(text, token, model):
     
     payload = {"inputs": text}
     
-    response = requests.post(url, headers=headers, json=payload, timeout=10)
+    response = get_http_session().post(url, headers=headers, json=payload, timeout=http_timeout(10))
     
     if response.status_code == 200:
         result = response.json()
@@ -101,18 +104,17 @@ def classify_with_huggingface(text, token, model):
         if isinstance(result, list) and len(result) > 0:
             scores = result[0]
             
-            # Mapear sentimentos para produtividade
-            productive_keywords = ['positive', 'joy', 'optimism', 'trust', 'anticipation']
-            unproductive_keywords = ['negative', 'sadness', 'anger', 'fear', 'disgust']
-            
             max_score = max(scores, key=lambda x: x['score'])
             label = max_score['label'].lower()
             confidence = max_score['score']
             
+            # Mapear sentimentos para produtividade
+            label_matches = SENTIMENT_LABEL_LEXICON.count(label)
+            
             # Determinar classificação
-            if any(keyword in label for keyword in productive_keywords):
+            if label_matches['productive']:
                 classification = 'productive'
-            elif any(keyword in label for keyword in unproductive_keywords):
+            elif label_matches['unproductive']:
                 classification = 'unproductive'
             else:
                 # Se neutra, usar heurística do texto
@@ -134,27 +136,10 @@ def classify_heuristic(text):
     """
     text_lower = text.lower()
     
-    # Palavras-chave produtivas
-    productive_keywords = [
-        'reunião', 'projeto', 'deadline', 'urgente', 'importante', 'trabalho',
-        'tarefa', 'entrega', 'apresentação', 'cliente', 'contrato', 'proposta',
-        'desenvolvimento', 'bug', 'sistema', 'produção', 'deploy', 'meeting',
-        'project', 'urgent', 'important', 'work', 'task', 'delivery', 'client',
-        'contract', 'proposal', 'development', 'production', 'critical'
-    ]
-    
-    # Palavras-chave não produtivas
-    unproductive_keywords = [
-        'promoção', 'desconto', 'grátis', 'ganhe', 'oferta', 'clique',
-        'compre', 'venda', 'marketing', 'spam', 'promocional', 'publicidade',
-        'social', 'pessoal', 'fim de semana', 'férias', 'festa', 'birthday',
-        'promotion', 'discount', 'free', 'buy', 'sale', 'marketing', 'spam',
-        'advertisement', 'social', 'personal', 'weekend', 'vacation', 'party'
-    ]
-    
-    # Contar ocorrências
-    productive_count = sum(1 for keyword in productive_keywords if keyword in text_lower)
-    unproductive_count = sum(1 for keyword in unproductive_keywords if keyword in text_lower)
+    # Contar ocorrências com o léxico compartilhado
+    counts = DIRECT_LEXICON.count(text_lower)
+    productive_count = counts['productive']
+    unproductive_count = counts['unproductive']
     
     # Determinar classificação
     if productive_count > unproductive_count:
@@ -4,6 +4,7 @@ Admin configuration for Email Classifier - CORRIGIDO
 
 from django.contrib import admin
 from .models import Email
+from .refinement import COMPLETED, HUMAN_MODEL_USED
 
 
 @admin.register(Email)
@@ -64,3 +65,10 @@ class EmailAdmin(admin.ModelAdmin):
     
     ordering = ['-created_at']
     date_hierarchy = 'created_at'
+
+    def save_model(self, request, obj, form, change):
+        # Rótulo corrigido à mão: definitivo e aproveitado no treino do modelo linear
+        if change and 'classification_result' in form.changed_data:
+            obj.ai_model_used = HUMAN_MODEL_USED
+            obj.processing_status = COMPLETED
+        super().save_model(request, obj, form, change)
@@ -1,5 +1,9 @@
+import asyncio
+import copy
 import logging
+import os
 import re
+import threading
 import time
 from typing import Dict, List, Optional, Tuple
 
@@ -7,18 +11,47 @@ from django.conf import settings
 from django.core.cache import cache
 
 import requests
-
-# Imports condicionais para fallback local. / Conditional imports for local fallback.
-try:
-    from transformers import pipeline
-
-    TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    TRANSFORMERS_AVAILABLE = False
+from asgiref.sync import sync_to_async
+
+from .cache_keys import build_namespace, make_key
+from .circuit_breaker import CLOSED, CircuitBreaker, CircuitOpenError
+from .deadline import (
+    TIER_API,
+    TIER_HEURISTIC,
+    TIER_LINEAR_MODEL,
+    TIER_LOCAL_MODEL,
+    Deadline,
+    DeadlineExceeded,
+    tier_fits,
+    tier_min_budget,
+)
+from .http_client import HTTPX_AVAILABLE, async_http_timeout, get_async_http_client, get_http_session, http_timeout
+from .lexicon import CONTEXT_LEXICON, HEURISTIC_LEXICON, LOCAL_MODEL_LEXICON, lexicon_stats
+from .linear_model import LinearEngine, published_version
+from .local_engines import ENGINE_SERVER, TRANSFORMERS_AVAILABLE, load_local_engine, local_engine_available
+from .metrics import STAGE_LATENCY, observe_classification
+from .micro_batcher import MicroBatcher
+from .near_duplicates import FINGERPRINT_BITS, NearDuplicateIndex, load_from_emails
+from .rate_limiter import TokenBucket
+from .result_cache import LRUCache, TieredCache
+from .shared_stats import SharedCounters
+from .single_flight import SingleFlight
+from .tokenization import load_tokenizer, token_windows, truncate_to_tokens
+
+if HTTPX_AVAILABLE:
+    import httpx
+
+# Fallback local opcional: ``local_engines`` só verifica se o pacote existe; o import real (segundos e centenas
+# de MB) fica para o primeiro uso do modelo local. / Optional local fallback: ``local_engines`` only checks the
+# package exists; the real import (seconds and hundreds of MB) is deferred to the first local model use.
+if not TRANSFORMERS_AVAILABLE:
     logging.warning("Transformers não disponível para fallback local")
 
 logger = logging.getLogger(__name__)
 
+# Contadores de uso do serviço / Service usage counters
+USAGE_STATS_FIELDS = ("api_calls", "cache_hits", "near_duplicate_hits", "response_cache_hits", "fallback_uses", "errors")
+
 
 class HuggingFaceAPIError(Exception):
     """Exceção personalizada para erros da API Hugging Face."""
@@ -26,6 +59,14 @@ class HuggingFaceAPIError(Exception):
     pass
 
 
+class ModelLoadingError(HuggingFaceAPIError):
+    """Modelo ainda carregando (HTTP 503) no modo provisório. / Model still loading (HTTP 503) in provisional mode."""
+
+    def __init__(self, estimated_time: float):
+        super().__init__(f"Modelo carregando (estimativa: {estimated_time:.0f}s)")
+        self.estimated_time = estimated_time
+
+
 class AIClassificationService:
     """
     Serviço de IA para classificação de emails e geração de respostas / AI service for email classification and response generation.
@@ -39,13 +80,20 @@ class AIClassificationService:
 
         # Configurações da API / API settings
         self.api_token = settings.AI_SETTINGS["HUGGINGFACE_API_TOKEN"]
-        print(f"🔍 TOKEN DEBUG: '{self.api_token}' (length: {len(self.api_token) if self.api_token else 0})")
-        if not self.api_token:
-            print("⚠️ Token vazio! Verifique arquivo .env")
         self.api_url = settings.AI_SETTINGS["HUGGINGFACE_API_URL"]
         self.timeout = settings.AI_SETTINGS["PROCESSING_TIMEOUT"]
         self.retry_attempts = settings.AI_SETTINGS["AI_RETRY_ATTEMPTS"]
 
+        # Orçamento de tokens por chamada e modo de emails longos / Per-call token budget and long-email mode
+        self.max_input_tokens = settings.AI_SETTINGS["AI_MAX_INPUT_TOKENS"]
+        self.long_email_mode = settings.AI_SETTINGS["AI_LONG_EMAIL_MODE"]
+        self.long_email_overlap = settings.AI_SETTINGS["AI_LONG_EMAIL_OVERLAP"]
+        self.long_email_max_windows = settings.AI_SETTINGS["AI_LONG_EMAIL_MAX_WINDOWS"]
+
+        # Limites de lote / Batch limits
+        self.batch_size = settings.AI_SETTINGS["AI_BATCH_SIZE"]
+        self.batch_max_chars = settings.AI_SETTINGS["AI_BATCH_MAX_CHARS"]
+
         # Modelos / Models
         self.classification_model = settings.AI_SETTINGS["CLASSIFICATION_MODEL"]
         self.response_model = settings.AI_SETTINGS["RESPONSE_GENERATION_MODEL"]
@@ -62,6 +110,38 @@ class AIClassificationService:
         # Cache e rate limiting / Cache and rate limiting
         self.cache_ttl = settings.AI_SETTINGS["AI_CACHE_TTL"]
         self.rate_limit = settings.AI_SETTINGS["AI_RATE_LIMIT_PER_MINUTE"]
+        self.rate_limit_max_wait = settings.AI_SETTINGS["AI_RATE_LIMIT_MAX_WAIT"]
+
+        # Token bucket atômico compartilhado entre workers / Atomic token bucket shared across workers
+        self.rate_limiter = TokenBucket(
+            "huggingface", self.rate_limit, burst=settings.AI_SETTINGS["AI_RATE_LIMIT_BURST"] or self.rate_limit
+        )
+
+        # L1 em processo na frente do cache do Django, para resultados e respostas / In-process L1 in front of the
+        # Django cache, for results and responses
+        self.result_cache = TieredCache(
+            LRUCache(settings.AI_SETTINGS["AI_L1_CACHE_MAX_ENTRIES"], settings.AI_SETTINGS["AI_L1_CACHE_TTL"])
+        )
+
+        # Coalescência de classificações idênticas em voo / Coalescing of identical in-flight classifications
+        self.single_flight = SingleFlight(
+            enabled=settings.AI_SETTINGS["AI_SINGLE_FLIGHT"],
+            lock_timeout=settings.AI_SETTINGS["AI_SINGLE_FLIGHT_LOCK_TIMEOUT"],
+            poll_interval=settings.AI_SETTINGS["AI_SINGLE_FLIGHT_POLL_MS"] / 1000,
+        )
+
+        # Classificações reaproveitadas de emails quase idênticos / Classifications reused for near-identical emails
+        self.near_duplicates = (
+            NearDuplicateIndex(
+                max_distance=settings.AI_SETTINGS["AI_NEAR_DUPLICATE_MAX_DISTANCE"],
+                bands=settings.AI_SETTINGS["AI_NEAR_DUPLICATE_BANDS"],
+                max_entries=settings.AI_SETTINGS["AI_NEAR_DUPLICATE_MAX_ENTRIES"],
+            )
+            if settings.AI_SETTINGS["AI_NEAR_DUPLICATE"]
+            else None
+        )
+        self.near_duplicate_persist = settings.AI_SETTINGS["AI_NEAR_DUPLICATE_PERSIST"]
+        self._near_duplicates_lock = threading.Lock()
 
         # Headers da API / API headers
         self.headers = {
@@ -70,66 +150,240 @@ class AIClassificationService:
             "User-Agent": "AutoU-Email-Classifier/1.0",
         }
 
-        # Pipeline local para fallback / Local pipeline for fallback
+        # Circuit breaker compartilhado entre workers via cache / Circuit breaker shared across workers via the cache
+        self.circuit_breaker = CircuitBreaker(
+            "huggingface",
+            failure_threshold=settings.AI_SETTINGS["AI_CIRCUIT_FAILURE_THRESHOLD"],
+            recovery_timeout=settings.AI_SETTINGS["AI_CIRCUIT_RECOVERY_TIMEOUT"],
+            probe_timeout=sum(http_timeout(self.timeout)),
+        )
+
+        # Engine local para fallback (``AI_LOCAL_ENGINE``), carregado no primeiro uso / Local fallback engine
+        # (``AI_LOCAL_ENGINE``), loaded on first use
+        self.local_engine = settings.AI_SETTINGS["AI_LOCAL_ENGINE"]
+        self.local_batch_size = settings.AI_SETTINGS["AI_LOCAL_BATCH_MAX_SIZE"]
+        self.local_batch_wait_ms = settings.AI_SETTINGS["AI_LOCAL_BATCH_MAX_WAIT_MS"]
         self._local_classifier = None
-
-        # Estatísticas de uso / Usage statistics
-        self.stats = {"api_calls": 0, "cache_hits": 0, "fallback_uses": 0, "errors": 0}
-
-        logger.info("AI Classification Service inicializado.")
+        self._local_classifier_lock = threading.Lock()
+
+        # Modelo linear TF-IDF, carregado do último artefato treinado / TF-IDF linear model, loaded from the latest
+        # trained artifact
+        self.linear_model_enabled = settings.AI_SETTINGS["AI_LINEAR_MODEL"]
+        self.linear_min_confidence = settings.AI_SETTINGS["AI_LINEAR_MIN_CONFIDENCE"]
+        self.linear_check_interval = settings.AI_SETTINGS["AI_LINEAR_MODEL_CHECK_INTERVAL"]
+        self._linear_model = None
+        self._linear_model_lock = threading.Lock()
+        self._linear_model_checked_at = None
+
+        # Namespace das chaves: muda quando modelo, léxicos ou limiares mudam / Key namespace: changes whenever
+        # models, lexicons or thresholds change
+        self.cache_namespace = self._build_cache_namespace()
+
+        # Estatísticas de uso, somadas entre workers no cache / Usage statistics, summed across workers in the cache
+        self.stats = SharedCounters(
+            "ai_service", USAGE_STATS_FIELDS, flush_interval=settings.AI_SETTINGS["AI_STATS_FLUSH_INTERVAL"]
+        )
+
+        # Warm-up em background, uma vez por processo / Background warm-up, once per process
+        self._warm_up_pid = None
+
+        # Construção sem I/O de rede: conectividade é verificada no warm-up / No network I/O on construction: connectivity is checked by the warm-up
         self._validate_configuration()
+        logger.info("AI Classification Service inicializado.")
 
-    def classify_email_text(self, email_content: str) -> Dict:
+    def classify_email_text(self, email_content: str, deadline: Optional[Deadline] = None, provisional: bool = False) -> Dict:
         """
         Classifica um email como produtivo ou improdutivo / Classifies an email as productive or unproductive.
 
         Estratégia / Strategy:
             1. Verifica o cache / Check cache
-            2. Tenta chamar a API Hugging Face / Try calling Hugging Face API
-            3. Fallback para modelo local se disponível / Fallback to local model if available
-            4. Fallback para heurísticas simples / Fallback to simple heuristics
+            2. Reaproveita a classificação de um email quase idêntico / Reuse a near-identical email's classification
+            3. Modelo linear, se confiável / Linear model, if confident
+            4. Tenta chamar a API Hugging Face / Try calling Hugging Face API
+            5. Fallback para modelo local se disponível / Fallback to local model if available
+            6. Fallback para heurísticas simples / Fallback to simple heuristics
+
+        Com ``deadline``, cada etapa usa só o tempo restante e camadas caras são puladas quando o orçamento não
+        comporta; ``processing_details["tier"]`` indica a camada usada. / With ``deadline``, each stage only gets
+        the remaining time and expensive tiers are skipped when the budget cannot fit them;
+        ``processing_details["tier"]`` reports the tier that ran.
+
+        Com ``provisional=True``, um 503 (modelo carregando) não espera: o fallback é retornado na hora com
+        ``processing_details["provisional"]`` e ``refine_after`` para refinamento em background. / With
+        ``provisional=True``, a 503 (model loading) does not wait: the fallback is returned right away with
+        ``processing_details["provisional"]`` and ``refine_after`` for background refinement.
         """
 
         if not email_content or not email_content.strip():
             logger.warning("Conteúdo do email vazio ou inválido.")
             return self._get_fallback_classification("Email vazio")
 
+        started_at = time.perf_counter()
+
         # Preprocessar texto / Preprocess text
         processed_text = self._preprocess_text(email_content)
 
-        # Verificar cache / Check cache
-        cache_key = self._get_cache_key("classify", processed_text)
-        cached_result = cache.get(cache_key)
+        # Verificar cache (chave sobre a forma canônica do email original) / Check cache (key over the original
+        # email's canonical form)
+        with STAGE_LATENCY.time("cache_lookup"):
+            cache_key = self._get_cache_key("classify", email_content)
+            cached_result = self.result_cache.get(cache_key)
 
         if cached_result:
-            self.stats["cache_hits"] += 1
+            self.stats.incr("cache_hits")
             logger.info("Resultado de classificação obtido do cache.")
+            observe_classification(cached_result, time.perf_counter() - started_at, cached=True)
             return cached_result
 
+        # Email quase idêntico já classificado (mesma campanha, outro nome ou data) / Near-identical email
+        # already classified (same blast, different name or date)
+        if self.near_duplicates is not None and self.near_duplicate_persist and not self.near_duplicates.loaded_from_db:
+            self._load_near_duplicates()
+        fingerprint, near_result = self._lookup_near_duplicate(email_content)
+        if near_result:
+            self.result_cache.set(cache_key, near_result, self.cache_ttl)
+            observe_classification(near_result, time.perf_counter() - started_at)
+            return near_result
+
+        # Cópias concorrentes do mesmo email esperam uma única classificação / Concurrent copies of the same
+        # email wait on a single classification
+        result = self.single_flight.do(
+            self._flight_key(cache_key, provisional),
+            lambda: self._classify_uncached(processed_text, cache_key, deadline, provisional),
+            lookup=lambda: self.result_cache.get(cache_key),
+            timeout=self._flight_timeout(deadline),
+        )
+        self._remember_near_duplicate(fingerprint, result)
+        observe_classification(result, time.perf_counter() - started_at)
+        return result
+
+    def _classify_uncached(
+        self, processed_text: str, cache_key: str, deadline: Optional[Deadline] = None, provisional: bool = False
+    ) -> Dict:
+        """
+        Classificação após um miss no cache (modelo linear, API e fallbacks). / Classification after a cache miss
+        (linear model, API and fallbacks).
+        """
+
+        # Modelo linear antes da API: leva microssegundos e, se confiável, dispensa a chamada / Linear model before
+        # the API: it takes microseconds and, when confident, saves the call
+        linear_result = self._classify_with_linear_model([processed_text])[0]
+        if self._is_confident_linear(linear_result):
+            logger.info(f"✅ Modelo linear confiável: {linear_result['confidence']:.2f}")
+            return linear_result
+
+        # Orçamento insuficiente para a API / Not enough budget for the API
+        if not tier_fits(deadline, TIER_API):
+            logger.info("Orçamento restante insuficiente para a API, usando fallback.")
+            return self._classify_with_fallback(processed_text, deadline, linear_result)
+
         # Verificar rate limiting / Check rate limiting
-        if not self._check_rate_limit():
+        if not self._check_rate_limit(deadline):
             logger.error("Limite de taxa excedido, usando fallback.")
-            return self._classify_with_fallback(processed_text)
+            return self._classify_with_fallback(processed_text, deadline, linear_result)
 
         logger.info(f"Classificando email via API (length: {len(processed_text)})")
 
         try:
             # Tenta via API / Try via API
-            result = self._classify_with_api(processed_text)
+            result = self._classify_with_api(processed_text, deadline, wait_on_loading=not provisional)
 
             # Cache do resultado / Cache the result
-            cache.set(cache_key, result, self.cache_ttl)
+            self.result_cache.set(cache_key, result, self.cache_ttl)
 
             logger.info(f"Classificação API: {result['classification']} (confiança: {result['confidence']:.2f})")
             return result
+        except CircuitOpenError:
+            logger.info("Circuito da API aberto, usando fallback.")
+            return self._classify_with_fallback(processed_text, deadline, linear_result)
+        except DeadlineExceeded as e:
+            logger.warning(f"{e}, usando fallback.")
+            return self._classify_with_fallback(processed_text, deadline, linear_result)
+        except ModelLoadingError as e:
+            logger.info(f"{e}; retornando resultado provisório.")
+            return self._mark_provisional(
+                self._classify_with_fallback(processed_text, deadline, linear_result), e.estimated_time
+            )
         except Exception as e:
             logger.error(f"Erro na classificação via API: {e}")
-            self.stats["errors"] += 1
+            self.stats.incr("errors")
 
             # Fallback para modelo local ou heurísticas / Fallback to local model or heuristics
-            return self._classify_with_fallback(processed_text)
+            return self._classify_with_fallback(processed_text, deadline, linear_result)
+
+    def classify_email_texts(self, email_contents: List[str]) -> List[Dict]:
+        """
+        Classifica vários emails de uma vez / Classifies several emails at once.
+
+        Remove duplicatas, consulta o cache com um único ``get_many``, resolve os misses confiáveis com o modelo
+        linear e envia o resto à API em lotes limitados por quantidade e tamanho, gravando os resultados com
+        ``set_many``. / Deduplicates inputs, checks the cache with a single ``get_many``, settles the confident
+        misses with the linear model and sends the rest to the API in chunks bounded by count and size, writing
+        results back with ``set_many``.
 
-    def generate_response(self, email_content: str, classification: str) -> Dict:
+        Retorna um resultado por entrada, na mesma ordem. / Returns one result per input, in the same order.
+        """
+
+        # Deduplicar pela chave canônica e preprocessar cada email único / Deduplicate by canonical key and
+        # preprocess each unique email
+        keys = [
+            self._get_cache_key("classify", content) if content and content.strip() else None for content in email_contents
+        ]
+        texts_by_key = {}
+        for content, key in zip(email_contents, keys):
+            if key and key not in texts_by_key:
+                texts_by_key[key] = self._preprocess_text(content)
+
+        # Uma ida ao cache para todos os textos / One cache round trip for every text
+        cached = self.result_cache.get_many(list(texts_by_key)) if texts_by_key else {}
+        results_by_key = {key: cached[key] for key in texts_by_key if cached.get(key)}
+        self.stats.incr("cache_hits", len(results_by_key))
+
+        misses = [key for key in texts_by_key if key not in results_by_key]
+
+        # Modelo linear vetorizado sobre os misses; só os incertos seguem para a API / Linear model vectorized over
+        # the misses; only the uncertain ones go on to the API
+        linear_by_key = dict(zip(misses, self._classify_with_linear_model([texts_by_key[key] for key in misses])))
+        results_by_key.update((key, result) for key, result in linear_by_key.items() if self._is_confident_linear(result))
+        misses = [key for key in misses if key not in results_by_key]
+        logger.info(f"Classificação em lote: {len(email_contents)} entradas, {len(texts_by_key)} únicas, {len(misses)} misses")
+
+        to_cache = {}
+        position = 0
+        for chunk in self._chunk_texts([texts_by_key[key] for key in misses]):
+            chunk_keys = misses[position : position + len(chunk)]
+            chunk_linear = [linear_by_key[key] for key in chunk_keys]
+            position += len(chunk)
+
+            if not self._check_rate_limit():
+                logger.error("Limite de taxa excedido no lote, usando fallback.")
+                results_by_key.update(zip(chunk_keys, self._classify_batch_with_fallback(chunk, chunk_linear)))
+                continue
+
+            try:
+                chunk_results = self._classify_batch_with_api(chunk)
+            except CircuitOpenError:
+                logger.info("Circuito da API aberto, usando fallback no lote.")
+                results_by_key.update(zip(chunk_keys, self._classify_batch_with_fallback(chunk, chunk_linear)))
+                continue
+            except Exception as e:
+                logger.error(f"Erro na classificação em lote via API: {e}")
+                self.stats.incr("errors")
+                results_by_key.update(zip(chunk_keys, self._classify_batch_with_fallback(chunk, chunk_linear)))
+                continue
+
+            for key, result in zip(chunk_keys, chunk_results):
+                results_by_key[key] = result
+                to_cache[key] = result
+
+        # Uma escrita no cache para todos os resultados da API / One cache write for every API result
+        if to_cache:
+            self.result_cache.set_many(to_cache, self.cache_ttl)
+
+        return [results_by_key[key] if key else self._get_fallback_classification("Email vazio") for key in keys]
+
+    @STAGE_LATENCY.timed("response_generation")
+    def generate_response(self, email_content: str, classification: str, deadline: Optional[Deadline] = None) -> Dict:
         """
         Gera um resposta automática baseada no conteúdo do email e sua classificação / Generates an automatic response based on email content and its classification.
 
@@ -143,15 +397,15 @@ class AIClassificationService:
 
             # Verificar cache / Check cache
             cache_key = self._get_cache_key("response", f"{classification}_{context}")
-            cached_response = cache.get(cache_key)
+            cached_response = self.result_cache.get(cache_key)
 
             if cached_response:
-                self.stats["cache_hints"] += 1
+                self.stats.incr("response_cache_hits")
                 logger.info("Resposta obtida do cache.")
                 return cached_response
 
             # Gerar resposta / Generate response
-            if settings.AI_SETTINGS["AI_MODE"] == "online" and self.api_token:
+            if settings.AI_SETTINGS["AI_MODE"] == "online" and self.api_token and tier_fits(deadline, TIER_API):
                 try:
                     response = self._generate_response_api(email_content, classification, context)
                 except Exception as e:
@@ -161,7 +415,7 @@ class AIClassificationService:
                 response = self._generate_response_template(classification, context)
 
             # Cache da resposta / Cache the response
-            cache.set(cache_key, response, self.cache_ttl)
+            self.result_cache.set(cache_key, response, self.cache_ttl)
 
             logger.info(f"Resposta gerada (length: {len(response['suggested_response'])})")
             return response
@@ -170,30 +424,186 @@ class AIClassificationService:
             logger.error(f"❌ Erro na geração de resposta: {str(e)}")
             return self._get_fallback_response(classification)
 
-    def _validate_configuration(self):
+    async def aclassify_email_text(
+        self, email_content: str, deadline: Optional[Deadline] = None, provisional: bool = False
+    ) -> Dict:
+        """
+        Versão assíncrona de ``classify_email_text``. / Async version of ``classify_email_text``.
 
-        print(f"🔍 DEBUG - Token carregado: '{self.api_token}'")
-        print(f"🔍 DEBUG - Token length: {len(self.api_token) if self.api_token else 0}")
-        print(f"🔍 DEBUG - Headers: {self.headers}")
+        A chamada à API não bloqueia o event loop, então um único worker ASGI mantém centenas de inferências
+        em voo. Fallbacks (modelo local/heurística) rodam em thread. / The API call does not block the event
+        loop, so a single ASGI worker keeps hundreds of inference calls in flight. Fallbacks (local
+        model/heuristics) run in a thread.
+        """
 
-        if not self.api_token:
-            logger.warning("HUGGINGFACE_API_TOKEN não configurado. Usando fallback local ou heurísticas.")
+        if not email_content or not email_content.strip():
+            logger.warning("Conteúdo do email vazio ou inválido.")
+            return self._get_fallback_classification("Email vazio")
 
-        if not self.api_url:
-            logger.error("HUGGINGFACE_API_URL não configurado. A API não funcionará.")
+        started_at = time.perf_counter()
+        processed_text = self._preprocess_text(email_content)
+
+        with STAGE_LATENCY.time("cache_lookup"):
+            cache_key = self._get_cache_key("classify", email_content)
+            cached_result = await self.result_cache.aget(cache_key)
+
+        if cached_result:
+            self.stats.incr("cache_hits")
+            logger.info("Resultado de classificação obtido do cache.")
+            observe_classification(cached_result, time.perf_counter() - started_at, cached=True)
+            return cached_result
+
+        if self.near_duplicates is not None and self.near_duplicate_persist and not self.near_duplicates.loaded_from_db:
+            await sync_to_async(self._load_near_duplicates)()
+        fingerprint, near_result = self._lookup_near_duplicate(email_content)
+        if near_result:
+            await self.result_cache.aset(cache_key, near_result, self.cache_ttl)
+            observe_classification(near_result, time.perf_counter() - started_at)
+            return near_result
+
+        result = await self.single_flight.ado(
+            self._flight_key(cache_key, provisional),
+            lambda: self._aclassify_uncached(processed_text, cache_key, deadline, provisional),
+            lookup=lambda: self.result_cache.aget(cache_key),
+            timeout=self._flight_timeout(deadline),
+        )
+        self._remember_near_duplicate(fingerprint, result)
+        observe_classification(result, time.perf_counter() - started_at)
+        return result
+
+    async def _aclassify_uncached(
+        self, processed_text: str, cache_key: str, deadline: Optional[Deadline] = None, provisional: bool = False
+    ) -> Dict:
+        """Versão assíncrona de ``_classify_uncached``. / Async version of ``_classify_uncached``."""
+
+        # Fora do loop: a troca a quente do modelo lê o disco / Off the loop: the model hot swap reads the disk
+        linear_result = (await sync_to_async(self._classify_with_linear_model, thread_sensitive=False)([processed_text]))[0]
+        if self._is_confident_linear(linear_result):
+            logger.info(f"✅ Modelo linear confiável: {linear_result['confidence']:.2f}")
+            return linear_result
+
+        if not tier_fits(deadline, TIER_API):
+            logger.info("Orçamento restante insuficiente para a API, usando fallback.")
+            return await self._aclassify_with_fallback(processed_text, deadline, linear_result)
+
+        if not await self._acheck_rate_limit(deadline):
+            logger.error("Limite de taxa excedido, usando fallback.")
+            return await self._aclassify_with_fallback(processed_text, deadline, linear_result)
+
+        logger.info(f"Classificando email via API assíncrona (length: {len(processed_text)})")
+
+        try:
+            result = await self._aclassify_with_api(processed_text, deadline, wait_on_loading=not provisional)
+
+            await self.result_cache.aset(cache_key, result, self.cache_ttl)
+
+            logger.info(f"Classificação API: {result['classification']} (confiança: {result['confidence']:.2f})")
+            return result
+        except CircuitOpenError:
+            logger.info("Circuito da API aberto, usando fallback.")
+            return await self._aclassify_with_fallback(processed_text, deadline, linear_result)
+        except DeadlineExceeded as e:
+            logger.warning(f"{e}, usando fallback.")
+            return await self._aclassify_with_fallback(processed_text, deadline, linear_result)
+        except ModelLoadingError as e:
+            logger.info(f"{e}; retornando resultado provisório.")
+            return self._mark_provisional(
+                await self._aclassify_with_fallback(processed_text, deadline, linear_result), e.estimated_time
+            )
+        except Exception as e:
+            logger.error(f"Erro na classificação via API: {e}")
+            self.stats.incr("errors")
+
+            return await self._aclassify_with_fallback(processed_text, deadline, linear_result)
+
+    async def agenerate_response(self, email_content: str, classification: str, deadline: Optional[Deadline] = None) -> Dict:
+        """
+        Versão assíncrona de ``generate_response`` (templates são CPU-bound e rápidos). / Async version of
+        ``generate_response`` (templates are cheap and CPU-bound).
+        """
+
+        return await sync_to_async(self.generate_response, thread_sensitive=False)(email_content, classification, deadline)
+
+    def warm_up(self, background: bool = True):
+        """
+        Verifica a conectividade, aquece o pool HTTP e carrega o tokenizer local, uma vez por processo. / Checks
+        connectivity, warms up the HTTP pool and loads the local tokenizer, once per process.
+
+        Em background não atrasa a primeira requisição do worker. / In the background it does not delay the
+        worker's first request.
+        """
+
+        pid = os.getpid()
+        if self._warm_up_pid == pid:
+            return
+        self._warm_up_pid = pid
+
+        if background:
+            threading.Thread(target=self._warm_up, name="ai-warm-up", daemon=True).start()
+        else:
+            self._warm_up()
+
+    def _warm_up(self):
+        # Tokenizer local (se configurado) fora do caminho da requisição / Local tokenizer (if configured) off the
+        # request path
+        load_tokenizer(self.classification_model)
+        self.check_connectivity()
+
+    def check_connectivity(self, force: bool = False) -> Dict:
+        """
+        ``HEAD`` no modelo de classificação; o resultado fica no cache por ``AI_CONNECTIVITY_CACHE_TTL``. / ``HEAD``
+        on the classification model; the result is cached for ``AI_CONNECTIVITY_CACHE_TTL``.
 
-        # Testar conectividade / Test connectivity
-        if self.api_token:
+        Um resultado recente no cache (de qualquer worker) evita a chamada, salvo com ``force``. / A recent
+        cached result (from any worker) skips the call, unless ``force`` is set.
+        """
+
+        cached_status = self.connectivity_status()
+        if cached_status and not force:
+            return cached_status
+
+        status = {"ok": False, "status_code": None, "latency_ms": None, "error": None, "checked_at": time.time()}
+
+        if not self.api_token:
+            status["error"] = "HUGGINGFACE_API_TOKEN não configurado"
+        else:
+            start = time.perf_counter()
             try:
                 test_url = f"{self.api_url}/{self.classification_model}"
-                response = requests.head(test_url, headers=self.headers, timeout=5)
-                if response.status_code == 200:
+                response = get_http_session().head(test_url, headers=self.headers, timeout=http_timeout(5))
+                status["status_code"] = response.status_code
+                status["ok"] = response.status_code == 200
+                if status["ok"]:
                     logger.info("Conectividade com Hugging Face OK")
                 else:
                     logger.warning(f"Modelo pode não estar disponível: {response.status_code}")
             except Exception as e:
+                status["error"] = str(e)
                 logger.warning(f"Não foi possível testar conectividade: {str(e)}")
+            status["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+        cache.set(
+            self._get_cache_key("connectivity", self.classification_model),
+            status,
+            settings.AI_SETTINGS["AI_CONNECTIVITY_CACHE_TTL"],
+        )
+        return status
+
+    def connectivity_status(self) -> Optional[Dict]:
+        """Último resultado de conectividade no cache, sem I/O de rede. / Last cached connectivity result, no network I/O."""
+
+        return cache.get(self._get_cache_key("connectivity", self.classification_model))
+
+    def _validate_configuration(self):
+        """Validação local da configuração (sem rede). / Local configuration validation (no network)."""
+
+        if not self.api_token:
+            logger.warning("HUGGINGFACE_API_TOKEN não configurado. Usando fallback local ou heurísticas.")
 
+        if not self.api_url:
+            logger.error("HUGGINGFACE_API_URL não configurado. A API não funcionará.")
+
+    @STAGE_LATENCY.timed("preprocess")
     def _preprocess_text(self, text: str) -> str:
 
         if not text:
@@ -203,55 +613,278 @@ class AIClassificationService:
         cleaned = re.sub(r"[\x00-\x1F\x7F-\x9F]", " ", cleaned)
         cleaned = " ".join(cleaned.split())
 
-        # Truncar para limite do modelo (512 tokens ~ 400 chars) / Truncate to model limit (512 tokens ~ 400 chars
-        if len(cleaned) > 400:
-            cleaned = cleaned[:400] + "..."
-            logger.debug("Texto truncado para limite do modelo.")
+        # Truncar pelo orçamento real de tokens; no modo de emails longos cabem todas as janelas / Truncate to the
+        # real token budget; in long-email mode every window fits
+        max_tokens = self.max_input_tokens
+        if self.long_email_mode:
+            max_tokens = self.max_input_tokens + (self.max_input_tokens - self.long_email_overlap) * (
+                self.long_email_max_windows - 1
+            )
+        cleaned, token_count = truncate_to_tokens(cleaned, max_tokens, self.classification_model)
+        if token_count > max_tokens:
+            logger.debug(f"Texto truncado para limite do modelo ({token_count} → {max_tokens} tokens).")
 
         return cleaned
 
-    def _classify_with_api(self, text: str) -> Dict:
-        """Chama a API Hugging Face para classificação / Calls Hugging Face API for classification."""
+    def _model_inputs(self, text: str) -> List[str]:
+        """
+        Entradas da API para um texto: ele mesmo ou, no modo de emails longos, janelas sobrepostas. / API inputs
+        for one text: the text itself or, in long-email mode, overlapping windows.
+        """
 
-        url = f"{self.api_url}/{self.classification_model}"
-        payload = {
-            "inputs": text,
-            "parameters": {
-                "return_all_scores": True,
+        if not self.long_email_mode:
+            return [text]
+        return token_windows(
+            text, self.max_input_tokens, self.long_email_overlap, self.long_email_max_windows, self.classification_model
+        )
+
+    def _aggregate_window_results(self, results: List[Dict], original_text: str) -> Dict:
+        """
+        Voto ponderado pela confiança entre as janelas. / Confidence-weighted vote across windows.
+
+        A confiança final é a média das janelas vencedoras, reduzida pela fração do peso total que elas têm.
+        / The final confidence is the winning windows' mean, scaled down by their share of the total weight.
+        """
+
+        votes: Dict[str, float] = {}
+        for result in results:
+            votes[result["classification"]] = votes.get(result["classification"], 0.0) + result["confidence"]
+
+        classification = max(votes, key=votes.get)
+        winners = [result["confidence"] for result in results if result["classification"] == classification]
+        confidence = (sum(winners) / len(winners)) * (votes[classification] / max(sum(votes.values()), 1e-9))
+
+        return {
+            "classification": classification,
+            "confidence": confidence,
+            "processing_details": {
+                "method": "huggingface_api_windows",
+                "tier": TIER_API,
+                "model_used": self.classification_model,
+                "windows": len(results),
+                "window_votes": votes,
+                "window_results": [
+                    {"classification": result["classification"], "confidence": result["confidence"]} for result in results
+                ],
+                "text_length": len(original_text),
+                "processed_at": time.time(),
             },
         }
 
-        for attempt in range(self.retry_attempts):
+    @STAGE_LATENCY.timed("api_call")
+    def _classify_with_api(self, text: str, deadline: Optional[Deadline] = None, wait_on_loading: bool = True) -> Dict:
+        """Chama a API Hugging Face para classificação / Calls Hugging Face API for classification."""
+
+        windows = self._model_inputs(text)
+        if len(windows) > 1:
+            # Todas as janelas em uma única chamada / Every window in a single call
+            payload = {"inputs": windows, "parameters": {"return_all_scores": True}}
+            result = self._post_classification(payload, deadline, wait_on_loading)
+            return self._process_window_results(result, windows, text)
+
+        payload = {"inputs": text, "parameters": {"return_all_scores": True}}
+        result = self._post_classification(payload, deadline, wait_on_loading)
+        return self._process_api_classification_result(result, text)
+
+    def _process_window_results(self, result, windows: List[str], original_text: str) -> Dict:
+        if not isinstance(result, list) or len(result) != len(windows):
+            raise ValueError("Resultado da API por janelas inválido")
+        window_results = [self._process_api_classification_result([scores], window) for scores, window in zip(result, windows)]
+        return self._aggregate_window_results(window_results, original_text)
+
+    @STAGE_LATENCY.timed("api_call")
+    def _classify_batch_with_api(self, texts: List[str]) -> List[Dict]:
+        """Classifica um lote com uma única chamada (``inputs`` como lista). / Classifies a chunk with a single call (list-valued ``inputs``)."""
+
+        # Em lote, textos longos vão só com a primeira janela / In a batch, long texts only send their first window
+        inputs = [self._model_inputs(text)[0] for text in texts] if self.long_email_mode else texts
+        result = self._post_classification({"inputs": inputs, "parameters": {"return_all_scores": True}})
+
+        if not isinstance(result, list) or len(result) != len(texts):
+            raise ValueError("Resultado da API em lote inválido")
+
+        return [self._process_api_classification_result([scores], text) for scores, text in zip(result, texts)]
+
+    def _chunk_texts(self, texts: List[str]) -> List[List[str]]:
+        """Divide os textos em lotes limitados por quantidade e caracteres. / Splits texts into chunks bounded by count and characters."""
+
+        chunks, current, current_chars = [], [], 0
+        for text in texts:
+            if current and (len(current) >= self.batch_size or current_chars + len(text) > self.batch_max_chars):
+                chunks.append(current)
+                current, current_chars = [], 0
+            current.append(text)
+            current_chars += len(text)
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _post_classification(self, payload: Dict, deadline: Optional[Deadline] = None, wait_on_loading: bool = True):
+        """
+        POST com retry na API de classificação; retorna o JSON. / POST with retry to the classification API; returns the JSON.
+
+        Passa pelo circuit breaker: com o circuito aberto levanta ``CircuitOpenError`` sem tocar a rede, e a
+        requisição de teste (meio-aberto) faz uma única tentativa. / Goes through the circuit breaker: when open
+        it raises ``CircuitOpenError`` without touching the network, and the (half-open) probe makes a single attempt.
+
+        Com ``deadline``, o timeout de leitura e as esperas de retry são limitados ao tempo restante e
+        ``DeadlineExceeded`` é levantada quando ele acaba. / With ``deadline``, the read timeout and retry waits
+        are capped to the time left and ``DeadlineExceeded`` is raised when it runs out.
+
+        Com ``wait_on_loading=False``, um 503 levanta ``ModelLoadingError`` em vez de aguardar. / With
+        ``wait_on_loading=False``, a 503 raises ``ModelLoadingError`` instead of waiting.
+        """
+
+        url = f"{self.api_url}/{self.classification_model}"
+        is_probe = self.circuit_breaker.acquire()
+        attempts = 1 if is_probe else self.retry_attempts
+
+        for attempt in range(attempts):
+            read_timeout = self._attempt_timeout(deadline)
             try:
                 logger.debug(f"Tentativa {attempt + 1} - Chamando API {self.classification_model}")
 
-                response = requests.post(url, headers=self.headers, json=payload, timeout=self.timeout)
+                response = get_http_session().post(url, headers=self.headers, json=payload, timeout=http_timeout(read_timeout))
 
-                self.stats["api_calls"] += 1
+                self.stats.incr("api_calls")
 
                 if response.status_code == 200:
-                    result = response.json()
-                    return self._process_api_classification_result(result, text)
+                    self.circuit_breaker.record_success()
+                    return response.json()
 
                 elif response.status_code == 503:
-                    wait_time = 2**attempt
+                    stop = self._record_backend_failure(is_probe)
+                    if not wait_on_loading:
+                        raise ModelLoadingError(self._estimated_load_time(response))
+                    if stop or attempt == attempts - 1:
+                        raise HuggingFaceAPIError("Modelo indisponível (503)")
+                    wait_time = self._retry_wait(2**attempt, deadline)
                     logger.info(f"Modelo carregando, aguardando {wait_time}s antes de tentar novamente.")
                     time.sleep(wait_time)
                     continue
 
                 else:
                     error_message = f"Erro na API: {response.status_code} - {response.text}"
-                    if attempt == self.retry_attempts - 1:
+                    stop = response.status_code >= 500 and self._record_backend_failure(is_probe)
+                    if stop or attempt == attempts - 1:
                         raise HuggingFaceAPIError(error_message)
                     logger.warning(f"{error_message}, tentando novamente...")
 
             except requests.exceptions.Timeout:
-                if attempt == self.retry_attempts - 1:
+                if read_timeout < self.timeout:
+                    # Timeout encurtado pelo orçamento: não é falha do backend / Budget-shortened timeout: not a backend failure
+                    raise DeadlineExceeded("Orçamento esgotado aguardando a API")
+                if self._record_backend_failure(is_probe) or attempt == attempts - 1:
                     raise HuggingFaceAPIError("Timeout na API")
                 logger.warning(f"Timeout na tentativa {attempt + 1}")
 
             except requests.exceptions.RequestException as e:
-                if attempt == self.retry_attempts - 1:
+                if self._record_backend_failure(is_probe) or attempt == attempts - 1:
+                    raise HuggingFaceAPIError(f"Erro de conexão: {str(e)}")
+                logger.warning(f"Erro de conexão: {str(e)}")
+
+        raise HuggingFaceAPIError("Todas as tentativas de API falharam")
+
+    def _estimated_load_time(self, response) -> float:
+        """Lê ``estimated_time`` do corpo do 503 da Hugging Face. / Reads ``estimated_time`` from the Hugging Face 503 body."""
+
+        try:
+            return float(response.json().get("estimated_time"))
+        except Exception:
+            return settings.AI_SETTINGS["AI_REFINE_DEFAULT_DELAY"]
+
+    def _mark_provisional(self, result: Dict, refine_after: float) -> Dict:
+        result["processing_details"] = {**result["processing_details"], "provisional": True, "refine_after": refine_after}
+        return result
+
+    def _attempt_timeout(self, deadline: Optional[Deadline]) -> float:
+        """Timeout de leitura da próxima tentativa, dentro do orçamento. / Read timeout of the next attempt, within the budget."""
+
+        if deadline is None:
+            return self.timeout
+        if not tier_fits(deadline, TIER_API):
+            raise DeadlineExceeded("Orçamento insuficiente para chamar a API")
+        return deadline.timeout(self.timeout)
+
+    def _retry_wait(self, wait_time: float, deadline: Optional[Deadline]) -> float:
+        if deadline is not None and not deadline.allows(wait_time + tier_min_budget(TIER_API)):
+            raise DeadlineExceeded("Orçamento insuficiente para aguardar o modelo")
+        return wait_time
+
+    def _record_backend_failure(self, is_probe: bool) -> bool:
+        """Registra a falha no circuito; ``True`` se as tentativas devem parar. / Records the failure; ``True`` if retries must stop."""
+
+        self.circuit_breaker.record_failure(is_probe)
+        return is_probe or self.circuit_breaker.state != CLOSED
+
+    async def _arecord_backend_failure(self, is_probe: bool) -> bool:
+        await self.circuit_breaker.arecord_failure(is_probe)
+        return is_probe or await self.circuit_breaker.astate() != CLOSED
+
+    @STAGE_LATENCY.timed("api_call")
+    async def _aclassify_with_api(self, text: str, deadline: Optional[Deadline] = None, wait_on_loading: bool = True) -> Dict:
+        windows = self._model_inputs(text)
+        if len(windows) > 1:
+            payload = {"inputs": windows, "parameters": {"return_all_scores": True}}
+            result = await self._apost_classification(payload, deadline, wait_on_loading)
+            return self._process_window_results(result, windows, text)
+
+        payload = {"inputs": text, "parameters": {"return_all_scores": True}}
+        result = await self._apost_classification(payload, deadline, wait_on_loading)
+        return self._process_api_classification_result(result, text)
+
+    async def _apost_classification(self, payload: Dict, deadline: Optional[Deadline] = None, wait_on_loading: bool = True):
+        """Equivalente assíncrono de ``_post_classification`` (httpx). / Async equivalent of ``_post_classification`` (httpx)."""
+
+        if not HTTPX_AVAILABLE:
+            # Sem httpx, a chamada bloqueante vai para uma thread / Without httpx, the blocking call goes to a thread
+            return await sync_to_async(self._post_classification, thread_sensitive=False)(payload, deadline, wait_on_loading)
+
+        url = f"{self.api_url}/{self.classification_model}"
+        client = get_async_http_client()
+        is_probe = await self.circuit_breaker.aacquire()
+        attempts = 1 if is_probe else self.retry_attempts
+
+        for attempt in range(attempts):
+            read_timeout = self._attempt_timeout(deadline)
+            try:
+                logger.debug(f"Tentativa {attempt + 1} - Chamando API {self.classification_model} (async)")
+
+                response = await client.post(url, headers=self.headers, json=payload, timeout=async_http_timeout(read_timeout))
+
+                self.stats.incr("api_calls")
+
+                if response.status_code == 200:
+                    await self.circuit_breaker.arecord_success()
+                    return response.json()
+
+                elif response.status_code == 503:
+                    stop = await self._arecord_backend_failure(is_probe)
+                    if not wait_on_loading:
+                        raise ModelLoadingError(self._estimated_load_time(response))
+                    if stop or attempt == attempts - 1:
+                        raise HuggingFaceAPIError("Modelo indisponível (503)")
+                    wait_time = self._retry_wait(2**attempt, deadline)
+                    logger.info(f"Modelo carregando, aguardando {wait_time}s antes de tentar novamente.")
+                    await asyncio.sleep(wait_time)
+                    continue
+
+                else:
+                    error_message = f"Erro na API: {response.status_code} - {response.text}"
+                    stop = response.status_code >= 500 and await self._arecord_backend_failure(is_probe)
+                    if stop or attempt == attempts - 1:
+                        raise HuggingFaceAPIError(error_message)
+                    logger.warning(f"{error_message}, tentando novamente...")
+
+            except httpx.TimeoutException:
+                if read_timeout < self.timeout:
+                    raise DeadlineExceeded("Orçamento esgotado aguardando a API")
+                if await self._arecord_backend_failure(is_probe) or attempt == attempts - 1:
+                    raise HuggingFaceAPIError("Timeout na API")
+                logger.warning(f"Timeout na tentativa {attempt + 1}")
+
+            except httpx.HTTPError as e:
+                if await self._arecord_backend_failure(is_probe) or attempt == attempts - 1:
                     raise HuggingFaceAPIError(f"Erro de conexão: {str(e)}")
                 logger.warning(f"Erro de conexão: {str(e)}")
 
@@ -295,6 +928,7 @@ class AIClassificationService:
             "confidence": adjusted_confidence,
             "processing_details": {
                 "method": "huggingface_api",
+                "tier": TIER_API,
                 "model_used": self.classification_model,
                 "original_sentiment": sentiment,
                 "original_confidence": confidence,
@@ -304,10 +938,20 @@ class AIClassificationService:
             },
         }
 
-    def _classify_with_fallback(self, text: str) -> Dict:
-        """Usa métodos de fallback quando API falha. / Uses fallback methods when API fails."""
+    @STAGE_LATENCY.timed("fallback")
+    def _classify_with_fallback(
+        self, text: str, deadline: Optional[Deadline] = None, linear_result: Optional[Dict] = None
+    ) -> Dict:
+        """
+        Usa métodos de fallback quando API falha. / Uses fallback methods when API fails.
 
-        self.stats["fallback_uses"] += 1
+        Ordem: heurística confiável, modelo linear confiável, consenso com o modelo local, heurística.
+        ``linear_result`` é o resultado já calculado em lote, se houver. / Order: confident heuristics, confident
+        linear model, consensus with the local model, heuristics. ``linear_result`` is the result already
+        computed in a batch, if any.
+        """
+
+        self.stats.incr("fallback_uses")
 
         # MUDANÇA: Priorizar heurística para classificação de produtividade / CHANGE: Prioritize heuristics for productivity classification
         logger.info("Usando fallback heurístico (prioridade para produtividade).")
@@ -318,8 +962,15 @@ class AIClassificationService:
             logger.info(f"✅ Heurística confiável: {heuristic_result['confidence']:.2f}")
             return heuristic_result
 
+        # Modelo linear treinado com os emails do próprio sistema / Linear model trained on the system's own emails
+        if linear_result is None:
+            linear_result = self._classify_with_linear_model([text])[0]
+        if self._is_confident_linear(linear_result):
+            logger.info(f"✅ Modelo linear confiável: {linear_result['confidence']:.2f}")
+            return linear_result
+
         # Senão, tentar modelo local como validação adicional / Else, try local model as additional validation
-        if self.fallback_to_local and TRANSFORMERS_AVAILABLE:
+        if self.fallback_to_local and local_engine_available(self.local_engine) and tier_fits(deadline, TIER_LOCAL_MODEL):
             try:
                 local_result = self._classify_with_local_model(text)
 
@@ -333,6 +984,7 @@ class AIClassificationService:
                         "confidence": confidence,
                         "processing_details": {
                             "method": "consensus_fallback",
+                            "tier": TIER_LOCAL_MODEL,
                             "heuristic_confidence": heuristic_result["confidence"],
                             "local_confidence": local_result["confidence"],
                             "consensus_boost": True,
@@ -351,14 +1003,99 @@ class AIClassificationService:
 
         return heuristic_result
 
+    async def _aclassify_with_fallback(
+        self, text: str, deadline: Optional[Deadline] = None, linear_result: Optional[Dict] = None
+    ) -> Dict:
+        return await sync_to_async(self._classify_with_fallback, thread_sensitive=False)(text, deadline, linear_result)
+
+    def _classify_batch_with_fallback(
+        self, texts: List[str], linear_results: Optional[List[Optional[Dict]]] = None
+    ) -> List[Dict]:
+        """Fallback de um lote, com o modelo linear vetorizado. / Fallback for a batch, with the linear model vectorized."""
+
+        if linear_results is None:
+            linear_results = self._classify_with_linear_model(texts)
+        return [self._classify_with_fallback(text, linear_result=linear) for text, linear in zip(texts, linear_results)]
+
+    def _is_confident_linear(self, linear_result: Optional[Dict]) -> bool:
+        return linear_result is not None and linear_result["confidence"] >= self.linear_min_confidence
+
+    def _classify_with_linear_model(self, texts: List[str]) -> List[Optional[Dict]]:
+        """
+        Classifica um lote com o modelo linear; ``None`` por texto se não houver modelo. / Classifies a batch with
+        the linear model; ``None`` per text when there is no model.
+        """
+
+        engine = self._get_linear_model()
+        if engine is None:
+            return [None] * len(texts)
+
+        try:
+            batch_scores = engine.classify_batch(texts)
+        except Exception as e:
+            logger.warning(f"Modelo linear falhou: {str(e)}")
+            return [None] * len(texts)
+
+        return [
+            {
+                "classification": scores[0]["label"],
+                "confidence": scores[0]["score"],
+                "processing_details": {
+                    "method": "linear_model",
+                    "tier": TIER_LINEAR_MODEL,
+                    "model_version": engine.version,
+                    "all_scores": scores,
+                    "processed_at": time.time(),
+                },
+            }
+            for scores in batch_scores
+        ]
+
+    def _get_linear_model(self) -> Optional[LinearEngine]:
+        """
+        Engine linear da versão publicada, trocado a quente quando sai uma versão nova. / Linear engine of the
+        published version, hot-swapped when a new version comes out.
+
+        A versão é conferida no máximo a cada ``AI_LINEAR_MODEL_CHECK_INTERVAL`` segundos, por uma thread só;
+        as demais seguem com a referência atual, sem lock. A nova versão é carregada por inteiro antes de trocar a
+        referência, e quem já pegou a antiga termina com ela. / The version is checked at most every
+        ``AI_LINEAR_MODEL_CHECK_INTERVAL`` seconds, by a single thread; the others carry on with the current
+        reference, lock-free. The new version is fully loaded before the reference is swapped, and callers
+        already holding the old one finish with it.
+        """
+
+        if not self.linear_model_enabled:
+            return None
+
+        checked_at = self._linear_model_checked_at
+        if checked_at is not None and time.monotonic() - checked_at < self.linear_check_interval:
+            return self._linear_model
+        if not self._linear_model_lock.acquire(blocking=False):
+            return self._linear_model
+
+        try:
+            self._linear_model_checked_at = time.monotonic()
+            version = published_version()
+            current = self._linear_model
+            if version is not None and (current is None or current.version != version):
+                self._linear_model = LinearEngine(version=version)
+                logger.info(f"Modelo linear carregado: {version} (anterior: {current.version if current else None})")
+            elif version is None and current is None:
+                logger.info("Nenhum modelo linear publicado (python manage.py train_classifier)")
+        except Exception as e:
+            # Mantém a versão atual / Keep the current version
+            logger.warning(f"Falha ao carregar o modelo linear: {str(e)}")
+        finally:
+            self._linear_model_lock.release()
+        return self._linear_model
+
     def _classify_with_local_model(self, text: str) -> Dict:
         """Classifica usando modelo local. / Classifies using local model."""
 
         if not self._local_classifier:
-            logger.info("Carregando modelo local...")
-            self._local_classifier = pipeline(
-                "sentiment-analysis", model=self.backup_model, top_k=None  # return_all_scores=True
-            )
+            with self._local_classifier_lock:
+                if not self._local_classifier:
+                    self._local_classifier = self._load_local_classifier()
 
         result = self._local_classifier(text[:512])
 
@@ -370,28 +1107,7 @@ class AIClassificationService:
             text_lower = text.lower()
 
             # Verificar indicadores de produtividade independente do sentimento / Check productivity indicators regardless of sentiment
-            productive_indicators = [
-                "reunião",
-                "meeting",
-                "projeto",
-                "project",
-                "deadline",
-                "prazo",
-                "urgente",
-                "urgent",
-                "importante",
-                "important",
-                "tarefa",
-                "task",
-                "entrega",
-                "delivery",
-                "proposta",
-                "proposal",
-                "contrato",
-                "contract",
-            ]
-
-            productive_count = sum(1 for word in productive_indicators if word in text_lower)
+            productive_count = LOCAL_MODEL_LEXICON.count(text_lower)["productive"]
 
             # Se tem muitos indicadores produtivos, forçar productive independente do sentimento / If many productive indicators, force productive regardless of sentiment
             if productive_count >= 2:
@@ -409,7 +1125,9 @@ class AIClassificationService:
                 "confidence": confidence,
                 "processing_details": {
                     "method": "local_model_enhanced",
+                    "tier": TIER_LOCAL_MODEL,
                     "model_used": self.backup_model,
+                    "engine": self._local_classifier.name,
                     "original_sentiment": best_score["label"],
                     "productive_indicators_found": productive_count,
                     "override_applied": productive_count >= 2,
@@ -419,123 +1137,28 @@ class AIClassificationService:
 
         raise ValueError("Modelo local retornou resultado inválido")
 
-    def _classify_with_heuristics(self, text: str) -> Dict:
-        """Classificação heurística baseada em palavras-chave. / Heuristic classification based on keywords."""
+    def _load_local_classifier(self):
+        """
+        Carrega o engine local, atrás do micro-batcher se ``AI_LOCAL_BATCH_MAX_SIZE`` > 1. / Loads the local engine,
+        behind the micro-batcher if ``AI_LOCAL_BATCH_MAX_SIZE`` > 1.
+        """
 
-        productive_keywords = [
-            # Reuniões e encontros / Meetings and gatherings
-            "reunião",
-            "meeting",
-            "encontro",
-            "videoconferência",
-            "call",
-            "zoom",
-            "teams",
-            # Projetos e trabalho / Projects and work
-            "projeto",
-            "project",
-            "trabalho",
-            "work",
-            "tarefa",
-            "task",
-            "atividade",
-            # Prazos e urgência / Deadlines and urgency
-            "deadline",
-            "prazo",
-            "urgente",
-            "urgent",
-            "importante",
-            "important",
-            "asap",
-            # Entregas e resultados / Deliveries and results
-            "entrega",
-            "delivery",
-            "resultado",
-            "result",
-            "relatório",
-            "report",
-            # Propostas e negócios / Proposals and business
-            "proposta",
-            "proposal",
-            "contrato",
-            "contract",
-            "acordo",
-            "agreement",
-            # Documentos e dados / Documents and data
-            "documento",
-            "document",
-            "planilha",
-            "spreadsheet",
-            "apresentação",
-            # Comunicação profissional / Professional communication
-            "prezado",
-            "dear",
-            "cordialmente",
-            "regards",
-            "atenciosamente",
-            # Ações e verbos de trabalho / Actions and work verbs
-            "agendar",
-            "schedule",
-            "confirmar",
-            "confirm",
-            "revisar",
-            "review",
-            "aprovar",
-            "approve",
-            "enviar",
-            "send",
-            "receber",
-            "receive",
-        ]
+        logger.info(f"Carregando modelo local ({self.local_engine})...")
+        engine = load_local_engine(self.backup_model, self.local_engine)
+        # O servidor compartilhado já faz o próprio batching / The shared server already batches on its own
+        if self.local_batch_size <= 1 or self.local_engine == ENGINE_SERVER:
+            return engine
+        return MicroBatcher(engine, max_batch_size=self.local_batch_size, max_wait_ms=self.local_batch_wait_ms)
 
-        unproductive_keywords = [
-            # Marketing e promoções / Marketing and promotions
-            "promoção",
-            "promotion",
-            "desconto",
-            "discount",
-            "oferta",
-            "offer",
-            "grátis",
-            "free",
-            "ganhe",
-            "win",
-            "premio",
-            "prize",
-            # Spam típico / Typical spam
-            "spam",
-            "clique aqui",
-            "click here",
-            "compre agora",
-            "buy now",
-            # Marketing digital / Digital marketing
-            "marketing",
-            "newsletter",
-            "publicidade",
-            "advertising",
-            # Redes sociais / Social media
-            "social",
-            "facebook",
-            "instagram",
-            "twitter",
-            "linkedin",
-            # Urgência falsa / False urgency
-            "limitado",
-            "limited",
-            "últimas horas",
-            "last hours",
-            # Emojis excessivos (indicador de spam) / Excessive emojis (spam indicator)
-            "🎉",
-            "💰",
-            "🔥",
-            "⚡",
-            "🎊",
-        ]
+    def _classify_with_heuristics(self, text: str) -> Dict:
+        """Classificação heurística baseada em palavras-chave. / Heuristic classification based on keywords."""
 
         text_lower = text.lower()
 
-        productive_matches = sum(1 for kw in productive_keywords if kw in text_lower)
-        unproductive_matches = sum(1 for kw in unproductive_keywords if kw in text_lower)
+        # Uma varredura pelo matcher compartilhado / A single scan through the shared matcher
+        matches = HEURISTIC_LEXICON.scan(text_lower)
+        productive_matches = matches.count("productive")
+        unproductive_matches = matches.count("unproductive")
 
         total_words = len(text_lower.split())
         productive_density = productive_matches / max(total_words, 1)
@@ -562,8 +1185,11 @@ class AIClassificationService:
             "confidence": confidence,
             "processing_details": {
                 "method": "heuristic_enhanced",
+                "tier": TIER_HEURISTIC,
+                "lexicon": HEURISTIC_LEXICON.key,
                 "productive_keywords": productive_matches,
                 "unproductive_keywords": unproductive_matches,
+                "matched_keywords": {category: matches.keywords(category) for category in matches.counts},
                 "text_length": total_words,
                 "productive_density": productive_density,
                 "processed_at": time.time(),
@@ -574,7 +1200,7 @@ class AIClassificationService:
         """Ajusta confiança baseada no contexto do email. / Adjusts confidence based on email context."""
 
         # Aumentar confiança para emails claramente urgentes / Increase confidence for clearly urgent emails
-        if any(word in text.lower() for word in ["urgente", "asap", "emergency", "deadline"]):
+        if CONTEXT_LEXICON.count(text.lower())["confidence_boost"]:
             if classification == "productive":
                 confidence = min(0.95, confidence + 0.1)
 
@@ -587,13 +1213,14 @@ class AIClassificationService:
     def _extract_email_context(self, email_content: str) -> Dict:
         """Extrai contexto do email para personalizar resposta. / Extracts email context to personalize response."""
 
+        found = CONTEXT_LEXICON.count(email_content.lower())
         context = {
-            "has_meeting": any(word in email_content.lower() for word in ["reunião", "meeting", "encontro"]),
-            "has_deadline": any(word in email_content.lower() for word in ["prazo", "deadline", "urgente"]),
+            "has_meeting": found["meeting"] > 0,
+            "has_deadline": found["deadline"] > 0,
             "has_questions": "?" in email_content,
-            "is_urgent": any(word in email_content.lower() for word in ["urgente", "urgent", "asap"]),
+            "is_urgent": found["urgent"] > 0,
             "length": len(email_content),
-            "tone": "formal" if any(word in email_content.lower() for word in ["prezado", "cordialmente"]) else "casual",
+            "tone": "formal" if found["formal"] else "casual",
         }
         return context
 
@@ -624,25 +1251,124 @@ class AIClassificationService:
         # Por enquanto, usar templates / For now, use templates
         return self._generate_response_template(classification, context)
 
-    def _check_rate_limit(self) -> bool:
+    @STAGE_LATENCY.timed("rate_limit")
+    def _check_rate_limit(self, deadline: Optional[Deadline] = None) -> bool:
+        """
+        Consome um token do bucket; sem token, espera se a reposição couber em ``AI_RATE_LIMIT_MAX_WAIT`` e no
+        orçamento, senão degrada. / Takes a token from the bucket; without one, waits if the refill fits within
+        ``AI_RATE_LIMIT_MAX_WAIT`` and the budget, otherwise degrades.
+        """
 
-        current_minute = int(time.time() // 60)
-        cache_key = f"ai_rate_limit_{current_minute}"
+        if self.rate_limiter.acquire():
+            return True
 
-        current_count = cache.get(cache_key, 0)
-        if current_count >= self.rate_limit:
+        wait_time = self.rate_limiter.time_until_next_token()
+        if not self._can_wait_for_token(wait_time, deadline):
             return False
 
-        cache.set(cache_key, current_count + 1, 60)
-        return True
+        time.sleep(wait_time)
+        return self.rate_limiter.acquire()
+
+    @STAGE_LATENCY.timed("rate_limit")
+    async def _acheck_rate_limit(self, deadline: Optional[Deadline] = None) -> bool:
+
+        if await self.rate_limiter.aacquire():
+            return True
+
+        wait_time = await self.rate_limiter.atime_until_next_token()
+        if not self._can_wait_for_token(wait_time, deadline):
+            return False
+
+        await asyncio.sleep(wait_time)
+        return await self.rate_limiter.aacquire()
+
+    def _can_wait_for_token(self, wait_time: float, deadline: Optional[Deadline]) -> bool:
+        if wait_time > self.rate_limit_max_wait:
+            return False
+        return deadline is None or deadline.allows(wait_time + tier_min_budget(TIER_API))
 
     def _get_cache_key(self, operation: str, content: str) -> str:
         """Gera chave de cache baseada no conteúdo. / Generates cache key based on content."""
 
-        import hashlib
+        return make_key(operation, self.cache_namespace, content)
+
+    @STAGE_LATENCY.timed("near_duplicate")
+    def _lookup_near_duplicate(self, email_content: str) -> Tuple[Optional[int], Optional[Dict]]:
+        """
+        Impressão do email e a classificação de um quase idêntico, se houver. / The email's fingerprint and a
+        near-identical email's classification, if any.
+        """
+
+        if self.near_duplicates is None:
+            return None, None
+
+        fingerprint = self.near_duplicates.fingerprint(email_content)
+        match = self.near_duplicates.lookup(fingerprint) if fingerprint is not None else None
+        if match is None:
+            return fingerprint, None
+
+        stored, distance = match
+        self.stats.incr("near_duplicate_hits")
+        logger.info(f"Classificação reaproveitada de email quase idêntico (distância {distance}).")
+
+        # Cópia: o resultado guardado é compartilhado por todos os quase duplicados / Copy: the stored result is
+        # shared by every near duplicate
+        result = copy.deepcopy(stored)
+        result["processing_details"]["near_duplicate"] = {
+            "distance": distance,
+            "similarity": round(1 - distance / FINGERPRINT_BITS, 3),
+        }
+        return fingerprint, result
+
+    def _remember_near_duplicate(self, fingerprint: Optional[int], result: Dict):
+        # Só resultados do modelo, os mesmos que vão para o cache / Only model results, the same ones that are cached
+        if fingerprint is None or result.get("processing_details", {}).get("method") != "huggingface_api":
+            return
+        self.near_duplicates.add(fingerprint, result)
+
+    def _load_near_duplicates(self):
+        """Carga única das impressões gravadas na tabela ``emails``. / One-off load of the fingerprints on ``emails``."""
+
+        with self._near_duplicates_lock:
+            if self.near_duplicates.loaded_from_db:
+                return
+            try:
+                load_from_emails(self.near_duplicates, self.confidence_threshold)
+            except Exception as e:
+                # Sem banco, o índice segue só com o que for classificado neste processo / Without the database,
+                # the index only holds what this process classifies
+                logger.warning(f"Carga do índice de quase-duplicatas falhou: {str(e)}")
+                self.near_duplicates.loaded_from_db = True
+
+    def _flight_key(self, cache_key: str, provisional: bool) -> str:
+        # Resultados provisórios não servem para quem pediu o definitivo / Provisional results do not serve callers
+        # that asked for the final one
+        return f"{cache_key}:provisional" if provisional else cache_key
+
+    def _flight_timeout(self, deadline: Optional[Deadline]) -> float:
+        """Espera máxima pelo líder. / Max wait for the leader."""
+
+        return deadline.remaining() if deadline else self.single_flight.lock_timeout
 
-        content_hash = hashlib.md5(content.encode()).hexdigest()[:8]
-        return f"ai_{operation}_{content_hash}"
+    def _build_cache_namespace(self) -> str:
+        """
+        Versão da configuração que produz os resultados: modelos, engine, léxicos e limiares. / Version of the
+        configuration producing results: models, engine, lexicons and thresholds.
+        """
+
+        return build_namespace(
+            [
+                settings.AI_SETTINGS["AI_CACHE_VERSION"],
+                self.classification_model,
+                self.response_model,
+                self.backup_model,
+                self.local_engine,
+                self.confidence_threshold,
+                self.max_input_tokens,
+                self.long_email_mode and [self.long_email_overlap, self.long_email_max_windows],
+                [lexicon.fingerprint for lexicon in (HEURISTIC_LEXICON, CONTEXT_LEXICON, LOCAL_MODEL_LEXICON)],
+            ]
+        )
 
     def _get_fallback_classification(self, reason: str = "Unknown error") -> Dict:
         """Classificação padrão quando tudo falha. / Default classification when all else fails."""
@@ -650,7 +1376,12 @@ class AIClassificationService:
         return {
             "classification": "unproductive",
             "confidence": 0.5,
-            "processing_details": {"method": "fallback_default", "reason": reason, "processed_at": time.time()},
+            "processing_details": {
+                "method": "fallback_default",
+                "tier": "default",
+                "reason": reason,
+                "processed_at": time.time(),
+            },
         }
 
     def _get_fallback_response(self, classification: str) -> Dict:
@@ -671,13 +1402,38 @@ class AIClassificationService:
             },
         }
 
+    def get_usage_stats(self, scope: str = "cluster") -> Dict:
+        """
+        Contadores e taxas de uso; ``scope="cluster"`` soma todos os workers, ``"process"`` só este. / Usage
+        counters and rates; ``scope="cluster"`` sums every worker, ``"process"`` only this one.
+        """
+
+        counts = self.stats.totals() if scope == "cluster" else self.stats.local()
+        return {
+            **counts,
+            "cache_hit_rate": counts["cache_hits"] / max(1, counts["api_calls"] + counts["cache_hits"]),
+            "error_rate": counts["errors"] / max(1, counts["api_calls"]),
+            "fallback_rate": counts["fallback_uses"] / max(1, counts["api_calls"] + counts["fallback_uses"]),
+        }
+
     def get_stats(self) -> Dict:
 
         return {
-            **self.stats,
-            "cache_hit_rate": self.stats["cache_hits"] / max(1, self.stats["api_calls"] + self.stats["cache_hits"]),
-            "error_rate": self.stats["errors"] / max(1, self.stats["api_calls"]),
-            "fallback_rate": self.stats["fallback_uses"] / max(1, self.stats["api_calls"] + self.stats["fallback_uses"]),
+            **self.get_usage_stats(),
+            "process": self.stats.local(),
+            "circuit_breaker": self.circuit_breaker.get_stats(),
+            "connectivity": self.connectivity_status(),
+            "lexicons": lexicon_stats(),
+            "result_cache": {**self.result_cache.get_stats(), "namespace": self.cache_namespace},
+            "single_flight": self.single_flight.get_stats(),
+            "linear_model": (
+                {**self._linear_model.metadata, "mapped": self._linear_model.mapped}
+                if self._linear_model is not None
+                else None
+            ),
+            "near_duplicates": self.near_duplicates.get_stats() if self.near_duplicates is not None else None,
+            "rate_limiter": self.rate_limiter.get_stats(),
+            "local_batcher": self._local_classifier.get_stats() if isinstance(self._local_classifier, MicroBatcher) else None,
         }
 
     # Instancia singleton do serviço / Singleton instance of the service
@@ -686,15 +1442,20 @@ class AIClassificationService:
 _ai_service_instance = None
 
 
-def get_ai_service():
+def get_ai_service(warm_up: bool = True):
     """
     Retorna instância singleton do AI service. / Returns singleton instance of the AI service.
     Inicializa apenas quando necessário (lazy loading). / Initializes only when needed (lazy loading).
+
+    ``warm_up=False`` é usado antes do fork, onde não se pode iniciar threads. / ``warm_up=False`` is used before
+    fork, where threads must not be started.
     """
 
     global _ai_service_instance
     if _ai_service_instance is None:
         _ai_service_instance = AIClassificationService()
+        if warm_up and settings.AI_SETTINGS["AI_WARMUP_ON_START"]:
+            _ai_service_instance.warm_up()
     return _ai_service_instance
 
 
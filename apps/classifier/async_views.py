@@ -0,0 +1,153 @@
+"""
+Views assíncronas de classificação / Async classification views.
+
+Servidas via ``core/asgi.py`` (ex.: ``gunicorn core.asgi:application -k uvicorn.workers.UvicornWorker``), as
+chamadas à API de IA não prendem um processo inteiro: enquanto uma inferência aguarda a rede, o mesmo
+worker atende outras requisições. Sob WSGI elas continuam funcionando (o Django executa cada uma em um
+event loop próprio), mas sem o ganho de concorrência. / Served via ``core/asgi.py`` (e.g. ``gunicorn
+core.asgi:application -k uvicorn.workers.UvicornWorker``), AI API calls no longer pin a whole process: while
+one inference waits on the network, the same worker serves other requests. Under WSGI they still work
+(Django runs each one in its own event loop), just without the concurrency gain.
+
+O DRF 3.14 não suporta views ``async``, por isso são views Django puras que reproduzem o formato de resposta
+de ``ClassificationViewSet.classify`` e ``upload_ajax_direct``. / DRF 3.14 does not support ``async`` views, so
+these are plain Django views mirroring the response format of ``ClassificationViewSet.classify`` and
+``upload_ajax_direct``.
+"""
+
+import json
+import logging
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from .deadline import Deadline
+from .metrics import STAGE_LATENCY
+from .models import Classification
+from .refinement import COMPLETED, PROVISIONAL, refine_later
+from .services import aclassify_email_ai
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_email_payload(request):
+    """Lê ``subject``/``content`` de JSON ou formulário. / Reads ``subject``/``content`` from JSON or form data."""
+
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except json.JSONDecodeError:
+            return None
+    else:
+        data = request.POST
+
+    return {"subject": str(data.get("subject", "")).strip(), "content": str(data.get("content", "")).strip()}
+
+
+async def _save_classification(subject, content, result):
+    """Salva o resultado; provisórios são refinados em background. / Saves the result; provisional ones are refined in background."""
+
+    with STAGE_LATENCY.time("db_save"):
+        classification = await Classification.objects.acreate(
+            subject=subject or "Sem assunto",
+            content=content,
+            sender_email="system@autoU.com",
+            classification_result=result["category"],
+            confidence_score=result["confidence"],
+            suggested_response=result.get("suggested_response", result.get("response", "")),
+            ai_model_used=result["model_used"],
+            processing_status=PROVISIONAL if result.get("provisional") else COMPLETED,
+            processing_time_seconds=result["processing_time"],
+            classified_at=timezone.now(),
+        )
+    if result.get("provisional"):
+        refine_later(classification.id, subject, content, result["refine_after"])
+    return classification
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def classify_email_async_api(request):
+    """Classificar email usando IA (assíncrono). / Classify email using AI (async)."""
+
+    payload = _parse_email_payload(request)
+    if payload is None:
+        return JsonResponse({"error": "JSON inválido"}, status=400)
+    if not payload["content"]:
+        return JsonResponse({"content": ["Este campo é obrigatório."]}, status=400)
+
+    deadline = Deadline.from_request(request)
+    try:
+        result = await aclassify_email_ai(
+            payload["subject"], payload["content"], deadline=deadline, provisional=settings.AI_SETTINGS["AI_PROVISIONAL_MODE"]
+        )
+        logger.info(f"✅ IA (async) retornou: {result['category']} ({result['confidence']:.2f})")
+
+        classification = await _save_classification(payload["subject"], payload["content"], result)
+
+        return JsonResponse(
+            {
+                "id": classification.id,
+                "category": result["category"],
+                "confidence": result["confidence"],
+                "suggested_response": classification.suggested_response,
+                "processing_time": result["processing_time"],
+                "ai_enhanced": "ai_details" in result,
+                "model_used": result["model_used"],
+                "tier": result["tier"],
+                "budget": deadline.to_dict(),
+                "processing_status": classification.processing_status,
+                "details": result.get("ai_details", {}),
+            }
+        )
+
+    except Exception as e:
+        logger.error(f"❌ Erro na classificação assíncrona: {str(e)}")
+        return JsonResponse({"error": f"Erro específico: {str(e)}"}, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def upload_ajax_async(request):
+    """Upload AJAX assíncrono (mesmo formato de ``upload_ajax_direct``). / Async AJAX upload (same format as ``upload_ajax_direct``)."""
+
+    payload = _parse_email_payload(request)
+    if payload is None or not payload["content"]:
+        return JsonResponse({"success": False, "error": "Content é obrigatório"}, status=400)
+
+    deadline = Deadline.from_request(request)
+    try:
+        result = await aclassify_email_ai(
+            payload["subject"], payload["content"], deadline=deadline, provisional=settings.AI_SETTINGS["AI_PROVISIONAL_MODE"]
+        )
+    except Exception as e:
+        logger.error(f"Erro no upload_ajax_async: {str(e)}")
+        return JsonResponse({"success": False, "error": f"Erro interno: {str(e)}"}, status=500)
+
+    response_data = {
+        "success": True,
+        "id": None,
+        "category": result["category"],
+        "confidence": result["confidence"],
+        "suggested_response": result.get("suggested_response", result.get("response", "")),
+        "processing_time": f"{result['processing_time']}s",
+        "model_used": result["model_used"],
+        "tier": result["tier"],
+        "processing_status": PROVISIONAL if result.get("provisional") else COMPLETED,
+        "message": "Email classificado com IA (async)!",
+    }
+
+    try:
+        classification = await _save_classification(payload["subject"], payload["content"], result)
+        response_data["id"] = classification.id
+    except Exception as db_error:
+        logger.error(f"Erro ao salvar: {str(db_error)}")
+        # Retornar resultado mesmo se não conseguir salvar / Return the result even if it cannot be saved
+        response_data["message"] += " (não salvo no DB)"
+        response_data["db_error"] = str(db_error)
+
+    response_data["budget"] = deadline.to_dict()
+    return JsonResponse(response_data)
@@ -0,0 +1,61 @@
+"""
+Chaves de cache do AI service / AI service cache keys.
+
+Formato: ``ai:<operação>:<namespace>:<digest>``. / Format: ``ai:<operation>:<namespace>:<digest>``.
+
+- ``digest``: BLAKE2b de 128 bits sobre a forma canônica do texto. Com 128 bits, colisões são desprezíveis em
+  qualquer volume realista (o antigo ``md5[:8]`` tinha 32 bits). / 128-bit BLAKE2b over the canonical form of
+  the text. At 128 bits collisions are negligible at any realistic volume (the old ``md5[:8]`` had 32 bits).
+- Forma canônica: Unicode NFKC, sem respostas citadas (linhas ``>`` e o histórico após "On ... wrote:" /
+  "Em ... escreveu:"), caixa e espaços normalizados. Cópias triviais do mesmo email viram a mesma chave. /
+  Canonical form: Unicode NFKC, quoted replies removed (``>`` lines and the history after "On ... wrote:" /
+  "Em ... escreveu:"), case and whitespace normalized. Trivially different copies of an email share a key.
+- ``namespace``: hash dos modelos, léxicos e limiares que produzem o resultado. Trocar qualquer um deles muda
+  todas as chaves, invalidando o cache sem precisar limpá-lo. / Hash of the models, lexicons and thresholds
+  that produce the result. Changing any of them changes every key, invalidating the cache without clearing it.
+"""
+
+import hashlib
+import json
+import re
+import unicodedata
+from typing import Iterable
+
+DIGEST_BYTES = 16
+NAMESPACE_CHARS = 10
+
+# Linha que abre o histórico de uma resposta / Line that opens a reply's history
+_REPLY_HEADER_RE = re.compile(
+    r"^\s*(?:on\s.+\swrote:|em\s.+\sescreveu:|-{2,}\s*(?:original message|mensagem original)\s*-{2,})\s*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+_QUOTED_LINE_RE = re.compile(r"^\s*>.*$", re.MULTILINE)
+
+
+def canonicalize_text(text: str) -> str:
+    """Forma canônica usada no digest. / Canonical form used for the digest."""
+
+    text = unicodedata.normalize("NFKC", text or "")
+
+    # Histórico só é cortado se houver conteúdo antes dele / History is only cut if there is content before it
+    header = _REPLY_HEADER_RE.search(text)
+    if header and text[: header.start()].strip():
+        text = text[: header.start()]
+    text = _QUOTED_LINE_RE.sub("", text)
+
+    return " ".join(text.casefold().split())
+
+
+def content_digest(text: str) -> str:
+    return hashlib.blake2b(canonicalize_text(text).encode("utf-8"), digest_size=DIGEST_BYTES).hexdigest()
+
+
+def build_namespace(parts: Iterable) -> str:
+    """Versão curta da configuração que produz os resultados. / Short version of the configuration producing results."""
+
+    payload = json.dumps(list(parts), sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=8).hexdigest()[:NAMESPACE_CHARS]
+
+
+def make_key(operation: str, namespace: str, content: str) -> str:
+    return f"ai:{operation}:{namespace}:{content_digest(content)}"
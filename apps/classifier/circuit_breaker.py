@@ -0,0 +1,212 @@
+"""
+Circuit breaker para o backend de inferência / Circuit breaker for the inference backend.
+
+O estado fica no cache do Django (Redis em produção), então todos os workers do gunicorn enxergam o mesmo
+circuito: depois de ``failure_threshold`` falhas consecutivas o circuito abre e as chamadas vão direto para o
+fallback; após ``recovery_timeout`` segundos ele fica meio-aberto e apenas um worker envia a requisição de
+teste. / State lives in Django's cache (Redis in production), so every gunicorn worker sees the same
+circuit: after ``failure_threshold`` consecutive failures the circuit opens and calls go straight to the
+fallback; after ``recovery_timeout`` seconds it becomes half-open and a single worker sends the probe request.
+"""
+
+import logging
+import os
+import time
+from typing import Dict, List
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Quantas transições recentes manter no cache / How many recent transitions to keep in the cache
+MAX_TRANSITIONS = 20
+
+
+class CircuitOpenError(Exception):
+    """Chamada recusada porque o circuito está aberto. / Call rejected because the circuit is open."""
+
+    pass
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker com estado compartilhado via cache. / Circuit breaker with cache-shared state.
+
+    Cada operação tem uma variante ``a*`` com a API assíncrona do cache, para o pipeline assíncrono não bloquear o
+    event loop. / Every operation has an ``a*`` variant using the cache's async API, so the async pipeline does
+    not block the event loop.
+
+    Uso / Usage::
+
+        is_probe = breaker.acquire()  # CircuitOpenError se aberto / if open
+        try:
+            ...
+        except BackendError:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+    """
+
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float, probe_timeout: float = 60):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        # Tempo máximo de um teste antes que outro worker possa tentar / Max probe duration before another worker may try
+        self.probe_timeout = probe_timeout
+
+        self._failures_key = f"circuit_{name}_failures"
+        self._opened_key = f"circuit_{name}_opened_at"
+        self._probe_key = f"circuit_{name}_probe"
+        self._transitions_key = f"circuit_{name}_transitions"
+
+        # Contadores deste processo / Counters for this process
+        self.stats = {"short_circuits": 0, "probes": 0}
+
+    @property
+    def state(self) -> str:
+        return self._state_of(cache.get(self._opened_key))
+
+    async def astate(self) -> str:
+        return self._state_of(await cache.aget(self._opened_key))
+
+    def _state_of(self, opened_at) -> str:
+        if opened_at is None:
+            return CLOSED
+        if time.time() - opened_at < self.recovery_timeout:
+            return OPEN
+        return HALF_OPEN
+
+    def acquire(self) -> bool:
+        """
+        Autoriza uma chamada ao backend; retorna ``True`` se ela for a requisição de teste. / Authorizes a
+        backend call; returns ``True`` if it is the probe request.
+
+        Raises:
+            CircuitOpenError: circuito aberto ou teste já em andamento / circuit open or probe already running
+        """
+
+        state = self.state
+        if state == CLOSED:
+            return False
+
+        # ``cache.add`` é atômico: só um worker ganha o teste / ``cache.add`` is atomic: only one worker wins the probe
+        if state == HALF_OPEN and cache.add(self._probe_key, os.getpid(), self.probe_timeout):
+            self._record_transition(OPEN, HALF_OPEN, "probe")
+            return self._probe()
+        return self._short_circuit()
+
+    async def aacquire(self) -> bool:
+        """Versão assíncrona de ``acquire``. / Async version of ``acquire``."""
+
+        state = await self.astate()
+        if state == CLOSED:
+            return False
+
+        if state == HALF_OPEN and await cache.aadd(self._probe_key, os.getpid(), self.probe_timeout):
+            await self._arecord_transition(OPEN, HALF_OPEN, "probe")
+            return self._probe()
+        return self._short_circuit()
+
+    def _probe(self) -> bool:
+        self.stats["probes"] += 1
+        logger.info(f"Circuito {self.name} meio-aberto, enviando requisição de teste")
+        return True
+
+    def _short_circuit(self):
+        self.stats["short_circuits"] += 1
+        raise CircuitOpenError(f"Circuito {self.name} aberto")
+
+    def record_success(self):
+        # Uma leitura; circuito fechado e sem falhas (o caso comum) não escreve nada / One read; a closed circuit
+        # with no failures (the common case) writes nothing
+        current = cache.get_many([self._opened_key, self._failures_key])
+        if self._opened_key in current:
+            cache.delete_many([self._opened_key, self._probe_key])
+            self._record_transition(HALF_OPEN, CLOSED, "probe succeeded")
+            logger.info(f"Circuito {self.name} fechado")
+        if current.get(self._failures_key):
+            cache.delete(self._failures_key)
+
+    async def arecord_success(self):
+        """Versão assíncrona de ``record_success``. / Async version of ``record_success``."""
+
+        current = await cache.aget_many([self._opened_key, self._failures_key])
+        if self._opened_key in current:
+            await cache.adelete_many([self._opened_key, self._probe_key])
+            await self._arecord_transition(HALF_OPEN, CLOSED, "probe succeeded")
+            logger.info(f"Circuito {self.name} fechado")
+        if current.get(self._failures_key):
+            await cache.adelete(self._failures_key)
+
+    def record_failure(self, is_probe: bool = False):
+        if is_probe:
+            # Teste falhou: reabre por mais um ``recovery_timeout`` / Probe failed: reopen for another ``recovery_timeout``
+            cache.set(self._opened_key, time.time(), None)
+            cache.delete(self._probe_key)
+            self._record_transition(HALF_OPEN, OPEN, "probe failed")
+            logger.warning(f"Teste do circuito {self.name} falhou, circuito reaberto")
+            return
+
+        cache.add(self._failures_key, 0, None)
+        try:
+            failures = cache.incr(self._failures_key)
+        except ValueError:
+            # Chave expirou entre add e incr / Key expired between add and incr
+            cache.set(self._failures_key, 1, None)
+            failures = 1
+
+        if failures >= self.failure_threshold and cache.add(self._opened_key, time.time(), None):
+            self._record_transition(CLOSED, OPEN, f"{failures} consecutive failures")
+            logger.warning(f"Circuito {self.name} aberto após {failures} falhas consecutivas")
+
+    async def arecord_failure(self, is_probe: bool = False):
+        """Versão assíncrona de ``record_failure``. / Async version of ``record_failure``."""
+
+        if is_probe:
+            await cache.aset(self._opened_key, time.time(), None)
+            await cache.adelete(self._probe_key)
+            await self._arecord_transition(HALF_OPEN, OPEN, "probe failed")
+            logger.warning(f"Teste do circuito {self.name} falhou, circuito reaberto")
+            return
+
+        await cache.aadd(self._failures_key, 0, None)
+        try:
+            failures = await cache.aincr(self._failures_key)
+        except ValueError:
+            await cache.aset(self._failures_key, 1, None)
+            failures = 1
+
+        if failures >= self.failure_threshold and await cache.aadd(self._opened_key, time.time(), None):
+            await self._arecord_transition(CLOSED, OPEN, f"{failures} consecutive failures")
+            logger.warning(f"Circuito {self.name} aberto após {failures} falhas consecutivas")
+
+    def reset(self):
+        cache.delete_many([self._failures_key, self._opened_key, self._probe_key, self._transitions_key])
+
+    def _record_transition(self, from_state: str, to_state: str, reason: str):
+        transitions: List[Dict] = cache.get(self._transitions_key, [])
+        cache.set(self._transitions_key, self._append_transition(transitions, from_state, to_state, reason), None)
+
+    async def _arecord_transition(self, from_state: str, to_state: str, reason: str):
+        transitions: List[Dict] = await cache.aget(self._transitions_key, [])
+        await cache.aset(self._transitions_key, self._append_transition(transitions, from_state, to_state, reason), None)
+
+    @staticmethod
+    def _append_transition(transitions: List[Dict], from_state: str, to_state: str, reason: str) -> List[Dict]:
+        transitions.append({"from": from_state, "to": to_state, "reason": reason, "at": time.time(), "pid": os.getpid()})
+        return transitions[-MAX_TRANSITIONS:]
+
+    def get_stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": cache.get(self._failures_key, 0),
+            "opened_at": cache.get(self._opened_key),
+            "failure_threshold": self.failure_threshold,
+            "recovery_timeout": self.recovery_timeout,
+            **self.stats,
+            "transitions": cache.get(self._transitions_key, []),
+        }
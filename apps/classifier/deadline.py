@@ -0,0 +1,104 @@
+"""
+Orçamento de tempo por requisição / Per-request time budget.
+
+A view cria um ``Deadline`` (padrão ``AI_REQUEST_BUDGET`` ou o header ``X-Request-Deadline-Ms`` do cliente) e
+o repassa a cada etapa da classificação. Cada etapa usa só o tempo restante como timeout, e cada camada só roda
+se ainda resta o seu orçamento mínimo (``AI_TIER_LOCAL_MIN_BUDGET`` para o modelo local, ``AI_TIER_API_MIN_BUDGET``
+para a API); a heurística e o modelo linear cabem em qualquer orçamento. / The view creates a ``Deadline``
+(``AI_REQUEST_BUDGET`` by default, or the client's ``X-Request-Deadline-Ms`` header) and passes it to every
+classification stage. Each stage only gets the remaining time as its timeout, and each tier only runs if its own
+minimum budget is still left (``AI_TIER_LOCAL_MIN_BUDGET`` for the local model, ``AI_TIER_API_MIN_BUDGET`` for
+the API); heuristics and the linear model fit within any budget.
+"""
+
+import math
+import time
+from typing import Dict, Optional
+
+from django.conf import settings
+
+# Header enviado pelo cliente, em milissegundos / Client-sent header, in milliseconds
+DEADLINE_HEADER = "X-Request-Deadline-Ms"
+
+# Camadas de classificação / Classification tiers
+TIER_API = "api"
+TIER_LOCAL_MODEL = "local_model"
+# Modelo linear: microssegundos, roda em qualquer orçamento / Linear model: microseconds, runs within any budget
+TIER_LINEAR_MODEL = "linear_model"
+TIER_HEURISTIC = "heuristic"
+
+
+class DeadlineExceeded(Exception):
+    """O orçamento acabou antes da etapa terminar. / The budget ran out before the stage finished."""
+
+    pass
+
+
+class Deadline:
+    """Prazo absoluto (relógio monotônico) de uma requisição. / Absolute (monotonic clock) deadline of a request."""
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + budget
+
+    @classmethod
+    def from_request(cls, request) -> "Deadline":
+        """
+        Cria o prazo a partir do header do cliente, limitado a ``AI_REQUEST_BUDGET_MAX``. / Builds the deadline
+        from the client header, capped at ``AI_REQUEST_BUDGET_MAX``.
+
+        Valores inválidos, não finitos (``nan``, ``inf``) ou não positivos são ignorados. / Invalid, non-finite
+        (``nan``, ``inf``) or non-positive values are ignored.
+        """
+
+        budget = settings.AI_SETTINGS["AI_REQUEST_BUDGET"]
+        raw_value = request.headers.get(DEADLINE_HEADER)
+        if raw_value:
+            try:
+                requested = float(raw_value) / 1000
+            except ValueError:
+                requested = None
+            if requested is not None and math.isfinite(requested) and requested > 0:
+                budget = requested
+        return cls(min(budget, settings.AI_SETTINGS["AI_REQUEST_BUDGET_MAX"]))
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def allows(self, seconds: float) -> bool:
+        """Ainda restam pelo menos ``seconds``? / Are there at least ``seconds`` left?"""
+
+        return self.remaining() >= seconds
+
+    def timeout(self, cap: float) -> float:
+        """Timeout de uma etapa: o menor entre ``cap`` e o tempo restante. / Stage timeout: the lesser of ``cap`` and the time left."""
+
+        return min(cap, self.remaining())
+
+    def to_dict(self) -> Dict:
+        return {
+            "budget_ms": round(self.budget * 1000),
+            "remaining_ms": round(self.remaining() * 1000),
+            "elapsed_ms": round((time.monotonic() - self.started_at) * 1000),
+        }
+
+
+def tier_min_budget(tier: str) -> float:
+    """Orçamento mínimo para rodar a camada. / Minimum budget to run the tier."""
+
+    return {
+        TIER_LOCAL_MODEL: settings.AI_SETTINGS["AI_TIER_LOCAL_MIN_BUDGET"],
+        TIER_API: settings.AI_SETTINGS["AI_TIER_API_MIN_BUDGET"],
+    }.get(tier, 0.0)
+
+
+def tier_fits(deadline: Optional[Deadline], tier: str) -> bool:
+    """A camada cabe no orçamento restante? Sem prazo, sempre. / Does the tier fit the remaining budget? Without a
+    deadline, always."""
+
+    return deadline is None or deadline.allows(tier_min_budget(tier))
@@ -3,15 +3,21 @@ Classificação direta inspirada no ai_standalone - FUNCIONAL
 """
 import json
 import time
-import requests
 from django.conf import settings
 import logging
 
+from .ai_service import ModelLoadingError
+from .deadline import TIER_API, TIER_HEURISTIC, tier_fits
+from .http_client import get_http_session, http_timeout
+from .lexicon import DIRECT_LEXICON, SENTIMENT_LABEL_LEXICON
+
 logger = logging.getLogger(__name__)
 
-def classify_email_direct(subject, content):
+def classify_email_direct(subject, content, deadline=None):
     """
     Classificação direta inspirada no ai_standalone que funciona
+
+    Com ``deadline``, a API só é chamada se couber no orçamento restante (senão, heurística direto)
     """
     try:
         # Combinar texto como no ai_standalone
@@ -29,11 +35,13 @@ def classify_email_direct(subject, content):
         model = ai_settings.get('CLASSIFICATION_MODEL', 'cardiffnlp/twitter-roberta-base-sentiment')
         
         start_time = time.time()
+        refine_after = None
         
-        if token and len(token) > 10:
+        if token and len(token) > 10 and tier_fits(deadline, TIER_API):
             # Tentar IA real
             try:
-                result = classify_with_huggingface_direct(text, token, model)
+                timeout = deadline.timeout(10) if deadline else 10
+                result = classify_with_huggingface_direct(text, token, model, timeout=timeout)
                 processing_time = round(time.time() - start_time, 2)
                 
                 return {
@@ -42,12 +50,18 @@ def classify_email_direct(subject, content):
                     "classification": result['classification'],
                     "confidence": result['confidence'],
                     "model_version": "ai-huggingface_api",
+                    "tier": TIER_API,
                     "processing_time": f"{processing_time}s",
                     "message": "Email classificado com IA real!",
                     "category": result['classification'],
                     "suggested_response": generate_response_for_category(result['classification'])
                 }
                 
+            except ModelLoadingError as e:
+                # Modelo carregando: heurística agora, refinamento em background
+                logger.info(f"⏳ {e}")
+                if ai_settings.get('AI_PROVISIONAL_MODE'):
+                    refine_after = e.estimated_time
             except Exception as e:
                 logger.warning(f"⚠️ Erro IA real: {e}")
                 # Fallback para heurística
@@ -63,6 +77,9 @@ def classify_email_direct(subject, content):
             "classification": result['classification'],
             "confidence": result['confidence'],
             "model_version": "heuristic-fallback",
+            "tier": TIER_HEURISTIC,
+            "provisional": refine_after is not None,
+            "refine_after": refine_after,
             "processing_time": f"{processing_time}s",
             "message": "Email classificado com heurística (IA indisponível)",
             "category": result['classification'],
@@ -77,7 +94,7 @@ def classify_email_direct(subject, content):
         }
 
 
-def classify_with_huggingface_direct(text, token, model):
+def classify_with_huggingface_direct(text, token, model, timeout=10):
     """
     Classificação com Hugging Face API (cópia do ai_standalone)
     """
@@ -86,7 +103,7 @@ def classify_with_huggingface_direct(text, token, model):
     
     payload = {"inputs": text}
     
-    response = requests.post(url, headers=headers, json=payload, timeout=10)
+    response = get_http_session().post(url, headers=headers, json=payload, timeout=http_timeout(timeout))
     
     if response.status_code == 200:
         result = response.json()
@@ -94,18 +111,17 @@ def classify_with_huggingface_direct(text, token, model):
         if isinstance(result, list) and len(result) > 0:
             scores = result[0]
             
-            # Mapear sentimentos para produtividade (mesmo que ai_standalone)
-            productive_keywords = ['positive', 'joy', 'optimism', 'trust', 'anticipation']
-            unproductive_keywords = ['negative', 'sadness', 'anger', 'fear', 'disgust']
-            
             max_score = max(scores, key=lambda x: x['score'])
             label = max_score['label'].lower()
             confidence = max_score['score']
             
+            # Mapear sentimentos para produtividade (mesmo léxico que ai_standalone)
+            label_matches = SENTIMENT_LABEL_LEXICON.count(label)
+            
             # Determinar classificação
-            if any(keyword in label for keyword in productive_keywords):
+            if label_matches['productive']:
                 classification = 'productive'
-            elif any(keyword in label for keyword in unproductive_keywords):
+            elif label_matches['unproductive']:
                 classification = 'unproductive'
             else:
                 # Se neutra, usar heurística do texto
@@ -118,6 +134,13 @@ def classify_with_huggingface_direct(text, token, model):
                 'confidence': round(confidence, 3)
             }
     
+    if response.status_code == 503:
+        try:
+            estimated_time = float(response.json().get('estimated_time'))
+        except Exception:
+            estimated_time = settings.AI_SETTINGS['AI_REFINE_DEFAULT_DELAY']
+        raise ModelLoadingError(estimated_time)
+    
     raise Exception(f"API error: {response.status_code}")
 
 
@@ -127,27 +150,10 @@ def classify_heuristic_direct(text):
     """
     text_lower = text.lower()
     
-    # Palavras-chave produtivas (mesmo que ai_standalone)
-    productive_keywords = [
-        'reunião', 'projeto', 'deadline', 'urgente', 'importante', 'trabalho',
-        'tarefa', 'entrega', 'apresentação', 'cliente', 'contrato', 'proposta',
-        'desenvolvimento', 'bug', 'sistema', 'produção', 'deploy', 'meeting',
-        'project', 'urgent', 'important', 'work', 'task', 'delivery', 'client',
-        'contract', 'proposal', 'development', 'production', 'critical'
-    ]
-    
-    # Palavras-chave não produtivas (mesmo que ai_standalone)
-    unproductive_keywords = [
-        'promoção', 'desconto', 'grátis', 'ganhe', 'oferta', 'clique',
-        'compre', 'venda', 'marketing', 'spam', 'promocional', 'publicidade',
-        'social', 'pessoal', 'fim de semana', 'férias', 'festa', 'birthday',
-        'promotion', 'discount', 'free', 'buy', 'sale', 'marketing', 'spam',
-        'advertisement', 'social', 'personal', 'weekend', 'vacation', 'party'
-    ]
-    
-    # Contar ocorrências (mesmo algoritmo que ai_standalone)
-    productive_count = sum(1 for keyword in productive_keywords if keyword in text_lower)
-    unproductive_count = sum(1 for keyword in unproductive_keywords if keyword in text_lower)
+    # Contar ocorrências com o léxico compartilhado (mesmo que ai_standalone)
+    counts = DIRECT_LEXICON.count(text_lower)
+    productive_count = counts['productive']
+    unproductive_count = counts['unproductive']
     
     # Determinar classificação (mesma lógica que ai_standalone)
     if productive_count > unproductive_count:
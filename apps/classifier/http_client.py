@@ -0,0 +1,151 @@
+"""
+Cliente HTTP compartilhado para a API Hugging Face / Shared HTTP client for the Hugging Face API.
+
+Mantém uma ``requests.Session`` por processo com pool de conexões keep-alive, evitando um novo handshake
+TCP+TLS a cada classificação. A sessão é recriada automaticamente após um ``fork`` (workers do gunicorn),
+pois sockets abertos não podem ser compartilhados entre processos. / Keeps one ``requests.Session`` per
+process with a keep-alive connection pool, avoiding a new TCP+TLS handshake for every classification. The
+session is recreated automatically after a ``fork`` (gunicorn workers), since open sockets must not be
+shared between processes.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from typing import Optional, Tuple
+
+from django.conf import settings
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Cliente assíncrono opcional / Optional async client
+try:
+    import httpx
+
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+    logging.warning("httpx não disponível; pipeline assíncrono usará threads")
+
+logger = logging.getLogger(__name__)
+
+_session: Optional[requests.Session] = None
+_session_pid: Optional[int] = None
+_lock = threading.Lock()
+
+# Um AsyncClient por event loop (clientes httpx não podem trocar de loop) / One AsyncClient per event loop
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_async_clients_pid: Optional[int] = None
+
+
+def _build_session() -> requests.Session:
+    pool_size = settings.AI_SETTINGS["AI_HTTP_POOL_SIZE"]
+
+    session = requests.Session()
+    # Sem retry no adapter: a política de retry fica no AI service / No adapter retries: retry policy lives in the AI service
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0, pool_block=False)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Connection": "keep-alive", "User-Agent": "AutoU-Email-Classifier/1.0"})
+
+    logger.debug(f"Sessão HTTP criada (pid={os.getpid()}, pool={pool_size})")
+    return session
+
+
+def get_http_session() -> requests.Session:
+    """Retorna a sessão do processo atual, criando-a se necessário. / Returns the current process session, creating it if needed."""
+
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _lock:
+            if _session is None or _session_pid != pid:
+                _session = _build_session()
+                _session_pid = pid
+    return _session
+
+
+def reset_http_session():
+    """
+    Descarta a sessão atual (ex.: no ``post_fork`` do gunicorn). / Drops the current session (e.g. in
+    gunicorn's ``post_fork``).
+
+    No filho de um fork os sockets herdados pertencem ao pai, então a sessão é apenas esquecida, não fechada.
+    / In a forked child the inherited sockets belong to the parent, so the session is only forgotten, not closed.
+    """
+
+    global _session, _session_pid
+
+    with _lock:
+        if _session is not None and _session_pid == os.getpid():
+            _session.close()
+        _session = None
+        _session_pid = None
+
+
+def http_timeout(read_timeout: Optional[float] = None) -> Tuple[float, float]:
+    """Tupla ``(connect, read)`` para o ``timeout`` do requests. / ``(connect, read)`` tuple for requests' ``timeout``."""
+
+    connect_timeout = settings.AI_SETTINGS["AI_HTTP_CONNECT_TIMEOUT"]
+    if read_timeout is None:
+        read_timeout = settings.AI_SETTINGS["AI_HTTP_READ_TIMEOUT"]
+    return (connect_timeout, read_timeout)
+
+
+def get_async_http_client() -> "httpx.AsyncClient":
+    """
+    Retorna o ``httpx.AsyncClient`` do event loop atual. / Returns the ``httpx.AsyncClient`` of the running event loop.
+
+    O limite de conexões (``AI_ASYNC_MAX_CONNECTIONS``) define quantas inferências podem ficar em voo ao mesmo
+    tempo em um worker. / The connection limit (``AI_ASYNC_MAX_CONNECTIONS``) bounds how many inference calls
+    a worker can keep in flight at once.
+    """
+
+    global _async_clients, _async_clients_pid
+
+    if not HTTPX_AVAILABLE:
+        raise RuntimeError("httpx não está instalado")
+
+    pid = os.getpid()
+    if _async_clients_pid != pid:
+        _async_clients = weakref.WeakKeyDictionary()
+        _async_clients_pid = pid
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        max_connections = settings.AI_SETTINGS["AI_ASYNC_MAX_CONNECTIONS"]
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=settings.AI_SETTINGS["AI_HTTP_POOL_SIZE"],
+            ),
+            timeout=async_http_timeout(),
+            headers={"User-Agent": "AutoU-Email-Classifier/1.0"},
+        )
+        _async_clients[loop] = client
+        logger.debug(f"AsyncClient criado (pid={pid}, max_connections={max_connections})")
+    return client
+
+
+def async_http_timeout(read_timeout: Optional[float] = None) -> "httpx.Timeout":
+    """Equivalente de ``http_timeout`` para o httpx. / ``http_timeout`` equivalent for httpx."""
+
+    connect_timeout, read_timeout = http_timeout(read_timeout)
+    return httpx.Timeout(read_timeout, connect=connect_timeout)
+
+
+def _forget_session_in_child():
+    global _session, _session_pid, _lock, _async_clients
+    _session = None
+    _session_pid = None
+    _lock = threading.Lock()
+    _async_clients = weakref.WeakKeyDictionary()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_session_in_child)
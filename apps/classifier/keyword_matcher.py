@@ -0,0 +1,123 @@
+"""
+Matcher multi-padrão de palavras-chave / Multi-pattern keyword matcher.
+
+Reúne as palavras-chave de todas as categorias, sem repetição, uma vez por processo. Cada varredura faz uma
+busca ``kw in text`` (em C) por palavra-chave distinta e retorna contagens por categoria; as posições só são
+calculadas se pedidas, e só para as palavras encontradas. / Gathers the keywords of every category, without
+repetition, once per process. Each scan runs one ``kw in text`` search (in C) per distinct keyword and returns
+per-category counts; offsets are only computed when asked for, and only for the keywords found.
+
+Um autômato Aho-Corasick em Python puro (um passo de dicionário por caractere) ficou 40–60% mais lento que
+essas buscas em C em textos de 1 KB a 1 MB (``benchmarks/bench_keyword_matcher.py``). / A pure-Python
+Aho-Corasick automaton (one dict step per character) was 40–60% slower than these C searches on 1 KB to 1 MB
+texts (``benchmarks/bench_keyword_matcher.py``).
+
+As contagens têm a mesma semântica de ``sum(1 for kw in keywords if kw in text)``: cada palavra-chave
+distinta encontrada conta uma vez (ou tantas vezes quanto aparece repetida na lista da categoria).
+/ Counts have the same semantics as ``sum(1 for kw in keywords if kw in text)``: each distinct keyword
+found counts once (or as many times as it is repeated in the category list).
+"""
+
+from typing import Dict, List, Mapping, Sequence, Tuple, Union
+
+# Nunca aparece em palavras-chave; impede que uma ocorrência junte dois textos / Never part of a keyword; keeps
+# an occurrence from spanning two texts
+SEPARATOR = "\x00"
+
+
+class KeywordMatches:
+    """Resultado de uma varredura. / Result of a scan."""
+
+    __slots__ = ("counts", "_text", "_found", "_offsets")
+
+    def __init__(self, counts: Dict[str, int], text: str, found: List[Tuple[str, Tuple[Tuple[str, int], ...]]]):
+        # Contagem por categoria / Per-category count
+        self.counts = counts
+        self._text = text
+        # Palavras-chave encontradas e seus pesos por categoria / Keywords found and their per-category weights
+        self._found = found
+        self._offsets = None
+
+    @property
+    def offsets(self) -> Dict[str, List[Tuple[int, str]]]:
+        """Ocorrências (posição inicial, palavra-chave) por categoria. / Occurrences (start offset, keyword) per category."""
+
+        if self._offsets is None:
+            offsets: Dict[str, List[Tuple[int, str]]] = {category: [] for category in self.counts}
+            for keyword, weights in self._found:
+                starts = []
+                start = self._text.find(keyword)
+                while start != -1:
+                    starts.append((start, keyword))
+                    start = self._text.find(keyword, start + 1)
+                for category, _ in weights:
+                    offsets[category].extend(starts)
+            for occurrences in offsets.values():
+                occurrences.sort()
+            self._offsets = offsets
+        return self._offsets
+
+    def count(self, category: str) -> int:
+        return self.counts.get(category, 0)
+
+    def keywords(self, category: str) -> List[str]:
+        """Palavras-chave distintas encontradas, em ordem de aparição. / Distinct keywords found, in order of appearance."""
+
+        found = [keyword for keyword, weights in self._found if any(name == category for name, _ in weights)]
+        return sorted(found, key=lambda keyword: (self._text.find(keyword), keyword))
+
+    def __repr__(self):
+        return f"KeywordMatches(counts={self.counts!r})"
+
+
+class KeywordMatcher:
+    """
+    Palavras-chave distintas de todas as categorias, com os pesos de cada uma. / Distinct keywords of every
+    category, each with its weights.
+
+    Uma palavra-chave presente em várias categorias é buscada uma única vez. / A keyword present in several
+    categories is searched only once.
+    """
+
+    def __init__(self, categories: Mapping[str, Union[Sequence[str], Mapping[str, int]]]):
+        self.categories = tuple(categories)
+
+        # Padrões distintos e peso por categoria (repetições na lista contam) / Distinct patterns and per-category weight
+        weights_by_keyword: Dict[str, Dict[str, int]] = {}
+
+        for category, keywords in categories.items():
+            # Mapeamento explícito palavra -> peso, ou sequência / Explicit keyword -> weight mapping, or sequence
+            items = keywords.items() if isinstance(keywords, Mapping) else ((keyword, 1) for keyword in keywords)
+            for keyword, weight in items:
+                if not keyword or SEPARATOR in keyword:
+                    raise ValueError(f"Palavra-chave inválida na categoria '{category}': {keyword!r}")
+                weights = weights_by_keyword.setdefault(keyword, {})
+                weights[category] = weights.get(category, 0) + weight
+
+        self._entries: Tuple[Tuple[str, Tuple[Tuple[str, int], ...]], ...] = tuple(
+            (keyword, tuple(weights.items())) for keyword, weights in weights_by_keyword.items()
+        )
+
+    def scan(self, *texts: str) -> KeywordMatches:
+        """
+        Busca cada palavra-chave distinta uma vez. / Searches each distinct keyword once.
+
+        Vários textos são varridos como um só, unidos por ``SEPARATOR``: a contagem é a da união das palavras
+        encontradas em qualquer um deles. / Several texts are scanned as one, joined by ``SEPARATOR``: the count
+        is that of the union of keywords found in any of them.
+        """
+
+        text = texts[0] if len(texts) == 1 else SEPARATOR.join(texts)
+        counts = dict.fromkeys(self.categories, 0)
+        found = [entry for entry in self._entries if entry[0] in text]
+
+        for _, weights in found:
+            for category, weight in weights:
+                counts[category] += weight
+
+        return KeywordMatches(counts, text, found)
+
+    def count(self, *texts: str) -> Dict[str, int]:
+        """Atalho para apenas as contagens por categoria. / Shortcut for per-category counts only."""
+
+        return self.scan(*texts).counts
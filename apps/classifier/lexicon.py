@@ -0,0 +1,461 @@
+"""
+Registro compartilhado de léxicos de palavras-chave / Shared keyword lexicon registry.
+
+Todas as classificações por palavras-chave (heurística do AI service, classificação básica, classificação
+direta, IA standalone e fallback do frontend) usam os léxicos deste módulo. Cada léxico é versionado,
+tem pesos explícitos e é compilado em um único matcher na importação do módulo — ou seja, uma vez por
+processo, antes do fork quando ``preload_app`` está ativo. / Every keyword classifier (AI service heuristic,
+basic classification, direct classification, standalone AI and frontend fallback) uses the lexicons in this
+module. Each lexicon is versioned, has explicit weights and is compiled into a single matcher at module
+import — i.e. once per process, before fork when ``preload_app`` is enabled.
+"""
+
+import hashlib
+import json
+import time
+from typing import Dict, List, Mapping, Optional, Sequence
+
+from .keyword_matcher import KeywordMatcher, KeywordMatches
+
+
+class Lexicon:
+    """
+    Conjunto versionado e pré-compilado de palavras-chave por categoria. / Versioned, precompiled set of
+    keywords per category.
+
+    Também acumula o custo de pontuação (varreduras, caracteres e tempo) para que seja mensurável em todos
+    os pontos de uso. / Also accumulates scoring cost (scans, characters and time) so it is measurable at
+    every call site.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        version: str,
+        categories: Mapping[str, Sequence[str]],
+        weights: Optional[Mapping[str, Mapping[str, int]]] = None,
+    ):
+        self.name = name
+        self.version = version
+        self.categories = {category: tuple(keywords) for category, keywords in categories.items()}
+
+        # Peso 1 por padrão; sobrescrito por ``weights`` / Weight 1 by default; overridden by ``weights``
+        weights = weights or {}
+        self.weights: Dict[str, Dict[str, int]] = {
+            category: {keyword: weights.get(category, {}).get(keyword, 1) for keyword in keywords}
+            for category, keywords in self.categories.items()
+        }
+        self.matcher = KeywordMatcher(self.weights)
+
+        payload = json.dumps([name, version, self.weights], sort_keys=True, ensure_ascii=False)
+        self.fingerprint = hashlib.sha256(payload.encode()).hexdigest()[:12]
+
+        # Custo acumulado neste processo / Accumulated cost in this process
+        self.scans = 0
+        self.chars = 0
+        self.seconds = 0.0
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}@{self.version}"
+
+    def scan(self, *texts: str) -> KeywordMatches:
+        """Varre um ou mais textos (já normalizados) em uma passada. / Scans one or more (normalized) texts in one pass."""
+
+        start = time.perf_counter()
+        matches = self.matcher.scan(*texts)
+        self.seconds += time.perf_counter() - start
+        self.scans += 1
+        self.chars += sum(len(text) for text in texts)
+        return matches
+
+    def count(self, *texts: str) -> Dict[str, int]:
+        return self.scan(*texts).counts
+
+    def get_stats(self) -> Dict:
+        return {
+            "version": self.version,
+            "fingerprint": self.fingerprint,
+            "keywords": sum(len(keywords) for keywords in self.weights.values()),
+            "scans": self.scans,
+            "chars": self.chars,
+            "seconds": round(self.seconds, 6),
+            "avg_us_per_scan": round(self.seconds / max(1, self.scans) * 1_000_000, 2),
+        }
+
+    def __repr__(self):
+        return f"Lexicon({self.key!r}, fingerprint={self.fingerprint!r})"
+
+
+_REGISTRY: Dict[str, Lexicon] = {}
+
+
+def register_lexicon(lexicon: Lexicon) -> Lexicon:
+    """Registra (ou substitui) um léxico pelo nome. / Registers (or replaces) a lexicon by name."""
+
+    _REGISTRY[lexicon.name] = lexicon
+    return lexicon
+
+
+def get_lexicon(name: str) -> Lexicon:
+    try:
+        return _REGISTRY[name]
+    except KeyError:
+        raise KeyError(f"Léxico não registrado: {name}") from None
+
+
+def all_lexicons() -> List[Lexicon]:
+    return list(_REGISTRY.values())
+
+
+def lexicon_stats() -> Dict[str, Dict]:
+    """Custo de pontuação por léxico neste processo. / Per-lexicon scoring cost in this process."""
+
+    return {lexicon.key: lexicon.get_stats() for lexicon in _REGISTRY.values()}
+
+
+# =============================================================================
+# Heurística do AI service / AI service heuristic
+# =============================================================================
+
+HEURISTIC_PRODUCTIVE = (
+    # Reuniões e encontros / Meetings and gatherings
+    "reunião",
+    "meeting",
+    "encontro",
+    "videoconferência",
+    "call",
+    "zoom",
+    "teams",
+    # Projetos e trabalho / Projects and work
+    "projeto",
+    "project",
+    "trabalho",
+    "work",
+    "tarefa",
+    "task",
+    "atividade",
+    # Prazos e urgência / Deadlines and urgency
+    "deadline",
+    "prazo",
+    "urgente",
+    "urgent",
+    "importante",
+    "important",
+    "asap",
+    # Entregas e resultados / Deliveries and results
+    "entrega",
+    "delivery",
+    "resultado",
+    "result",
+    "relatório",
+    "report",
+    # Propostas e negócios / Proposals and business
+    "proposta",
+    "proposal",
+    "contrato",
+    "contract",
+    "acordo",
+    "agreement",
+    # Documentos e dados / Documents and data
+    "documento",
+    "document",
+    "planilha",
+    "spreadsheet",
+    "apresentação",
+    # Comunicação profissional / Professional communication
+    "prezado",
+    "dear",
+    "cordialmente",
+    "regards",
+    "atenciosamente",
+    # Ações e verbos de trabalho / Actions and work verbs
+    "agendar",
+    "schedule",
+    "confirmar",
+    "confirm",
+    "revisar",
+    "review",
+    "aprovar",
+    "approve",
+    "enviar",
+    "send",
+    "receber",
+    "receive",
+)
+
+HEURISTIC_UNPRODUCTIVE = (
+    # Marketing e promoções / Marketing and promotions
+    "promoção",
+    "promotion",
+    "desconto",
+    "discount",
+    "oferta",
+    "offer",
+    "grátis",
+    "free",
+    "ganhe",
+    "win",
+    "premio",
+    "prize",
+    # Spam típico / Typical spam
+    "spam",
+    "clique aqui",
+    "click here",
+    "compre agora",
+    "buy now",
+    # Marketing digital / Digital marketing
+    "marketing",
+    "newsletter",
+    "publicidade",
+    "advertising",
+    # Redes sociais / Social media
+    "social",
+    "facebook",
+    "instagram",
+    "twitter",
+    "linkedin",
+    # Urgência falsa / False urgency
+    "limitado",
+    "limited",
+    "últimas horas",
+    "last hours",
+    # Emojis excessivos (indicador de spam) / Excessive emojis (spam indicator)
+    "🎉",
+    "💰",
+    "🔥",
+    "⚡",
+    "🎊",
+)
+
+HEURISTIC_LEXICON = register_lexicon(
+    Lexicon("heuristic", "1.0", {"productive": HEURISTIC_PRODUCTIVE, "unproductive": HEURISTIC_UNPRODUCTIVE})
+)
+
+# Indicadores que sobrepõem o sentimento do modelo local / Indicators that override the local model sentiment
+LOCAL_MODEL_LEXICON = register_lexicon(
+    Lexicon(
+        "local_model_indicators",
+        "1.0",
+        {
+            "productive": (
+                "reunião",
+                "meeting",
+                "projeto",
+                "project",
+                "deadline",
+                "prazo",
+                "urgente",
+                "urgent",
+                "importante",
+                "important",
+                "tarefa",
+                "task",
+                "entrega",
+                "delivery",
+                "proposta",
+                "proposal",
+                "contrato",
+                "contract",
+            )
+        },
+    )
+)
+
+# Contexto usado para ajustar confiança e escolher templates de resposta / Context used to adjust confidence and pick response templates
+CONTEXT_LEXICON = register_lexicon(
+    Lexicon(
+        "response_context",
+        "1.0",
+        {
+            "confidence_boost": ("urgente", "asap", "emergency", "deadline"),
+            "meeting": ("reunião", "meeting", "encontro"),
+            "deadline": ("prazo", "deadline", "urgente"),
+            "urgent": ("urgente", "urgent", "asap"),
+            "formal": ("prezado", "cordialmente"),
+        },
+    )
+)
+
+# =============================================================================
+# Classificação básica (services.classify_email_basic) / Basic classification
+# =============================================================================
+
+BASIC_LEXICON = register_lexicon(
+    Lexicon(
+        "basic",
+        "1.0",
+        {
+            "productive": (
+                "reunião",
+                "projeto",
+                "deadline",
+                "importante",
+                "urgente",
+                "meeting",
+                "project",
+                "urgent",
+                "important",
+                "prazo",
+                "tarefa",
+                "entrega",
+                "proposta",
+                "contrato",
+                "documento",
+                "relatório",
+                "report",
+                "task",
+                "delivery",
+                "document",
+                "proposal",
+                "contract",
+                "follow-up",
+            )
+        },
+        # "deadline" aparecia duas vezes na lista original / "deadline" appeared twice in the original list
+        weights={"productive": {"deadline": 2}},
+    )
+)
+
+# =============================================================================
+# Classificação direta e IA standalone / Direct classification and standalone AI
+# =============================================================================
+
+DIRECT_LEXICON = register_lexicon(
+    Lexicon(
+        "direct",
+        "1.0",
+        {
+            "productive": (
+                "reunião",
+                "projeto",
+                "deadline",
+                "urgente",
+                "importante",
+                "trabalho",
+                "tarefa",
+                "entrega",
+                "apresentação",
+                "cliente",
+                "contrato",
+                "proposta",
+                "desenvolvimento",
+                "bug",
+                "sistema",
+                "produção",
+                "deploy",
+                "meeting",
+                "project",
+                "urgent",
+                "important",
+                "work",
+                "task",
+                "delivery",
+                "client",
+                "contract",
+                "proposal",
+                "development",
+                "production",
+                "critical",
+            ),
+            "unproductive": (
+                "promoção",
+                "desconto",
+                "grátis",
+                "ganhe",
+                "oferta",
+                "clique",
+                "compre",
+                "venda",
+                "marketing",
+                "spam",
+                "promocional",
+                "publicidade",
+                "social",
+                "pessoal",
+                "fim de semana",
+                "férias",
+                "festa",
+                "birthday",
+                "promotion",
+                "discount",
+                "free",
+                "buy",
+                "sale",
+                "advertisement",
+                "personal",
+                "weekend",
+                "vacation",
+                "party",
+            ),
+        },
+        # Repetidas na lista original / Repeated in the original list
+        weights={"unproductive": {"marketing": 2, "spam": 2, "social": 2}},
+    )
+)
+
+# Rótulos de sentimento retornados pela API / Sentiment labels returned by the API
+SENTIMENT_LABEL_LEXICON = register_lexicon(
+    Lexicon(
+        "sentiment_labels",
+        "1.0",
+        {
+            "productive": ("positive", "joy", "optimism", "trust", "anticipation"),
+            "unproductive": ("negative", "sadness", "anger", "fear", "disgust"),
+        },
+    )
+)
+
+# =============================================================================
+# Fallback do frontend / Frontend fallback
+# =============================================================================
+
+FRONTEND_LEXICON = register_lexicon(
+    Lexicon(
+        "frontend",
+        "1.0",
+        {
+            "productive": (
+                "reunião",
+                "meeting",
+                "projeto",
+                "project",
+                "trabalho",
+                "work",
+                "deadline",
+                "prazo",
+                "tarefa",
+                "task",
+                "importante",
+                "urgent",
+                "relatório",
+                "report",
+                "apresentação",
+                "presentation",
+                "cliente",
+                "client",
+                "contrato",
+                "contract",
+                "proposta",
+                "proposal",
+            ),
+            "unproductive": (
+                "spam",
+                "promoção",
+                "desconto",
+                "oferta",
+                "comprar",
+                "venda",
+                "click here",
+                "free",
+                "winner",
+                "prize",
+                "congratulations",
+                "viagra",
+                "casino",
+                "lottery",
+                "investment opportunity",
+            ),
+        },
+    )
+)
@@ -0,0 +1,551 @@
+"""
+Modelo linear TF-IDF treinado com os emails gravados / TF-IDF linear model trained on the stored emails.
+
+Entre a heurística (palavras-chave) e a API fica um classificador TF-IDF + regressão logística do
+``scikit-learn``: esparso, sem GPU e vetorizado em lotes, classifica um email em microssegundos e funciona
+offline. / Between the heuristics (keywords) and the API sits a ``scikit-learn`` TF-IDF + logistic regression
+classifier: sparse, GPU-free and vectorized over batches, it classifies an email in microseconds and works
+offline.
+
+Treino / Training::
+
+    python manage.py train_classifier                 # TF-IDF sobre a tabela inteira / TF-IDF over the whole table
+    python manage.py train_classifier --incremental   # SGD só sobre as linhas novas / SGD over new rows only
+
+O modo incremental usa features por hashing (sem vocabulário a ajustar) e ``SGDClassifier.partial_fit``: cada
+execução continua o último modelo a partir da marca d'água (``updated_at``, ``id``) gravada nele, em mini-lotes,
+então o custo acompanha só as linhas novas ou corrigidas. / The incremental mode uses hashing features (no
+vocabulary to fit) and ``SGDClassifier.partial_fit``: each run continues the latest model from the watermark
+(``updated_at``, ``id``) stored in it, in mini-batches, so the cost only tracks new or corrected rows.
+
+Cada treino grava uma versão nova em ``AI_LINEAR_MODEL_DIR/<versão>/`` (``model.joblib`` + ``metadata.json``) e
+só depois aponta ``LATEST`` para ela, então quem carrega nunca vê um artefato pela metade. / Each training run
+writes a new version to ``AI_LINEAR_MODEL_DIR/<version>/`` (``model.joblib`` + ``metadata.json``) and only then
+points ``LATEST`` at it, so loaders never see a half-written artifact. A versão publicada também vai para o
+cache (``VERSION_CACHE_KEY``): os workers a comparam periodicamente e trocam a referência do modelo sem
+reiniciar. / The published version also goes to the cache (``VERSION_CACHE_KEY``): workers compare it
+periodically and swap the model reference without restarting.
+
+Cada versão traz também ``model.mmap`` (``mmap_artifacts``): coeficientes, idf e vocabulário como arrays crus.
+Os workers servem a partir dele, compartilhando as páginas físicas, e o ``joblib`` fica para continuar o treino.
+/ Each version also ships ``model.mmap`` (``mmap_artifacts``): coefficients, idf and vocabulary as raw arrays.
+Workers serve from it, sharing the physical pages, and the ``joblib`` file is kept to continue training.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache_keys import canonicalize_text
+from .mmap_artifacts import MappedArrays, write_arrays
+
+logger = logging.getLogger(__name__)
+
+ENGINE_LINEAR = "linear"
+
+LABELS = ("productive", "unproductive")
+MODEL_FILENAME = "model.joblib"
+MAPPED_FILENAME = "model.mmap"
+METADATA_FILENAME = "metadata.json"
+LATEST_FILENAME = "LATEST"
+
+# Versão publicada, lida pelos workers para a troca a quente / Published version, read by workers for the hot swap
+VERSION_CACHE_KEY = "ai:linear_model:version"
+
+
+class LinearModelUnavailable(Exception):
+    """Nenhum artefato treinado encontrado. / No trained artifact found."""
+
+    pass
+
+
+def linear_model_dir() -> Path:
+    return Path(settings.AI_SETTINGS["AI_LINEAR_MODEL_DIR"])
+
+
+def latest_version(model_dir: Optional[Path] = None) -> Optional[str]:
+    """Versão apontada por ``LATEST``, se houver. / Version pointed to by ``LATEST``, if any."""
+
+    try:
+        return (Path(model_dir or linear_model_dir()) / LATEST_FILENAME).read_text(encoding="utf-8").strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def published_version(model_dir: Optional[Path] = None) -> Optional[str]:
+    """Versão publicada no cache ou, sem ela, em ``LATEST``. / Version published in the cache or, failing that, in ``LATEST``."""
+
+    try:
+        version = cache.get(VERSION_CACHE_KEY)
+    except Exception:
+        version = None
+    return version or latest_version(model_dir)
+
+
+def build_pipeline(max_features: int = 50000):
+    """TF-IDF de palavras e pares de palavras + regressão logística. / Word and word-pair TF-IDF + logistic regression."""
+
+    import numpy as np
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+
+    return Pipeline(
+        [
+            (
+                "tfidf",
+                TfidfVectorizer(
+                    preprocessor=canonicalize_text,
+                    ngram_range=(1, 2),
+                    sublinear_tf=True,
+                    min_df=1,
+                    max_features=max_features,
+                    dtype=np.float32,
+                ),
+            ),
+            ("classifier", LogisticRegression(max_iter=1000, class_weight="balanced")),
+        ]
+    )
+
+
+class OnlineModel:
+    """
+    Features por hashing + ``SGDClassifier`` (log loss), treinável em mini-lotes. / Hashing features +
+    ``SGDClassifier`` (log loss), trainable in mini-batches.
+
+    Tem a mesma interface de predição do pipeline TF-IDF (``classes_``, ``predict_proba``, ``score``). / Has the
+    TF-IDF pipeline's prediction interface (``classes_``, ``predict_proba``, ``score``).
+    """
+
+    def __init__(self, n_features: int = 2**20, alpha: float = 1e-5):
+        import numpy as np
+        from sklearn.feature_extraction.text import HashingVectorizer
+        from sklearn.linear_model import SGDClassifier
+
+        # Sem estado: o mesmo texto gera as mesmas features em qualquer execução / Stateless: the same text yields
+        # the same features in every run
+        self.vectorizer = HashingVectorizer(
+            preprocessor=canonicalize_text,
+            ngram_range=(1, 2),
+            n_features=n_features,
+            alternate_sign=False,
+            dtype=np.float32,
+        )
+        self.classifier = SGDClassifier(loss="log_loss", alpha=alpha, random_state=42)
+        self.samples_seen = 0
+
+    @property
+    def classes_(self):
+        return self.classifier.classes_
+
+    @property
+    def fitted(self) -> bool:
+        return self.samples_seen > 0
+
+    def partial_fit(self, texts: Sequence[str], labels: Sequence[str]) -> "OnlineModel":
+        self.classifier.partial_fit(self.vectorizer.transform(texts), list(labels), classes=list(LABELS))
+        self.samples_seen += len(texts)
+        return self
+
+    def predict_proba(self, texts: Sequence[str]):
+        return self.classifier.predict_proba(self.vectorizer.transform(texts))
+
+    def score(self, texts: Sequence[str], labels: Sequence[str]) -> float:
+        return float(self.classifier.score(self.vectorizer.transform(texts), list(labels)))
+
+
+def labeled_rows(min_confidence: float = 0.0):
+    """
+    Emails concluídos com rótulo confiável: da API, com confiança de pelo menos ``min_confidence``, ou corrigido
+    por uma pessoa. / Completed emails with a trusted label: from the API, with at least ``min_confidence``, or
+    corrected by a person.
+
+    Heurísticas, modelos locais e o próprio modelo linear ficam de fora: como ele roda antes da API, treinar com
+    as suas previsões o faria aprender com a própria saída. / Heuristics, local models and the linear model
+    itself are left out: since it runs before the API, training on its predictions would make it learn from its
+    own output.
+    """
+
+    from django.db.models import Q
+
+    from .models import Email
+    from .refinement import API_MODELS_USED, COMPLETED, HUMAN_MODEL_USED
+
+    return Email.objects.filter(
+        Q(ai_model_used__in=API_MODELS_USED, confidence_score__gte=min_confidence) | Q(ai_model_used=HUMAN_MODEL_USED),
+        classification_result__in=LABELS,
+        processing_status=COMPLETED,
+    )
+
+
+def training_data(min_confidence: float = 0.0) -> Tuple[List[str], List[str]]:
+    """Conteúdo e rótulo de ``labeled_rows``. / Content and label of ``labeled_rows``."""
+
+    rows = labeled_rows(min_confidence).values_list("content", "classification_result")
+
+    texts, labels = [], []
+    for content, label in rows.iterator():
+        if content and content.strip():
+            texts.append(content)
+            labels.append(label)
+    return texts, labels
+
+
+def labeled_rows_since(watermark: Optional[Dict], min_confidence: float = 0.0, batch_size: int = 1000):
+    """
+    Mini-lotes ``(textos, rótulos, marca)`` de ``labeled_rows`` após ``watermark``, em ordem de ``(updated_at, id)``.
+    / ``(texts, labels, mark)`` mini-batches of ``labeled_rows`` after ``watermark``, in ``(updated_at, id)`` order.
+
+    ``updated_at`` muda quando um email é criado, refinado ou corrigido, então as correções também entram. /
+    ``updated_at`` changes when an email is created, refined or corrected, so corrections come in too.
+    """
+
+    from django.db.models import Q
+    from django.utils.dateparse import parse_datetime
+
+    rows = labeled_rows(min_confidence)
+    updated_at, last_id = (parse_datetime(watermark["updated_at"]), watermark["id"]) if watermark else (None, 0)
+
+    while True:
+        page = rows
+        if updated_at is not None:
+            # Paginação por chave: sem OFFSET, cada lote custa o mesmo / Keyset pagination: no OFFSET, every batch
+            # costs the same
+            page = page.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=last_id))
+        batch = list(
+            page.order_by("updated_at", "id").values_list("id", "updated_at", "content", "classification_result")[:batch_size]
+        )
+        if not batch:
+            return
+
+        last_id, updated_at = batch[-1][0], batch[-1][1]
+        pairs = [(content, label) for _, _, content, label in batch if content and content.strip()]
+        yield [content for content, _ in pairs], [label for _, label in pairs], {
+            "updated_at": updated_at.isoformat(),
+            "id": last_id,
+        }
+
+
+def train_incremental(model_dir: Optional[Path] = None, min_confidence: float = 0.0, batch_size: int = 1000):
+    """
+    Continua o último modelo incremental com as linhas novas. / Continues the latest incremental model with the
+    new rows.
+
+    Começa um modelo novo se o último artefato não for incremental (ou não existir). A acurácia é medida em cada
+    lote antes de treinar nele (validação progressiva). / Starts a new model if the latest artifact is not
+    incremental (or there is none). Accuracy is measured on each batch before training on it (progressive
+    validation).
+
+    Returns:
+        Tuple: modelo e métricas, ou ``None`` se não houver linhas novas / model and metrics, or ``None`` if there
+        are no new rows
+    """
+
+    model, metadata = OnlineModel(), {}
+    version = latest_version(model_dir)
+    if version is not None:
+        latest_model, latest_metadata = load_trained_model(version, model_dir)
+        if isinstance(latest_model, OnlineModel):
+            model, metadata = latest_model, latest_metadata
+
+    watermark = metadata.get("watermark")
+    samples, scored, correct, batches = 0, 0, 0, 0
+    started = time.perf_counter()
+
+    for texts, labels, watermark in labeled_rows_since(watermark, min_confidence, batch_size):
+        if not texts:
+            continue
+        if model.fitted:
+            correct += round(model.score(texts, labels) * len(texts))
+            scored += len(texts)
+        model.partial_fit(texts, labels)
+        samples += len(texts)
+        batches += 1
+
+    if not samples:
+        return None
+
+    metrics = {
+        "mode": "incremental",
+        "parent_version": metadata.get("version"),
+        "watermark": watermark,
+        "new_samples": samples,
+        "samples": model.samples_seen,
+        "batches": batches,
+        "progressive_accuracy": round(correct / scored, 4) if scored else None,
+        "train_seconds": round(time.perf_counter() - started, 3),
+    }
+    return model, metrics
+
+
+def train_linear_model(texts: Sequence[str], labels: Sequence[str], test_size: float = 0.2, max_features: int = 50000):
+    """
+    Treina o pipeline e mede a acurácia numa amostra separada. / Trains the pipeline and measures accuracy on a
+    held-out sample.
+
+    Returns:
+        Tuple: pipeline treinado (em todos os dados) e métricas / trained pipeline (on all data) and metrics
+    """
+
+    from sklearn.model_selection import train_test_split
+
+    if len(set(labels)) < 2:
+        raise ValueError("São necessários exemplos das duas classes para treinar")
+
+    metrics = {"samples": len(texts), "class_counts": {label: list(labels).count(label) for label in LABELS}}
+
+    # Holdout só quando cada classe tem exemplos suficientes / Holdout only when every class has enough examples
+    if test_size and min(metrics["class_counts"].values()) >= 5:
+        train_texts, test_texts, train_labels, test_labels = train_test_split(
+            list(texts), list(labels), test_size=test_size, stratify=list(labels), random_state=42
+        )
+        holdout = build_pipeline(max_features).fit(train_texts, train_labels)
+        metrics["holdout_accuracy"] = round(float(holdout.score(test_texts, test_labels)), 4)
+        metrics["holdout_samples"] = len(test_texts)
+
+    started = time.perf_counter()
+    pipeline = build_pipeline(max_features).fit(list(texts), list(labels))
+    metrics["train_seconds"] = round(time.perf_counter() - started, 3)
+    metrics["vocabulary_size"] = len(pipeline.named_steps["tfidf"].vocabulary_)
+    return pipeline, metrics
+
+
+def save_linear_model(pipeline, metadata: Dict, model_dir: Optional[Path] = None) -> Path:
+    """
+    Grava uma versão nova e aponta ``LATEST`` para ela. / Writes a new version and points ``LATEST`` at it.
+
+    Só a publica no cache se ``model_dir`` é o ``AI_LINEAR_MODEL_DIR`` dos workers: uma versão de outro diretório
+    os faria tentar carregá-la, sem sucesso, a cada verificação. / Only publishes it to the cache if ``model_dir``
+    is the workers' ``AI_LINEAR_MODEL_DIR``: a version from another directory would make them try, and fail, to
+    load it on every check.
+    """
+
+    import joblib
+    import sklearn
+
+    model_dir = Path(model_dir or linear_model_dir())
+    payload = json.dumps([metadata, time.time_ns()], sort_keys=True, default=str)
+    digest = hashlib.blake2b(payload.encode("utf-8"), digest_size=4).hexdigest()
+    version = f"{time.strftime('%Y%m%d-%H%M%S')}-{digest}"
+    version_dir = model_dir / version
+    version_dir.mkdir(parents=True, exist_ok=False)
+
+    joblib.dump(pipeline, version_dir / MODEL_FILENAME)
+    mapped_path = export_mapped_model(pipeline, version_dir / MAPPED_FILENAME)
+    metadata = {
+        **metadata,
+        "version": version,
+        "sklearn_version": sklearn.__version__,
+        "mapped_bytes": mapped_path.stat().st_size,
+        "created_at": time.time(),
+    }
+    (version_dir / METADATA_FILENAME).write_text(json.dumps(metadata, indent=2, default=str), encoding="utf-8")
+
+    # ``os.replace`` é atômico: ``LATEST`` aponta para a versão antiga ou para a nova / ``os.replace`` is atomic:
+    # ``LATEST`` points to either the old or the new version
+    pointer = model_dir / f".{LATEST_FILENAME}.{os.getpid()}"
+    pointer.write_text(version, encoding="utf-8")
+    os.replace(pointer, model_dir / LATEST_FILENAME)
+
+    # Só depois do ``LATEST``: quem vê a versão no cache já encontra o artefato / Only after ``LATEST``: whoever
+    # sees the version in the cache already finds the artifact
+    if model_dir.resolve() == linear_model_dir().resolve():
+        try:
+            cache.set(VERSION_CACHE_KEY, version, None)
+        except Exception as e:
+            logger.warning(f"Versão do modelo linear não publicada no cache: {str(e)}")
+
+    logger.info(f"Modelo linear salvo em {version_dir}")
+    return version_dir
+
+
+def load_trained_model(version: str, model_dir: Optional[Path] = None):
+    """Objeto treinado (``joblib``) e metadados de uma versão. / A version's trained object (``joblib``) and metadata."""
+
+    import joblib
+
+    version_dir = Path(model_dir or linear_model_dir()) / version
+    metadata = json.loads((version_dir / METADATA_FILENAME).read_text(encoding="utf-8"))
+    return joblib.load(version_dir / MODEL_FILENAME), metadata
+
+
+def export_mapped_model(model, path) -> Path:
+    """
+    Grava os arrays de um modelo treinado (TF-IDF ou incremental) no formato mapeável. / Writes a trained model's
+    arrays (TF-IDF or incremental) in the mappable format.
+
+    O vocabulário vira um array de bytes UTF-8 de largura fixa, ordenado, com as colunas ao lado: a busca é um
+    ``searchsorted`` vetorizado, sem dict no heap. / The vocabulary becomes a sorted fixed-width array of UTF-8
+    bytes with the columns alongside: lookup is a vectorized ``searchsorted``, with no heap dict.
+    """
+
+    import numpy as np
+
+    if isinstance(model, OnlineModel):
+        vectorizer, classifier = model.vectorizer, model.classifier
+        arrays = {}
+        metadata = {"kind": "hashing", "n_features": vectorizer.n_features, "alternate_sign": vectorizer.alternate_sign}
+    else:
+        vectorizer, classifier = model.named_steps["tfidf"], model.named_steps["classifier"]
+        encoded = sorted((term.encode("utf-8"), column) for term, column in vectorizer.vocabulary_.items())
+        arrays = {
+            "vocabulary": np.array([term for term, _ in encoded]),
+            "columns": np.array([column for _, column in encoded], dtype=np.int32),
+            "idf": vectorizer.idf_.astype(np.float32),
+        }
+        metadata = {"kind": "tfidf", "sublinear_tf": vectorizer.sublinear_tf}
+
+    if len(classifier.classes_) != 2:
+        raise ValueError("O formato mapeável suporta apenas classificadores binários")
+
+    arrays["coef"] = classifier.coef_[0].astype(np.float32)
+    metadata.update(
+        {
+            "ngram_range": list(vectorizer.ngram_range),
+            "norm": vectorizer.norm,
+            "classes": [str(label) for label in classifier.classes_],
+            "intercept": float(classifier.intercept_[0]),
+        }
+    )
+    return write_arrays(path, arrays, metadata)
+
+
+class MappedLinearModel:
+    """
+    Predição a partir de ``model.mmap``, com a interface do pipeline (``classes_``, ``predict_proba``). / Prediction
+    from ``model.mmap``, with the pipeline's interface (``classes_``, ``predict_proba``).
+
+    Só os arrays do artefato ocupam memória, e eles estão no page cache compartilhado. / Only the artifact's
+    arrays take memory, and they live in the shared page cache.
+    """
+
+    def __init__(self, path):
+        import numpy as np
+
+        self.artifact = MappedArrays(path)
+        metadata = self.artifact.metadata
+        self.kind = metadata["kind"]
+        self.classes_ = metadata["classes"]
+        self._intercept = metadata["intercept"]
+        self._norm = metadata["norm"]
+
+        if self.kind == "hashing":
+            from sklearn.feature_extraction.text import HashingVectorizer
+
+            # Sem estado: não há nada a carregar além dos coeficientes / Stateless: nothing to load beyond the
+            # coefficients
+            self._vectorizer = HashingVectorizer(
+                preprocessor=canonicalize_text,
+                ngram_range=tuple(metadata["ngram_range"]),
+                n_features=metadata["n_features"],
+                alternate_sign=metadata["alternate_sign"],
+                norm=self._norm,
+                dtype=np.float32,
+            )
+        else:
+            from sklearn.feature_extraction.text import CountVectorizer
+
+            # Mesma tokenização do TF-IDF do treino, sem vocabulário / Same tokenization as the training TF-IDF,
+            # without a vocabulary
+            self._analyzer = CountVectorizer(
+                preprocessor=canonicalize_text, ngram_range=tuple(metadata["ngram_range"])
+            ).build_analyzer()
+            self._sublinear_tf = metadata["sublinear_tf"]
+
+    def transform(self, texts: Sequence[str]):
+        """Matriz esparsa de features do lote. / Sparse feature matrix of the batch."""
+
+        import numpy as np
+        from scipy import sparse
+        from sklearn.preprocessing import normalize
+
+        if self.kind == "hashing":
+            return self._vectorizer.transform(texts)
+
+        vocabulary, columns, idf = self.artifact["vocabulary"], self.artifact["columns"], self.artifact["idf"]
+        rows, encoded = [], []
+        for row, text in enumerate(texts):
+            terms = self._analyzer(text)
+            rows.extend([row] * len(terms))
+            encoded.extend(term.encode("utf-8") for term in terms)
+
+        # Termos mais largos que o array seriam truncados; nenhum deles está no vocabulário / Terms wider than
+        # the array would be truncated; none of them is in the vocabulary
+        fits = np.fromiter((len(term) <= vocabulary.itemsize for term in encoded), dtype=bool, count=len(encoded))
+        query = np.array(encoded, dtype=vocabulary.dtype)
+        positions = np.minimum(np.searchsorted(vocabulary, query), len(vocabulary) - 1)
+        found = fits & (vocabulary[positions] == query)
+
+        matrix = sparse.csr_matrix(
+            (
+                np.ones(int(found.sum()), dtype=np.float32),
+                (np.asarray(rows, dtype=np.int64)[found], columns[positions[found]]),
+            ),
+            shape=(len(texts), len(idf)),
+        )
+        matrix.sum_duplicates()
+        if self._sublinear_tf:
+            np.log(matrix.data, out=matrix.data)
+            matrix.data += 1
+        matrix = matrix.multiply(idf).tocsr()
+        return normalize(matrix, norm=self._norm, copy=False) if self._norm else matrix
+
+    def predict_proba(self, texts: Sequence[str]):
+        import numpy as np
+
+        decision = self.transform(texts) @ self.artifact["coef"] + self._intercept
+        positive = 1 / (1 + np.exp(-decision))
+        return np.column_stack([1 - positive, positive])
+
+
+class LinearEngine:
+    """
+    Classificador TF-IDF carregado de um artefato versionado. / TF-IDF classifier loaded from a versioned artifact.
+
+    Devolve o formato dos engines locais (``[[{"label", "score"}, ...]]``), com os rótulos ``productive`` e
+    ``unproductive``. / Returns the local engines' format (``[[{"label", "score"}, ...]]``), with the
+    ``productive`` and ``unproductive`` labels.
+    """
+
+    name = ENGINE_LINEAR
+
+    def __init__(self, model_dir: Optional[Path] = None, version: Optional[str] = None, mapped: Optional[bool] = None):
+        import joblib
+
+        model_dir = Path(model_dir or linear_model_dir())
+        self.version = version or latest_version(model_dir)
+        if self.version is None:
+            raise LinearModelUnavailable(f"Nenhum modelo linear em {model_dir} (python manage.py train_classifier)")
+
+        version_dir = model_dir / self.version
+        mapped = settings.AI_SETTINGS["AI_LINEAR_MODEL_MMAP"] if mapped is None else mapped
+        # Versões antigas não têm ``model.mmap`` / Older versions have no ``model.mmap``
+        self.mapped = mapped and (version_dir / MAPPED_FILENAME).exists()
+        if self.mapped:
+            self._pipeline = MappedLinearModel(version_dir / MAPPED_FILENAME)
+        else:
+            self._pipeline = joblib.load(version_dir / MODEL_FILENAME)
+        self.metadata = json.loads((version_dir / METADATA_FILENAME).read_text(encoding="utf-8"))
+        self._labels = [str(label) for label in self._pipeline.classes_]
+
+    def __call__(self, text: str) -> List[List[Dict]]:
+        return self.classify_batch([text])
+
+    def classify_batch(self, texts: List[str]) -> List[List[Dict]]:
+        # Uma matriz esparsa e um produto por lote / One sparse matrix and one product per batch
+        probabilities = self._pipeline.predict_proba(texts)
+        return [
+            sorted(
+                ({"label": label, "score": float(score)} for label, score in zip(self._labels, row)),
+                key=lambda item: item["score"],
+                reverse=True,
+            )
+            for row in probabilities
+        ]
@@ -0,0 +1,236 @@
+"""
+Engines de inferência local do modelo de backup / Local inference engines for the backup model.
+
+``AI_LOCAL_ENGINE`` escolhe como ``BACKUP_CLASSIFICATION_MODEL`` roda quando a API não está disponível:
+/ ``AI_LOCAL_ENGINE`` picks how ``BACKUP_CLASSIFICATION_MODEL`` runs when the API is unavailable:
+
+- ``transformers``: ``pipeline("sentiment-analysis")`` em PyTorch (padrão, comportamento anterior) /
+  PyTorch ``pipeline("sentiment-analysis")`` (default, previous behaviour)
+- ``onnx``: o mesmo modelo exportado para ONNX (opcionalmente quantizado em int8) e executado pelo ONNX Runtime
+  na CPU; carrega mais rápido, usa menos memória e não importa ``torch`` em runtime. / the same model exported
+  to ONNX (optionally int8-quantized) and run by ONNX Runtime on CPU; loads faster, uses less memory and does
+  not import ``torch`` at runtime.
+- ``server``: cliente do servidor compartilhado de ``local_model_server`` (um modelo para todos os workers) /
+  client for the shared ``local_model_server`` (one model for every worker)
+
+Os dois engines devolvem o formato do pipeline com ``top_k=None`` (``[[{"label", "score"}, ...]]``), com os
+rótulos de ``config.id2label``, então o mapeamento score → categoria do ``AIClassificationService`` é o mesmo.
+/ Both engines return the pipeline format with ``top_k=None`` (``[[{"label", "score"}, ...]]``) using the labels
+from ``config.id2label``, so the ``AIClassificationService`` score → category mapping is unchanged.
+
+A exportação é feita uma vez (``python manage.py export_onnx_model``, de preferência no build da imagem) e
+reaproveitada por todos os workers; sem os arquivos o engine fica indisponível e o fallback segue sem ele. /
+Export runs once (``python manage.py export_onnx_model``, ideally while building the image) and is reused by
+every worker; without the files the engine is unavailable and the fallback goes on without it.
+"""
+
+import importlib.util
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+from .local_model_server import LocalModelClient
+
+logger = logging.getLogger(__name__)
+
+ENGINE_TRANSFORMERS = "transformers"
+ENGINE_ONNX = "onnx"
+ENGINE_SERVER = "server"
+
+TRANSFORMERS_AVAILABLE = importlib.util.find_spec("transformers") is not None
+ONNXRUNTIME_AVAILABLE = importlib.util.find_spec("onnxruntime") is not None
+
+FP32_FILENAME = "model.onnx"
+INT8_FILENAME = "model.int8.onnx"
+
+
+class LocalEngineUnavailable(Exception):
+    """Dependências do engine local não instaladas. / Local engine dependencies are not installed."""
+
+    pass
+
+
+class TransformersEngine:
+    """``transformers.pipeline`` em PyTorch. / PyTorch ``transformers.pipeline``."""
+
+    name = ENGINE_TRANSFORMERS
+
+    def __init__(self, model_name: str):
+        if not TRANSFORMERS_AVAILABLE:
+            raise LocalEngineUnavailable("transformers não instalado")
+
+        from transformers import pipeline
+
+        self.model_name = model_name
+        self._pipeline = pipeline("sentiment-analysis", model=model_name, top_k=None)
+
+    def __call__(self, text: str) -> List[List[Dict]]:
+        return self.classify_batch([text])
+
+    def classify_batch(self, texts: List[str]) -> List[List[Dict]]:
+        # Lista de entrada → sempre ``[[...]]``, como no ONNX / List input → always ``[[...]]``, as with ONNX
+        return self._pipeline(texts, truncation=True, batch_size=len(texts))
+
+
+class OnnxEngine:
+    """Modelo exportado para ONNX, executado pelo ONNX Runtime. / ONNX-exported model run by ONNX Runtime."""
+
+    name = ENGINE_ONNX
+
+    def __init__(self, model_name: str, model_dir: Optional[Path] = None, quantize: Optional[bool] = None):
+        if not (ONNXRUNTIME_AVAILABLE and TRANSFORMERS_AVAILABLE):
+            raise LocalEngineUnavailable("onnxruntime e transformers são necessários para o engine ONNX")
+
+        self.model_name = model_name
+        self.quantize = settings.AI_SETTINGS["AI_ONNX_QUANTIZE"] if quantize is None else quantize
+        self.model_dir = model_dir or onnx_model_dir(model_name)
+
+        # Exportar leva minutos e precisa do torch: nunca no caminho da requisição / Exporting takes minutes and
+        # needs torch: never on the request path
+        model_path = self.model_dir / (INT8_FILENAME if self.quantize else FP32_FILENAME)
+        if not model_path.exists():
+            raise LocalEngineUnavailable(
+                f"Modelo ONNX não encontrado em {model_path}; rode 'python manage.py export_onnx_model'"
+                + ("" if self.quantize else " --no-quantize")
+            )
+
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # Uma thread por worker evita disputa de CPU entre processos do gunicorn / One thread per worker avoids
+        # CPU contention between gunicorn processes
+        options.intra_op_num_threads = settings.AI_SETTINGS["AI_ONNX_THREADS"]
+        options.inter_op_num_threads = 1
+
+        self._session = onnxruntime.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self._input_names = {model_input.name for model_input in self._session.get_inputs()}
+        self._tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+
+        with open(self.model_dir / "config.json", encoding="utf-8") as config_file:
+            id2label = json.load(config_file)["id2label"]
+        self._labels = [id2label[str(index)] for index in range(len(id2label))]
+
+    def __call__(self, text: str) -> List[List[Dict]]:
+        return self.classify_batch([text])
+
+    def classify_batch(self, texts: List[str]) -> List[List[Dict]]:
+        import numpy as np
+
+        # Um lote com padding até o maior texto / One batch padded to the longest text
+        encoded = self._tokenizer(texts, padding=True, truncation=True, max_length=512, return_tensors="np")
+        inputs = {name: value.astype(np.int64) for name, value in encoded.items() if name in self._input_names}
+        logits = self._session.run(None, inputs)[0]
+
+        # Softmax estável, igual ao pipeline / Stable softmax, same as the pipeline
+        exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+        probabilities = exp / exp.sum(axis=-1, keepdims=True)
+
+        return [
+            sorted(
+                ({"label": label, "score": float(score)} for label, score in zip(self._labels, row)),
+                key=lambda item: item["score"],
+                reverse=True,
+            )
+            for row in probabilities
+        ]
+
+
+def onnx_model_dir(model_name: str) -> Path:
+    """Diretório dos artefatos ONNX de ``model_name``. / ONNX artifact directory for ``model_name``."""
+
+    return Path(settings.AI_SETTINGS["AI_ONNX_MODEL_DIR"]) / model_name.replace("/", "--")
+
+
+def export_onnx_model(model_name: str, model_dir: Optional[Path] = None, quantize: bool = True) -> Dict:
+    """
+    Exporta ``model_name`` para ONNX e, se pedido, gera a versão int8. / Exports ``model_name`` to ONNX and,
+    if requested, builds the int8 version.
+
+    Precisa de ``torch`` apenas aqui; o runtime usa só ``onnxruntime`` e o tokenizer. / Needs ``torch`` only here;
+    the runtime only uses ``onnxruntime`` and the tokenizer.
+
+    Returns:
+        Dict: caminhos e tamanhos dos arquivos gerados / paths and sizes of the generated files
+    """
+
+    if not (ONNXRUNTIME_AVAILABLE and TRANSFORMERS_AVAILABLE):
+        raise LocalEngineUnavailable("onnxruntime e transformers são necessários para exportar o modelo")
+
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    model_dir = Path(model_dir or onnx_model_dir(model_name))
+    model_dir.mkdir(parents=True, exist_ok=True)
+    fp32_path = model_dir / FP32_FILENAME
+
+    start_time = time.time()
+    logger.info(f"Exportando {model_name} para ONNX em {model_dir}...")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer(["exemplo de email para exportação"], return_tensors="pt")
+    input_names = list(sample.keys())
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+
+    # Tokenizer e config ao lado do modelo: o runtime não precisa do hub nem do torch / Tokenizer and config next
+    # to the model: the runtime needs neither the hub nor torch
+    tokenizer.save_pretrained(model_dir)
+    model.config.save_pretrained(model_dir)
+
+    result = {"model_dir": str(model_dir), "fp32_path": str(fp32_path), "fp32_bytes": fp32_path.stat().st_size}
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = model_dir / INT8_FILENAME
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+        result.update({"int8_path": str(int8_path), "int8_bytes": int8_path.stat().st_size})
+
+    result["export_time"] = round(time.time() - start_time, 1)
+    logger.info(f"Modelo ONNX exportado em {result['export_time']}s")
+    return result
+
+
+ENGINES = {ENGINE_TRANSFORMERS: TransformersEngine, ENGINE_ONNX: OnnxEngine, ENGINE_SERVER: LocalModelClient}
+
+
+def local_engine_available(name: Optional[str] = None) -> bool:
+    """As dependências do engine configurado estão instaladas? / Are the configured engine's dependencies installed?"""
+
+    name = name or settings.AI_SETTINGS["AI_LOCAL_ENGINE"]
+    if name == ENGINE_ONNX:
+        return ONNXRUNTIME_AVAILABLE and TRANSFORMERS_AVAILABLE
+    if name == ENGINE_SERVER:
+        # O modelo fica no servidor; basta o socket existir / The model lives in the server; the socket must exist
+        return os.path.exists(settings.AI_SETTINGS["AI_LOCAL_MODEL_SOCKET"])
+    return TRANSFORMERS_AVAILABLE
+
+
+def load_local_engine(model_name: str, name: Optional[str] = None):
+    """Instancia o engine configurado em ``AI_LOCAL_ENGINE``. / Builds the engine configured in ``AI_LOCAL_ENGINE``."""
+
+    name = name or settings.AI_SETTINGS["AI_LOCAL_ENGINE"]
+    if name not in ENGINES:
+        raise ValueError(f"AI_LOCAL_ENGINE inválido: {name!r} (opções: {', '.join(ENGINES)})")
+    return ENGINES[name](model_name)
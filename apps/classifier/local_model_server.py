@@ -0,0 +1,270 @@
+"""
+Servidor de modelo local compartilhado / Shared local model server.
+
+Com ``workers = cpu_count * 2 + 1`` no gunicorn, cada worker que cai no fallback local carregava sua própria
+cópia do modelo. Aqui um único processo (``python manage.py serve_local_model``) mantém o modelo e atende
+todos os workers por um socket Unix; o ``MicroBatcher`` do servidor junta pedidos de workers diferentes no
+mesmo lote. / With ``workers = cpu_count * 2 + 1`` in gunicorn, every worker hitting the local fallback loaded
+its own copy of the model. Here a single process (``python manage.py serve_local_model``) holds the model and
+serves every worker over a Unix socket; the server's ``MicroBatcher`` puts requests from different workers into
+the same batch.
+
+Protocolo: quadros ``<tamanho de 4 bytes big-endian><JSON>``. Pedido ``{"id", "text"}``, resposta
+``{"id", "scores"}`` ou ``{"id", "error"}``. As respostas podem voltar fora de ordem, então o cliente pode
+enviar vários pedidos sem esperar (pipelining) e casá-los pelo ``id``. / Protocol: ``<4-byte big-endian
+length><JSON>`` frames. Request ``{"id", "text"}``, response ``{"id", "scores"}`` or ``{"id", "error"}``.
+Responses may come back out of order, so the client can send several requests without waiting (pipelining) and
+match them by ``id``.
+
+Com ``AI_LOCAL_ENGINE=server`` o ``AIClassificationService`` usa o ``LocalModelClient``. / With
+``AI_LOCAL_ENGINE=server`` the ``AIClassificationService`` uses ``LocalModelClient``.
+"""
+
+import itertools
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+import weakref
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+
+# Clientes vivos, para descartar conexões herdadas após ``fork`` / Live clients, to drop inherited connections
+# after ``fork``
+_clients: "weakref.WeakSet" = weakref.WeakSet()
+
+
+class LocalModelServerError(Exception):
+    """Falha ao falar com o servidor de modelo local. / Failure talking to the local model server."""
+
+    pass
+
+
+def send_frame(sock: socket.socket, payload: Dict):
+    data = json.dumps(payload).encode("utf-8")
+    sock.sendall(HEADER.pack(len(data)) + data)
+
+
+def recv_frame(sock_file) -> Optional[Dict]:
+    """Lê um quadro; ``None`` quando a conexão fecha. / Reads one frame; ``None`` when the connection closes."""
+
+    header = sock_file.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    (length,) = HEADER.unpack(header)
+    if length > MAX_FRAME_BYTES:
+        raise LocalModelServerError(f"Quadro grande demais: {length} bytes")
+    data = sock_file.read(length)
+    if len(data) < length:
+        return None
+    return json.loads(data)
+
+
+class _ConnectionHandler(socketserver.StreamRequestHandler):
+    """Uma conexão por worker; pedidos entram no batcher e respondem quando prontos. / One connection per worker."""
+
+    def handle(self):
+        write_lock = threading.Lock()
+        batcher = self.server.batcher
+
+        def reply(request_id, future: Future):
+            try:
+                payload = {"id": request_id, "scores": future.result()}
+            except Exception as e:
+                payload = {"id": request_id, "error": str(e)}
+            try:
+                with write_lock:
+                    send_frame(self.request, payload)
+            except OSError:
+                pass  # Worker desconectou / Worker disconnected
+
+        while True:
+            try:
+                message = recv_frame(self.rfile)
+            except (OSError, ValueError, LocalModelServerError) as e:
+                logger.warning(f"Conexão com worker descartada: {str(e)}")
+                return
+            if message is None:
+                return
+
+            self.server.stats["requests"] += 1
+            future = batcher.submit(str(message.get("text", ""))[:512])
+            future.add_done_callback(lambda done, request_id=message.get("id"): reply(request_id, done))
+
+
+class LocalModelServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Servidor Unix que compartilha um único engine (atrás de um ``MicroBatcher``). / Unix server sharing one engine."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, batcher):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # Socket antigo de uma execução anterior / Stale socket from a previous run
+        self.batcher = batcher
+        self.stats = {"requests": 0}
+        super().__init__(socket_path, _ConnectionHandler)
+        os.chmod(socket_path, 0o660)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+class LocalModelClient:
+    """
+    Cliente do servidor de modelo local, com a mesma interface dos engines. / Local model server client with the
+    same interface as the engines.
+
+    Uma conexão por processo (recriada após ``fork``) e uma thread leitora que entrega cada resposta à ``Future``
+    do seu ``id``; várias threads podem ter pedidos em voo na mesma conexão. / One connection per process
+    (recreated after ``fork``) and a reader thread that hands each response to the ``Future`` for its ``id``;
+    several threads can have requests in flight on the same connection.
+    """
+
+    name = "server"
+
+    def __init__(self, model_name: str, socket_path: Optional[str] = None, timeout: Optional[float] = None):
+        self.model_name = model_name
+        self.socket_path = socket_path or settings.AI_SETTINGS["AI_LOCAL_MODEL_SOCKET"]
+        self.timeout = settings.AI_SETTINGS["AI_LOCAL_MODEL_TIMEOUT"] if timeout is None else timeout
+
+        self._lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+        self._pending: Dict[int, Future] = {}
+        self._ids = itertools.count(1)
+        _clients.add(self)
+
+    def __call__(self, text: str) -> List[List[Dict]]:
+        return self._results([self._submit(text)])
+
+    def classify_batch(self, texts: List[str]) -> List[List[Dict]]:
+        # Envia tudo antes de esperar: pipelining / Send everything before waiting: pipelining
+        return self._results([self._submit(text) for text in texts])
+
+    def submit(self, text: str) -> Future:
+        return self._submit(text)[1]
+
+    def _submit(self, text: str) -> Tuple[int, Future]:
+        future = Future()
+        with self._lock:
+            sock = self._connect()
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+            try:
+                send_frame(sock, {"id": request_id, "text": text})
+            except OSError as e:
+                self._pending.pop(request_id, None)
+                self._close(sock, LocalModelServerError(str(e)))
+                raise LocalModelServerError(f"Servidor de modelo local indisponível: {str(e)}")
+        return request_id, future
+
+    def _results(self, requests: List[Tuple[int, Future]]) -> List:
+        """Espera as respostas; no timeout, esquece os pedidos ainda em voo. / Waits for the responses; on timeout,
+        forgets the requests still in flight."""
+
+        try:
+            return [future.result(timeout=self.timeout) for _, future in requests]
+        except FutureTimeoutError:
+            # Uma resposta tardia é descartada pela thread leitora / A late response is dropped by the reader thread
+            with self._lock:
+                for request_id, future in requests:
+                    self._pending.pop(request_id, None)
+                    future.cancel()
+            raise
+
+    def close(self):
+        with self._lock:
+            if self._sock is not None:
+                self._close(self._sock, LocalModelServerError("Cliente fechado"))
+
+    def _connect(self) -> socket.socket:
+        """Conexão deste processo, criada sob ``self._lock``. / This process's connection, created under ``self._lock``."""
+
+        if self._sock is not None:
+            return self._sock
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError as e:
+            sock.close()
+            raise LocalModelServerError(f"Servidor de modelo local indisponível em {self.socket_path}: {str(e)}")
+        sock.settimeout(None)
+
+        self._sock = sock
+        threading.Thread(target=self._read_responses, args=(sock,), name="ai-local-client", daemon=True).start()
+        return sock
+
+    def _read_responses(self, sock: socket.socket):
+        sock_file = sock.makefile("rb")
+        error: Exception = LocalModelServerError("Conexão com o servidor de modelo local fechada")
+        try:
+            while True:
+                message = recv_frame(sock_file)
+                if message is None:
+                    break
+                with self._lock:
+                    future = self._pending.pop(message.get("id"), None)
+                if future is None:
+                    continue
+                if "error" in message:
+                    future.set_exception(LocalModelServerError(message["error"]))
+                else:
+                    future.set_result(message["scores"])
+        except (OSError, ValueError, LocalModelServerError) as e:
+            error = LocalModelServerError(str(e))
+        finally:
+            with self._lock:
+                if self._sock is sock:
+                    self._close(sock, error)
+
+    def _close(self, sock: socket.socket, error: Exception):
+        """Fecha a conexão e falha os pedidos em voo (sob ``self._lock``). / Closes and fails in-flight requests."""
+
+        pending, self._pending = self._pending, {}
+        if self._sock is sock:
+            self._sock = None
+        try:
+            sock.close()
+        except OSError:
+            pass
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+
+def _reset_clients_in_child():
+    # A conexão e a thread leitora são do pai; o filho abre a própria no próximo pedido / The connection and reader
+    # thread belong to the parent; the child opens its own on the next request
+    for client in list(_clients):
+        client._lock = threading.Lock()
+        client._sock = None
+        client._pending = {}
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_clients_in_child)
+
+
+def serve(socket_path: str, batcher):
+    """Atende até ser interrompido. / Serves until interrupted."""
+
+    with LocalModelServer(socket_path, batcher) as server:
+        logger.info(f"Servidor de modelo local em {socket_path}")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
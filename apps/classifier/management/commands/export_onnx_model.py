@@ -0,0 +1,39 @@
+"""
+Exporta o modelo local de backup para ONNX / Exports the local backup model to ONNX.
+
+Rodar no build da imagem (ou uma vez por máquina) para que os workers com ``AI_LOCAL_ENGINE=onnx`` só carreguem
+o arquivo pronto. / Run while building the image (or once per host) so workers with ``AI_LOCAL_ENGINE=onnx``
+only load the ready-made file.
+
+Uso / Usage:
+    python manage.py export_onnx_model
+    python manage.py export_onnx_model --model distilbert-base-uncased-finetuned-sst-2-english --no-quantize
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.classifier.local_engines import LocalEngineUnavailable, export_onnx_model, onnx_model_dir
+
+
+class Command(BaseCommand):
+    help = "Exporta BACKUP_CLASSIFICATION_MODEL para ONNX (fp32 + int8) / Exports BACKUP_CLASSIFICATION_MODEL to ONNX"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", default=settings.AI_SETTINGS["BACKUP_CLASSIFICATION_MODEL"])
+        parser.add_argument("--output", help="Diretório de saída (padrão: AI_ONNX_MODEL_DIR) / Output directory")
+        parser.add_argument(
+            "--no-quantize", action="store_true", help="Não gerar a versão int8 / Do not build the int8 version"
+        )
+
+    def handle(self, *args, **options):
+        model_dir = options["output"] or onnx_model_dir(options["model"])
+        try:
+            result = export_onnx_model(options["model"], model_dir, quantize=not options["no_quantize"])
+        except LocalEngineUnavailable as e:
+            raise CommandError(f"{e} (pip install onnxruntime transformers torch)")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {options['model']} exportado em {result['export_time']}s"))
+        self.stdout.write(f"   fp32: {result['fp32_path']} ({result['fp32_bytes'] / 1e6:.1f} MB)")
+        if "int8_path" in result:
+            self.stdout.write(f"   int8: {result['int8_path']} ({result['int8_bytes'] / 1e6:.1f} MB)")
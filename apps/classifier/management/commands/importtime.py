@@ -0,0 +1,110 @@
+"""
+Relatório de custo de import dos módulos das apps / Import cost report for app modules.
+
+Cada módulo é importado em um processo novo com ``python -X importtime`` depois do ``django.setup()``, então o
+custo medido é o que aquele módulo adiciona ao boot de um worker (incluindo dependências pesadas como
+``transformers``). / Each module is imported in a fresh process with ``python -X importtime`` after
+``django.setup()``, so the measured cost is what that module adds to a worker boot (including heavy
+dependencies such as ``transformers``).
+
+Uso / Usage:
+    python manage.py importtime
+    python manage.py importtime apps.classifier.ai_service --top 5
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+MARKER = "@@importtime@@"
+SKIPPED_DIRS = {"migrations", "management", "__pycache__", "tests"}
+
+# Importa o módulo alvo depois do setup, marcando onde a medição começa. ``__import__`` (e não
+# ``importlib.import_module``) para que o próprio alvo apareça no ``-X importtime``. / Imports the target module
+# after setup, marking where measurement starts. ``__import__`` (not ``importlib.import_module``) so the target
+# itself shows up in ``-X importtime``.
+SCRIPT = """
+import sys, django
+django.setup()
+sys.stderr.write({marker!r} + "\\n")
+sys.stderr.flush()
+__import__({module!r})
+"""
+
+
+class Command(BaseCommand):
+    help = "Mede o custo de import de cada módulo das apps / Measures the import cost of each app module"
+
+    def add_arguments(self, parser):
+        parser.add_argument("modules", nargs="*", help="Módulos a medir (padrão: todos das apps) / Modules to measure")
+        parser.add_argument(
+            "--top", type=int, default=3, help="Dependências mais caras por módulo / Most expensive dependencies per module"
+        )
+
+    def handle(self, *args, **options):
+        modules = options["modules"] or self._discover_modules()
+
+        self.stdout.write(f"⏱️  Import time ({len(modules)} módulos, após django.setup)")
+        self.stdout.write("=" * 96)
+        self.stdout.write(f"{'módulo':<45}{'total':>12}{'próprio':>12}  dependências mais caras")
+
+        results = [self._measure(module, options["top"]) for module in modules]
+        for module, cumulative_us, self_us, heaviest in sorted(results, key=lambda r: r[1] or 0, reverse=True):
+            if cumulative_us is None:
+                self.stdout.write(f"{module:<45}{'(setup)':>12}{'':>12}  já importado pelo django.setup()")
+                continue
+            deps = ", ".join(f"{name} {us / 1000:.1f}ms" for name, us in heaviest)
+            line = f"{module:<45}{cumulative_us / 1000:>10.1f}ms{self_us / 1000:>10.1f}ms  {deps}"
+            self.stdout.write(self.style.WARNING(line) if cumulative_us >= 100_000 else line)
+
+        self.stdout.write("=" * 96)
+
+    def _discover_modules(self):
+        modules = []
+        for app_config in apps.get_app_configs():
+            if not app_config.name.startswith("apps."):
+                continue
+            root = Path(app_config.path)
+            for path in sorted(root.rglob("*.py")):
+                relative = path.relative_to(root)
+                if SKIPPED_DIRS & set(relative.parts[:-1]) or path.name == "tests.py":
+                    continue
+                parts = [app_config.name, *relative.with_suffix("").parts]
+                if parts[-1] == "__init__":
+                    parts.pop()
+                modules.append(".".join(parts))
+        return modules
+
+    def _measure(self, module, top):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE}
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", SCRIPT.format(marker=MARKER, module=module)],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            raise CommandError(f"Falha ao importar {module}:\n{completed.stderr[-2000:]}")
+
+        lines = completed.stderr.split(MARKER, 1)[-1].splitlines()
+        entries = []
+        for line in lines:
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:") :].split("|")
+            entries.append((name.strip(), int(self_us), int(cumulative_us), len(name) - len(name.lstrip())))
+
+        target = next((entry for entry in entries if entry[0] == module), None)
+        if target is None:
+            return module, None, None, []
+
+        # Dependências diretas (um nível abaixo do alvo) / Direct dependencies (one level below the target)
+        children = [(name, cumulative) for name, _, cumulative, depth in entries if depth == target[3] + 2]
+        heaviest = sorted(children, key=lambda child: child[1], reverse=True)[:top]
+        return module, target[2], target[1], heaviest
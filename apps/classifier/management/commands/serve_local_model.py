@@ -0,0 +1,54 @@
+"""
+Servidor de modelo local compartilhado pelos workers / Local model server shared by the workers.
+
+Carrega ``BACKUP_CLASSIFICATION_MODEL`` uma única vez e atende pelo socket Unix ``AI_LOCAL_MODEL_SOCKET``. Os
+workers usam o servidor com ``AI_LOCAL_ENGINE=server``. / Loads ``BACKUP_CLASSIFICATION_MODEL`` once and serves it
+over the ``AI_LOCAL_MODEL_SOCKET`` Unix socket. Workers use it with ``AI_LOCAL_ENGINE=server``.
+
+Uso / Usage:
+    python manage.py serve_local_model
+    python manage.py serve_local_model --engine onnx --batch-size 16 --max-wait-ms 10
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.classifier.local_engines import ENGINE_ONNX, ENGINE_TRANSFORMERS, LocalEngineUnavailable, load_local_engine
+from apps.classifier.local_model_server import serve
+from apps.classifier.micro_batcher import MicroBatcher
+
+
+class Command(BaseCommand):
+    help = "Serve o modelo local por socket Unix para todos os workers / Serves the local model over a Unix socket"
+
+    def add_arguments(self, parser):
+        configured = settings.AI_SETTINGS["AI_LOCAL_ENGINE"]
+        parser.add_argument("--socket", default=settings.AI_SETTINGS["AI_LOCAL_MODEL_SOCKET"])
+        parser.add_argument("--model", default=settings.AI_SETTINGS["BACKUP_CLASSIFICATION_MODEL"])
+        parser.add_argument(
+            "--engine",
+            choices=[ENGINE_TRANSFORMERS, ENGINE_ONNX],
+            default=configured if configured in (ENGINE_TRANSFORMERS, ENGINE_ONNX) else ENGINE_TRANSFORMERS,
+        )
+        parser.add_argument("--batch-size", type=int, default=settings.AI_SETTINGS["AI_LOCAL_BATCH_MAX_SIZE"])
+        parser.add_argument("--max-wait-ms", type=float, default=settings.AI_SETTINGS["AI_LOCAL_BATCH_MAX_WAIT_MS"])
+
+    def handle(self, *args, **options):
+        try:
+            engine = load_local_engine(options["model"], options["engine"])
+        except LocalEngineUnavailable as e:
+            raise CommandError(str(e))
+
+        batcher = MicroBatcher(engine, max_batch_size=options["batch_size"], max_wait_ms=options["max_wait_ms"])
+        self.stdout.write(self.style.SUCCESS(f"🧠 {options['model']} ({options['engine']}) servindo em {options['socket']}"))
+
+        try:
+            serve(options["socket"], batcher)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stats = batcher.get_stats()
+            self.stdout.write(
+                f"📊 {stats['items']} inferências em {stats['batches']} lotes "
+                f"(preenchimento {stats['fill_ratio']:.0%}, espera média {stats['avg_queue_wait_ms']:.1f}ms)"
+            )
@@ -0,0 +1,91 @@
+"""
+Treina o modelo linear TF-IDF com os emails gravados / Trains the TF-IDF linear model on the stored emails.
+
+Usa ``content`` e ``classification_result`` dos emails rotulados pela API ou corrigidos no admin
+(``linear_model.labeled_rows``) e grava uma versão nova em ``AI_LINEAR_MODEL_DIR``; os workers passam a usá-la
+no próximo carregamento. / Uses ``content`` and ``classification_result`` of emails labeled by the API or
+corrected in the admin (``linear_model.labeled_rows``) and writes a new version to ``AI_LINEAR_MODEL_DIR``;
+workers pick it up on their next load.
+
+Com ``--incremental``, continua o último modelo incremental só com as linhas novas ou corrigidas desde a marca
+d'água dele (agendar, por exemplo, a cada hora). / With ``--incremental``, continues the latest incremental
+model with only the rows new or corrected since its watermark (schedule it, e.g., hourly).
+
+Uso / Usage:
+    python manage.py train_classifier
+    python manage.py train_classifier --min-confidence 0.8 --min-samples 200
+    python manage.py train_classifier --incremental --batch-size 500
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.classifier.linear_model import (
+    linear_model_dir,
+    save_linear_model,
+    train_incremental,
+    train_linear_model,
+    training_data,
+)
+
+
+class Command(BaseCommand):
+    help = "Treina o classificador TF-IDF + regressão logística / Trains the TF-IDF + logistic regression classifier"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-confidence",
+            type=float,
+            default=settings.AI_SETTINGS["AI_CONFIDENCE_THRESHOLD"],
+            help="Confiança mínima dos rótulos usados / Minimum confidence of the labels used",
+        )
+        parser.add_argument("--min-samples", type=int, default=20, help="Exemplos mínimos / Minimum examples")
+        parser.add_argument("--test-size", type=float, default=0.2, help="Fração de holdout / Holdout fraction")
+        parser.add_argument("--max-features", type=int, default=50000, help="Tamanho do vocabulário / Vocabulary size")
+        parser.add_argument("--output", help="Diretório de saída (padrão: AI_LINEAR_MODEL_DIR) / Output directory")
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Hashing + SGD a partir da marca d'água do último modelo / Hashing + SGD from the latest model's watermark",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="Mini-lote incremental / Incremental mini-batch")
+
+    def handle(self, *args, **options):
+        if options["incremental"]:
+            return self._handle_incremental(options)
+
+        texts, labels = training_data(options["min_confidence"])
+        if len(texts) < options["min_samples"]:
+            raise CommandError(f"Apenas {len(texts)} emails rotulados (mínimo: {options['min_samples']})")
+
+        try:
+            pipeline, metrics = train_linear_model(texts, labels, options["test_size"], options["max_features"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        metrics["min_confidence"] = options["min_confidence"]
+        version_dir = save_linear_model(pipeline, metrics, options["output"] or linear_model_dir())
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Modelo linear treinado: {version_dir}"))
+        self.stdout.write(f"   exemplos: {metrics['samples']} {metrics['class_counts']}")
+        self.stdout.write(f"   vocabulário: {metrics['vocabulary_size']} termos, treino em {metrics['train_seconds']}s")
+        if "holdout_accuracy" in metrics:
+            self.stdout.write(f"   acurácia (holdout de {metrics['holdout_samples']}): {metrics['holdout_accuracy']:.1%}")
+
+    def _handle_incremental(self, options):
+        model_dir = options["output"] or linear_model_dir()
+        trained = train_incremental(model_dir, options["min_confidence"], options["batch_size"])
+        if trained is None:
+            self.stdout.write("Nenhum email novo desde a última versão / No new emails since the latest version")
+            return
+
+        model, metrics = trained
+        metrics["min_confidence"] = options["min_confidence"]
+        version_dir = save_linear_model(model, metrics, model_dir)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Modelo incremental publicado: {version_dir}"))
+        self.stdout.write(
+            f"   novos exemplos: {metrics['new_samples']} em {metrics['batches']} lotes ({metrics['samples']} no total)"
+        )
+        if metrics["progressive_accuracy"] is not None:
+            self.stdout.write(f"   acurácia progressiva: {metrics['progressive_accuracy']:.1%}")
@@ -0,0 +1,239 @@
+"""
+Métricas no formato de exposição do Prometheus / Metrics in the Prometheus exposition format.
+
+Histogramas de latência por etapa do pipeline (pré-processamento, cache, rate limit, API, fallback, resposta,
+banco) e por backend que produziu a classificação, mais contadores. Um histograma é um conjunto de contadores
+(um por bucket, mais soma e contagem), então cada métrica usa ``SharedCounters``: os incrementos de cada worker
+vão em lote para o cache e ``/metrics`` mostra a soma de todos os workers, como o modo multiprocesso do
+``prometheus_client``, sem diretório compartilhado. / Latency histograms per pipeline stage (preprocessing,
+cache, rate limit, API, fallback, response, database) and per backend that produced the classification, plus
+counters. A histogram is a set of counters (one per bucket, plus sum and count), so each metric uses
+``SharedCounters``: every worker's increments go to the cache in batches and ``/metrics`` shows the sum across
+workers, like ``prometheus_client``'s multiprocess mode, without a shared directory.
+
+Os valores de cada label são fixos e declarados aqui, então o número de séries é conhecido. / Each label's
+values are fixed and declared here, so the number of series is known.
+"""
+
+import asyncio
+import functools
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+
+from .shared_stats import SharedCounters
+
+# Etapas do pipeline de classificação / Classification pipeline stages
+STAGES = (
+    "preprocess",
+    "cache_lookup",
+    "near_duplicate",
+    "rate_limit",
+    "api_call",
+    "fallback",
+    "response_generation",
+    "db_save",
+)
+
+# Valores de ``processing_details["method"]`` / ``processing_details["method"]`` values
+BACKENDS = (
+    "cache",
+    "near_duplicate",
+    "huggingface_api",
+    "huggingface_api_windows",
+    "linear_model",
+    "local_model_enhanced",
+    "heuristic_enhanced",
+    "consensus_fallback",
+    "fallback_default",
+    "other",
+)
+
+# Buckets de latência em segundos / Latency buckets in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Soma guardada em microssegundos: ``cache.incr`` só soma inteiros / Sum stored in microseconds: ``cache.incr``
+# only adds integers
+_SUM_SCALE = 1_000_000
+
+_registry: List["_Metric"] = []
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, label: str, label_values: Iterable[str]):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.label_values = tuple(label_values)
+        self._counters: Optional[SharedCounters] = None
+        _registry.append(self)
+
+    @property
+    def counters(self) -> SharedCounters:
+        # Criado no primeiro uso, quando as settings já estão carregadas / Created on first use, once settings are
+        # loaded
+        if self._counters is None:
+            self._counters = SharedCounters(
+                f"metric_{self.name}", self._fields(), flush_interval=settings.AI_SETTINGS["AI_STATS_FLUSH_INTERVAL"]
+            )
+        return self._counters
+
+    def _fields(self) -> List[str]:
+        raise NotImplementedError
+
+    def _check(self, value: str) -> str:
+        if value not in self.label_values:
+            raise ValueError(f"{self.label}={value!r} não declarado em {self.name}")
+        return value
+
+    def _series(self, value: str, suffix: str = "", extra: str = "") -> str:
+        return f'{self.name}{suffix}{{{self.label}="{value}"{extra}}}'
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Contador monotônico com um label. / Monotonic counter with one label."""
+
+    type_name = "counter"
+
+    def inc(self, value: str, amount: int = 1):
+        self.counters.incr(self._check(value), amount)
+
+    def _fields(self) -> List[str]:
+        return list(self.label_values)
+
+    def render(self) -> List[str]:
+        totals = self.counters.totals()
+        return [f"{self._series(value)} {totals[value]}" for value in self.label_values]
+
+
+class Histogram(_Metric):
+    """Histograma com um label e buckets fixos. / Histogram with one label and fixed buckets."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, label: str, label_values: Iterable[str], buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, label, label_values)
+
+    def observe(self, value: str, seconds: float):
+        self._check(value)
+        counters = self.counters
+        # Só o primeiro bucket que comporta o valor; o acumulado é calculado na leitura / Only the first bucket
+        # that fits the value; the cumulative count is computed on read
+        bucket = next((str(bound) for bound in self.buckets if seconds <= bound), "+Inf")
+        counters.incr(f"{value}:{bucket}")
+        counters.incr(f"{value}:count")
+        counters.incr(f"{value}:sum", round(seconds * _SUM_SCALE))
+
+    @contextmanager
+    def time(self, value: str):
+        """Mede o bloco ``with`` em segundos. / Times the ``with`` block in seconds."""
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(value, time.perf_counter() - started)
+
+    def timed(self, value: str):
+        """Decorador de ``time`` para funções síncronas e assíncronas. / ``time`` decorator for sync and async functions."""
+
+        def decorator(func):
+            if asyncio.iscoroutinefunction(func):
+
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.time(value):
+                        return await func(*args, **kwargs)
+
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.time(value):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def summary(self, value: str, totals: Optional[Dict[str, int]] = None) -> Dict:
+        """Contagem, soma e buckets acumulados de um label. / Count, sum and cumulative buckets of one label."""
+
+        totals = totals if totals is not None else self.counters.totals()
+        cumulative, running = [], 0
+        for bound in self.buckets:
+            running += totals[f"{value}:{bound}"]
+            cumulative.append((bound, running))
+        return {
+            "count": totals[f"{value}:count"],
+            "sum": totals[f"{value}:sum"] / _SUM_SCALE,
+            "buckets": cumulative + [("+Inf", totals[f"{value}:count"])],
+        }
+
+    def _fields(self) -> List[str]:
+        fields = []
+        for value in self.label_values:
+            fields += [f"{value}:{bound}" for bound in self.buckets]
+            fields += [f"{value}:+Inf", f"{value}:count", f"{value}:sum"]
+        return fields
+
+    def render(self) -> List[str]:
+        lines, totals = [], self.counters.totals()
+        for value in self.label_values:
+            summary = self.summary(value, totals)
+            lines += [self._series(value, "_bucket", f',le="{bound}"') + f" {count}" for bound, count in summary["buckets"]]
+            lines.append(f"{self._series(value, '_sum')} {summary['sum']}")
+            lines.append(f"{self._series(value, '_count')} {summary['count']}")
+        return lines
+
+
+STAGE_LATENCY = Histogram(
+    "ai_pipeline_stage_duration_seconds",
+    "Latência de cada etapa do pipeline / Latency of each pipeline stage.",
+    "stage",
+    STAGES,
+)
+BACKEND_LATENCY = Histogram(
+    "ai_classification_duration_seconds",
+    "Latência da classificação por backend / Classification latency per backend.",
+    "backend",
+    BACKENDS,
+)
+CLASSIFICATIONS = Counter(
+    "ai_classifications_total", "Classificações por backend / Classifications per backend.", "backend", BACKENDS
+)
+
+
+def backend_of(result: Dict) -> str:
+    """Label de backend de um resultado de classificação. / Backend label of a classification result."""
+
+    details = result.get("processing_details", {})
+    if "near_duplicate" in details:
+        return "near_duplicate"
+    method = details.get("method", "other")
+    return method if method in BACKENDS else "other"
+
+
+def observe_classification(result: Dict, seconds: float, cached: bool = False):
+    backend = "cache" if cached else backend_of(result)
+    BACKEND_LATENCY.observe(backend, seconds)
+    CLASSIFICATIONS.inc(backend)
+
+
+def render_metrics() -> str:
+    """Todas as métricas no formato de texto do Prometheus. / Every metric in the Prometheus text format."""
+
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type_name}")
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,169 @@
+"""
+Micro-batching dinâmico para o modelo local / Dynamic micro-batching for the local model.
+
+Em deploys com threads (gthread) ou async, várias requisições caem no fallback local ao mesmo tempo. Em vez de
+cada uma rodar o modelo sozinha, o ``MicroBatcher`` junta os textos por até ``AI_LOCAL_BATCH_MAX_WAIT_MS`` ou
+``AI_LOCAL_BATCH_MAX_SIZE`` itens, roda um único lote com padding e devolve cada resultado a quem pediu. /
+In threaded (gthread) or async deployments, several requests hit the local fallback at once. Instead of each one
+running the model alone, the ``MicroBatcher`` collects texts for up to ``AI_LOCAL_BATCH_MAX_WAIT_MS`` or
+``AI_LOCAL_BATCH_MAX_SIZE`` items, runs a single padded batch and hands each result back to its caller.
+
+Uma única thread por processo executa o modelo (recriada após ``fork``), o que também evita chamadas
+concorrentes ao mesmo pipeline. / A single thread per process runs the model (recreated after ``fork``), which
+also avoids concurrent calls into the same pipeline.
+
+Quem pede espera no máximo ``AI_LOCAL_MODEL_TIMEOUT``; um texto abandonado ainda na fila sai do lote. / Callers
+wait at most ``AI_LOCAL_MODEL_TIMEOUT``; an abandoned text still in the queue is dropped from the batch.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Instâncias vivas, para recriar fila e thread no filho após ``fork`` / Live instances, so the child can rebuild
+# queue and thread after ``fork``
+_batchers: "weakref.WeakSet" = weakref.WeakSet()
+
+
+class MicroBatcher:
+    """
+    Fila na frente de um engine com ``classify_batch``; chamável como o próprio engine. / Queue in front of an
+    engine with ``classify_batch``; callable like the engine itself.
+    """
+
+    def __init__(self, engine, max_batch_size: int = 8, max_wait_ms: float = 5.0, timeout: Optional[float] = None):
+        self.engine = engine
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.timeout = settings.AI_SETTINGS["AI_LOCAL_MODEL_TIMEOUT"] if timeout is None else timeout
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+        self.stats = {"batches": 0, "items": 0, "errors": 0, "queue_wait_total_ms": 0.0, "queue_wait_max_ms": 0.0}
+        _batchers.add(self)
+
+    @property
+    def name(self) -> str:
+        return self.engine.name
+
+    @property
+    def model_name(self) -> str:
+        return self.engine.model_name
+
+    def __call__(self, text: str) -> List[List[Dict]]:
+        future = self.submit(text)
+        try:
+            return [future.result(timeout=self.timeout)]
+        except FutureTimeoutError:
+            # Ainda na fila: sai do próximo lote / Still queued: dropped from the next batch
+            future.cancel()
+            raise
+
+    def submit(self, text: str) -> Future:
+        """Enfileira ``text``; a ``Future`` recebe a lista de scores. / Queues ``text``; the ``Future`` gets its score list."""
+
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((text, future, time.monotonic()))
+        return future
+
+    def get_stats(self) -> Dict:
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "avg_batch_size": self.stats["items"] / max(1, batches),
+            "fill_ratio": self.stats["items"] / max(1, batches * self.max_batch_size),
+            "avg_queue_wait_ms": self.stats["queue_wait_total_ms"] / max(1, self.stats["items"]),
+            "queue_depth": self._queue.qsize(),
+        }
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="ai-local-batcher", daemon=True)
+                self._worker.start()
+
+    def _reset_after_fork(self):
+        # A thread não existe no filho e a fila herdada pode ter itens do pai / The thread does not exist in the
+        # child and the inherited queue may hold the parent's items
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def _collect(self) -> List:
+        """Bloqueia pelo primeiro item e junta outros até o limite. / Blocks for the first item and gathers more up to the limit."""
+
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Futures canceladas por timeout enquanto esperavam ficam de fora / Futures cancelled by a timeout while
+            # waiting are left out
+            batch = [item for item in self._collect() if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            started = time.monotonic()
+            texts = [text for text, _, _ in batch]
+
+            for _, _, enqueued_at in batch:
+                wait_ms = (started - enqueued_at) * 1000
+                self.stats["queue_wait_total_ms"] += wait_ms
+                self.stats["queue_wait_max_ms"] = max(self.stats["queue_wait_max_ms"], wait_ms)
+            self.stats["batches"] += 1
+            self.stats["items"] += len(batch)
+
+            try:
+                results = self.engine.classify_batch(texts)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Lote local de {len(batch)} itens falhou: {str(e)}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future, _), scores in zip(batch, results):
+                future.set_result(scores)
+
+            # ``zip`` para no menor: quem ficou sem resultado recebe um erro em vez de esperar / ``zip`` stops at the
+            # shorter one: whoever got no result receives an error instead of waiting
+            if len(results) < len(batch):
+                self.stats["errors"] += 1
+                error = RuntimeError(f"Engine local devolveu {len(results)} resultados para {len(batch)} textos")
+                logger.warning(str(error))
+                for _, future, _ in batch[len(results) :]:
+                    future.set_exception(error)
+
+
+def _reset_batchers_in_child():
+    for batcher in list(_batchers):
+        batcher._reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_batchers_in_child)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 07:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("classifier", "0002_fix_table_reference"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="email",
+            name="content_simhash",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
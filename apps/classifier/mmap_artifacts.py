@@ -0,0 +1,120 @@
+"""
+Artefatos de arrays numpy mapeados em memória / Memory-mapped numpy array artifacts.
+
+Um modelo carregado com ``pickle``/``joblib`` vira uma cópia no heap de cada worker (2N+1 cópias no gunicorn).
+Aqui os arrays do modelo ficam crus, alinhados, num único arquivo aberto com ``mmap`` só leitura: os arrays
+apontam direto para o page cache do kernel, então todos os processos que abrem o mesmo arquivo usam as mesmas
+páginas físicas e carregar é só ler o cabeçalho. / A model loaded with ``pickle``/``joblib`` becomes a heap copy
+in every worker (2N+1 copies under gunicorn). Here the model's arrays are stored raw and aligned in a single
+file opened with a read-only ``mmap``: the arrays point straight into the kernel page cache, so every process
+opening the same file uses the same physical pages and loading only reads the header.
+
+Formato / Format::
+
+    MAGIC (8 bytes) | tamanho do cabeçalho / header length (uint64 LE) | cabeçalho JSON / JSON header | arrays
+
+O cabeçalho guarda os metadados e, por array, ``dtype``, ``shape`` e ``offset`` (múltiplo de ``ALIGNMENT``). /
+The header holds the metadata and, per array, ``dtype``, ``shape`` and ``offset`` (a multiple of ``ALIGNMENT``).
+
+O arquivo é escrito ao lado e trocado com ``os.replace`` (atômico). Nunca é alterado no lugar: quem já mapeou a
+versão anterior continua lendo o inode antigo até fechá-lo. / The file is written alongside and swapped in with
+``os.replace`` (atomic). It is never modified in place: whoever already mapped the previous version keeps
+reading the old inode until closing it.
+"""
+
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Optional
+
+MAGIC = b"AUTOUMM1"
+ALIGNMENT = 64
+_LENGTH = struct.Struct("<Q")
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_arrays(path, arrays: Dict, metadata: Optional[Dict] = None) -> Path:
+    """Grava ``arrays`` e ``metadata`` em ``path`` de forma atômica. / Atomically writes ``arrays`` and ``metadata`` to ``path``."""
+
+    import numpy as np
+
+    path = Path(path)
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+
+    # Offsets relativos ao fim do cabeçalho, que só tem tamanho conhecido depois / Offsets relative to the end of
+    # the header, whose size is only known afterwards
+    table, position = {}, 0
+    for name, array in arrays.items():
+        if array.dtype.hasobject:
+            raise TypeError(f"Array {name!r} com objetos Python não pode ser mapeado")
+        position = _aligned(position)
+        table[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": position}
+        position += array.nbytes
+
+    header = json.dumps({"metadata": metadata or {}, "arrays": table}).encode("utf-8")
+    data_start = _aligned(len(MAGIC) + _LENGTH.size + len(header))
+
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as artifact:
+        artifact.write(MAGIC + _LENGTH.pack(len(header)) + header)
+        for name, array in arrays.items():
+            artifact.seek(data_start + table[name]["offset"])
+            artifact.write(array.tobytes())
+        artifact.flush()
+        os.fsync(artifact.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+
+class MappedArrays:
+    """
+    Arrays de um artefato, somente leitura, sobre um ``mmap`` compartilhado. / An artifact's arrays, read-only,
+    over a shared ``mmap``.
+
+    Uso / Usage::
+
+        artifact = MappedArrays("model.mmap")
+        artifact["coef"]  # np.ndarray sem cópia / zero-copy np.ndarray
+        artifact.metadata
+    """
+
+    def __init__(self, path):
+        import numpy as np
+
+        self.path = Path(path)
+        with open(self.path, "rb") as artifact:
+            # O mapeamento continua válido depois de fechar o arquivo / The mapping stays valid after the file is
+            # closed
+            self._mmap = mmap.mmap(artifact.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[: len(MAGIC)] != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{self.path} não é um artefato mapeável")
+
+        (header_length,) = _LENGTH.unpack_from(self._mmap, len(MAGIC))
+        header_start = len(MAGIC) + _LENGTH.size
+        header = json.loads(self._mmap[header_start : header_start + header_length])
+        data_start = _aligned(header_start + header_length)
+
+        self.metadata = header["metadata"]
+        self._arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            array = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=data_start + spec["offset"])
+            self._arrays[name] = array.reshape(spec["shape"])
+
+    def __getitem__(self, name: str):
+        return self._arrays[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._arrays
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self._arrays.values())
@@ -5,6 +5,8 @@ Models for AutoU Email Classifier - VERSÃO FINAL CORRIGIDA
 from django.db import models
 from django.utils import timezone
 
+from .near_duplicates import email_text, text_fingerprint, to_signed
+
 
 class Email(models.Model):
     """
@@ -38,6 +40,9 @@ class Email(models.Model):
     processing_status = models.CharField(max_length=20, default='completed')
     suggested_response = models.TextField(null=True, blank=True)
     
+    # Impressão SimHash do conteúdo (64 bits com sinal), para o índice de quase-duplicatas
+    content_simhash = models.BigIntegerField(null=True, blank=True)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     classified_at = models.DateTimeField(null=True, blank=True)
@@ -60,6 +65,11 @@ class Email(models.Model):
         if self.classification_result and not self.classified_at:
             self.classified_at = timezone.now()
         
+        # Impressão calculada uma vez, sobre o mesmo texto que o serviço classifica; None para textos curtos demais
+        if self.content_simhash is None and self.content:
+            fingerprint = text_fingerprint(email_text(self.subject, self.content))
+            self.content_simhash = to_signed(fingerprint) if fingerprint is not None else None
+        
         # Sincronizar campos de compatibilidade
         if self.sender and not self.sender_email:
             self.sender_email = self.sender
@@ -0,0 +1,313 @@
+"""
+Índice de quase-duplicatas por SimHash / SimHash near-duplicate index.
+
+Campanhas de marketing e notificações automáticas diferem só por nome, data ou link de rastreio, então o cache
+exato (``cache_keys``) nunca acerta para elas. Aqui cada email vira uma impressão digital SimHash de 64 bits:
+textos quase iguais têm impressões a poucos bits de distância (Hamming). / Marketing blasts and automated
+notifications differ only by name, date or tracking link, so the exact cache (``cache_keys``) never hits for
+them. Here each email becomes a 64-bit SimHash fingerprint: near-identical texts have fingerprints a few bits
+apart (Hamming distance).
+
+- Features: palavras da forma canônica, com URLs, emails e números trocados por marcadores, pesadas pela
+  frequência. Pares de palavras dobrariam o peso de cada nome trocado. / Words of the canonical form, with URLs,
+  emails and numbers replaced by placeholders, weighted by frequency. Word pairs would double the weight of each
+  changed name.
+- LSH em bandas: a impressão é dividida em ``bands`` bandas e cada banda indexa um dict. Com ``max_distance``
+  menor que ``bands``, duas impressões dentro do limite têm ao menos uma banda idêntica (casa dos pombos), então
+  a busca só compara os candidatos dessas bandas e não perde nenhum vizinho. / Banded LSH: the fingerprint is
+  split into ``bands`` bands and each band keys a dict. With ``max_distance`` below ``bands``, two fingerprints
+  within the limit share at least one identical band (pigeonhole), so a lookup only compares the candidates in
+  those bands and never misses a neighbour.
+- Em memória, limitado a ``max_entries`` (os mais antigos saem primeiro); opcionalmente carregado das impressões
+  gravadas na tabela ``emails``. / In memory, bounded to ``max_entries`` (oldest evicted first); optionally
+  loaded from the fingerprints stored on the ``emails`` table.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .cache_keys import canonicalize_text
+from .deadline import TIER_API
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_BITS = 64
+_MASK = (1 << FINGERPRINT_BITS) - 1
+
+# Textos com menos palavras têm impressões instáveis; o cache exato cobre esses casos / Texts with fewer words
+# have unstable fingerprints; the exact cache covers them
+MIN_FEATURES = 20
+
+# Partes variáveis de emails em massa / Variable parts of mass emails
+_PLACEHOLDERS = (
+    (re.compile(r"(?:https?://|www\.)\S+"), " _url_ "),
+    (re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+"), " _email_ "),
+    (re.compile(r"\d+(?:[.,:/-]\d+)*"), " _num_ "),
+)
+_TOKEN_RE = re.compile(r"\w+")
+
+# Índices vivos, para recriar os locks no filho após ``fork`` / Live indexes, to recreate locks in the child
+# after ``fork``
+_indexes: "weakref.WeakSet" = weakref.WeakSet()
+
+
+def fingerprint_features(text: str) -> List[str]:
+    """Palavras usadas no SimHash. / Words used by the SimHash."""
+
+    text = canonicalize_text(text)
+    for pattern, placeholder in _PLACEHOLDERS:
+        text = pattern.sub(placeholder, text)
+    return _TOKEN_RE.findall(text)
+
+
+def simhash(features: Iterable[str]) -> int:
+    """Impressão SimHash de 64 bits das features. / 64-bit SimHash fingerprint of the features."""
+
+    import numpy as np
+
+    weights: Dict[str, int] = {}
+    for feature in features:
+        weights[feature] = weights.get(feature, 0) + 1
+    if not weights:
+        return 0
+
+    digests = b"".join(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest() for feature in weights)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8)).reshape(len(weights), FINGERPRINT_BITS)
+    counts = np.fromiter(weights.values(), dtype=np.int64, count=len(weights))
+    # Soma ponderada de +1/-1 por bit; bit 0 é o mais significativo / Weighted +1/-1 sum per bit; bit 0 is the
+    # most significant
+    votes = counts @ (bits.astype(np.int64) * 2 - 1)
+    return int.from_bytes(np.packbits(votes > 0).tobytes(), "big")
+
+
+def email_text(subject: Optional[str], content: str) -> str:
+    """
+    Texto classificado de um email: assunto e corpo, como em ``services.classify_email_ai``. / The classified
+    text of an email: subject and body, as in ``services.classify_email_ai``.
+
+    As impressões gravadas em ``Email.save`` e as calculadas pelo serviço partem deste mesmo texto. / Fingerprints
+    stored by ``Email.save`` and the ones computed by the service start from this same text.
+    """
+
+    return f"{subject}\n\n{content}" if subject else content
+
+
+def text_fingerprint(text: str, min_features: int = MIN_FEATURES) -> Optional[int]:
+    """Impressão do texto, ou ``None`` se ele é curto demais. / The text's fingerprint, or ``None`` if too short."""
+
+    features = fingerprint_features(text)
+    return simhash(features) if len(features) >= min_features else None
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def to_signed(fingerprint: int) -> int:
+    """Impressão como inteiro de 64 bits com sinal (``BigIntegerField``). / Fingerprint as a signed 64-bit integer."""
+
+    return fingerprint - (1 << FINGERPRINT_BITS) if fingerprint >> (FINGERPRINT_BITS - 1) else fingerprint
+
+
+def from_signed(value: int) -> int:
+    return value & _MASK
+
+
+class NearDuplicateIndex:
+    """
+    Índice LSH de impressões recentes e suas classificações. / LSH index of recent fingerprints and their
+    classifications.
+
+    Uso / Usage::
+
+        fingerprint = index.fingerprint(text)
+        match = index.lookup(fingerprint)  # (resultado, distância) ou None / (result, distance) or None
+        ...
+        index.add(fingerprint, result)
+    """
+
+    def __init__(self, max_distance: int = 7, bands: int = 8, max_entries: int = 10000, min_features: int = MIN_FEATURES):
+        if not 0 <= max_distance < bands or FINGERPRINT_BITS % bands:
+            raise ValueError("max_distance deve ser menor que bands, e bands deve dividir 64")
+
+        self.max_distance = max_distance
+        self.bands = bands
+        self.max_entries = max_entries
+        self.min_features = min_features
+
+        self._band_bits = FINGERPRINT_BITS // bands
+        self._entries: "OrderedDict[int, Dict]" = OrderedDict()
+        self._buckets: List[Dict[int, set]] = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+        self.loaded_from_db = False
+        self.stats = {"lookups": 0, "hits": 0, "misses": 0, "skipped": 0, "candidates": 0, "lookup_seconds": 0.0}
+        _indexes.add(self)
+
+    def fingerprint(self, text: str) -> Optional[int]:
+        fingerprint = text_fingerprint(text, self.min_features)
+        if fingerprint is None:
+            self.stats["skipped"] += 1
+        return fingerprint
+
+    def lookup(self, fingerprint: int) -> Optional[Tuple[Dict, int]]:
+        """Resultado mais próximo dentro de ``max_distance``. / Closest result within ``max_distance``."""
+
+        started = time.perf_counter()
+        best, best_distance = None, self.max_distance + 1
+        with self._lock:
+            candidates = set()
+            for band, value in enumerate(self._bands(fingerprint)):
+                candidates |= self._buckets[band].get(value, set())
+            for candidate in candidates:
+                distance = hamming_distance(fingerprint, candidate)
+                if distance < best_distance:
+                    best, best_distance = candidate, distance
+            result = self._entries[best] if best is not None else None
+
+            self.stats["lookups"] += 1
+            self.stats["candidates"] += len(candidates)
+            self.stats["hits" if result is not None else "misses"] += 1
+            self.stats["lookup_seconds"] += time.perf_counter() - started
+
+        return (result, best_distance) if result is not None else None
+
+    def add(self, fingerprint: int, result: Dict):
+        with self._lock:
+            if fingerprint in self._entries:
+                self._entries.move_to_end(fingerprint)
+            else:
+                for band, value in enumerate(self._bands(fingerprint)):
+                    self._buckets[band].setdefault(value, set()).add(fingerprint)
+            self._entries[fingerprint] = result
+
+            while len(self._entries) > self.max_entries:
+                oldest, _ = self._entries.popitem(last=False)
+                self._discard(oldest)
+
+    def load(self, rows: Iterable[Tuple[int, Dict]]) -> int:
+        """Adiciona ``(impressão, resultado)`` em ordem, do mais antigo ao mais novo. / Adds ``(fingerprint, result)``
+        pairs in order, oldest first."""
+
+        count = 0
+        for fingerprint, result in rows:
+            self.add(fingerprint, result)
+            count += 1
+        return count
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets = [{} for _ in range(self.bands)]
+
+    def get_stats(self) -> Dict:
+        lookups = self.stats["lookups"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "max_distance": self.max_distance,
+            "similarity_threshold": round(1 - self.max_distance / FINGERPRINT_BITS, 3),
+            "bands": self.bands,
+            "hit_rate": self.stats["hits"] / max(1, lookups),
+            "avg_lookup_ms": round(self.stats["lookup_seconds"] * 1000 / max(1, lookups), 4),
+            "loaded_from_db": self.loaded_from_db,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _bands(self, fingerprint: int) -> List[int]:
+        mask = (1 << self._band_bits) - 1
+        return [(fingerprint >> (band * self._band_bits)) & mask for band in range(self.bands)]
+
+    def _discard(self, fingerprint: int):
+        for band, value in enumerate(self._bands(fingerprint)):
+            bucket = self._buckets[band].get(value)
+            if bucket is not None:
+                bucket.discard(fingerprint)
+                if not bucket:
+                    del self._buckets[band][value]
+
+
+def load_from_emails(index: NearDuplicateIndex, min_confidence: float) -> int:
+    """
+    Carrega as classificações recentes gravadas na tabela ``emails``. / Loads the recent classifications stored
+    on the ``emails`` table.
+
+    Só entram emails concluídos pela API com confiança de pelo menos ``min_confidence``, os mesmos que
+    ``_remember_near_duplicate`` guarda em memória; heurísticas, modelos locais e o modelo linear ficam de fora.
+    / Only emails completed by the API with at least ``min_confidence`` are loaded, the same ones
+    ``_remember_near_duplicate`` keeps in memory; heuristics, local models and the linear model are left out.
+    """
+
+    from .models import Email
+    from .refinement import API_MODELS_USED, COMPLETED
+
+    rows = (
+        Email.objects.filter(
+            content_simhash__isnull=False,
+            classification_result__isnull=False,
+            processing_status=COMPLETED,
+            ai_model_used__in=API_MODELS_USED,
+            confidence_score__gte=min_confidence,
+        )
+        .order_by("-created_at")
+        .values_list("id", "content_simhash", "classification_result", "confidence_score", "ai_model_used")[
+            : index.max_entries
+        ]
+    )
+    loaded_at = time.time()
+    count = index.load(
+        (
+            from_signed(fingerprint),
+            _stored_result(email_id, classification, confidence, model_used, loaded_at),
+        )
+        for email_id, fingerprint, classification, confidence, model_used in reversed(list(rows))
+    )
+    index.loaded_from_db = True
+    logger.info(f"Índice de quase-duplicatas carregado com {count} emails.")
+    return count
+
+
+def _stored_result(email_id: int, classification: str, confidence: float, model_used: Optional[str], loaded_at: float) -> Dict:
+    """
+    Linha gravada no formato completo de um resultado, o mesmo que ``_build_ai_result`` espera. / Stored row in
+    the full shape of a result, the same one ``_build_ai_result`` expects.
+
+    ``load_from_emails`` só carrega linhas classificadas pela API, então o nível é o da API. / ``load_from_emails``
+    only loads rows classified by the API, so the tier is the API's.
+    """
+
+    other = "unproductive" if classification == "productive" else "productive"
+    return {
+        "classification": classification,
+        "confidence": confidence,
+        "processing_details": {
+            "method": "near_duplicate",
+            "tier": TIER_API,
+            "model_used": model_used,
+            "original_confidence": confidence,
+            # Só a confiança do rótulo foi gravada / Only the label's confidence was stored
+            "all_scores": [
+                {"label": classification, "score": confidence},
+                {"label": other, "score": round(1 - confidence, 4)},
+            ],
+            "processed_at": loaded_at,
+            "source_email_id": email_id,
+        },
+    }
+
+
+def _reset_in_child():
+    for index in list(_indexes):
+        index._lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_in_child)
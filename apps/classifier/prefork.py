@@ -0,0 +1,167 @@
+"""
+Warm-up antes do fork e limpeza depois dele / Pre-fork warm-up and post-fork cleanup.
+
+Com ``preload_app = True`` o gunicorn importa a aplicação no master, mas o AI service, os módulos de views e o
+modelo local eram criados só no primeiro uso, em cada worker. ``warm_up_before_fork`` (chamado no
+``when_ready`` de ``gunicorn_config.py``) constrói tudo isso no master e congela o heap (``gc.freeze``) para que
+os workers compartilhem essas páginas por copy-on-write. ``reset_after_fork`` (no ``post_fork``) descarta o que
+não pode ser compartilhado: sessão HTTP, conexões de banco e estado do gerador aleatório. / With
+``preload_app = True`` gunicorn imports the application in the master, but the AI service, the view modules and
+the local model were only created on first use, in every worker. ``warm_up_before_fork`` (called from
+``gunicorn_config.py``'s ``when_ready``) builds all of that in the master and freezes the heap (``gc.freeze``) so
+workers share those pages copy-on-write. ``reset_after_fork`` (in ``post_fork``) drops what must not be shared:
+the HTTP session, database connections and random generator state.
+
+Nada aqui inicia threads no master: um lock preso por uma thread no momento do fork trava o filho. / Nothing
+here starts threads in the master: a lock held by a thread at fork time deadlocks the child.
+"""
+
+import gc
+import importlib
+import logging
+import os
+import random
+import sys
+import time
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import connections
+
+from .http_client import reset_http_session
+from .lexicon import all_lexicons
+from .tokenization import load_tokenizer
+
+logger = logging.getLogger(__name__)
+
+# Módulos importados pelas URLs; importá-los no master evita que cada worker pague o import / Modules imported by
+# the URLconf; importing them in the master keeps every worker from paying for the import
+PRELOADED_MODULES = (
+    "core.urls",
+    "apps.classifier.views",
+    "apps.classifier.async_views",
+    "apps.classifier.services",
+    "apps.classifier.direct_ai",
+    "apps.frontend.views",
+)
+
+
+def memory_usage(pid: Optional[int] = None) -> Dict[str, float]:
+    """
+    RSS, PSS e memória exclusiva (USS) do processo, em MB. / Process RSS, PSS and unique memory (USS), in MB.
+
+    A USS (páginas privadas) é o que cada worker realmente adiciona; páginas compartilhadas por copy-on-write
+    contam só na RSS/PSS. / USS (private pages) is what each worker really adds; pages shared copy-on-write only
+    count towards RSS/PSS.
+    """
+
+    fields = {"Rss": 0, "Pss": 0, "Private_Clean": 0, "Private_Dirty": 0}
+    try:
+        with open(f"/proc/{pid or os.getpid()}/smaps_rollup") as rollup:
+            for line in rollup:
+                name, _, value = line.partition(":")
+                if name in fields:
+                    fields[name] = int(value.split()[0])
+    except OSError:
+        return {}
+
+    return {
+        "rss_mb": round(fields["Rss"] / 1024, 1),
+        "pss_mb": round(fields["Pss"] / 1024, 1),
+        "uss_mb": round((fields["Private_Clean"] + fields["Private_Dirty"]) / 1024, 1),
+    }
+
+
+def warm_up_before_fork() -> Dict:
+    """
+    Constrói AI service, léxicos e (se configurado) o modelo local no master. / Builds the AI service, lexicons
+    and (if configured) the local model in the master.
+
+    Returns:
+        Dict: o que foi carregado, tempo e memória do master / what was loaded, time taken and master memory
+    """
+
+    from .ai_service import get_ai_service
+    from .local_engines import ENGINE_SERVER, local_engine_available
+
+    start_time = time.time()
+    report = {"modules": [], "lexicons": [], "local_model": None, "linear_model": None}
+
+    for module in PRELOADED_MODULES:
+        try:
+            importlib.import_module(module)
+            report["modules"].append(module)
+        except Exception as e:
+            logger.warning(f"Pré-carregamento de {module} falhou: {str(e)}")
+
+    # Matchers já compilados na importação; uma varredura toca as tabelas antes do fork / Matchers are compiled
+    # at import; one scan touches the tables before fork
+    for lexicon in all_lexicons():
+        lexicon.matcher.scan("warm-up")
+        report["lexicons"].append(lexicon.key)
+
+    # Sem o warm-up de conectividade: ele usa uma thread, que fica para cada worker / Without the connectivity
+    # warm-up: it uses a thread, which is left to each worker
+    service = get_ai_service(warm_up=False)
+    load_tokenizer(service.classification_model)
+
+    if (
+        settings.AI_SETTINGS["AI_PREFORK_LOAD_LOCAL_MODEL"]
+        and service.fallback_to_local
+        and service.local_engine != ENGINE_SERVER
+        and local_engine_available(service.local_engine)
+    ):
+        try:
+            # Só carrega; inferir no master criaria threads do runtime antes do fork / Load only; running inference
+            # in the master would start runtime threads before fork
+            service._local_classifier = service._load_local_classifier()
+            report["local_model"] = f"{service.backup_model} ({service.local_engine})"
+        except Exception as e:
+            logger.warning(f"Pré-carregamento do modelo local falhou: {str(e)}")
+
+    # Modelo linear: poucos MB, compartilhados entre os workers após o fork / Linear model: a few MB, shared by
+    # the workers after fork
+    linear_model = service._get_linear_model()
+    if linear_model is not None:
+        report["linear_model"] = linear_model.version
+
+    # Conexões abertas durante o warm-up não podem ir para os filhos / Connections opened during warm-up must not
+    # reach the children
+    connections.close_all()
+
+    # Objetos vivos vão para a geração permanente: o GC dos workers não escreve nessas páginas / Live objects move
+    # to the permanent generation: the workers' GC does not write to those pages
+    gc.collect()
+    gc.freeze()
+
+    report["warm_up_time"] = round(time.time() - start_time, 2)
+    report["frozen_objects"] = gc.get_freeze_count()
+    report["memory"] = memory_usage()
+    return report
+
+
+def reset_after_fork():
+    """
+    Descarta estado herdado que não pode ser compartilhado entre workers. / Drops inherited state that must not
+    be shared between workers.
+    """
+
+    # Sessão HTTP: os sockets do pool pertencem ao master / HTTP session: the pooled sockets belong to the master
+    reset_http_session()
+
+    # Conexões de banco herdadas: cada worker abre as suas / Inherited DB connections: each worker opens its own
+    for connection in connections.all(initialized_only=True):
+        connection.connection = None
+
+    # Gerador aleatório: sem isso os workers repetem a mesma sequência / Random generator: otherwise workers
+    # repeat the same sequence
+    random.seed()
+    if "numpy" in sys.modules:
+        sys.modules["numpy"].random.seed()
+
+    from . import ai_service
+
+    # O warm-up de conectividade pulado no master roda agora, em cada worker / The connectivity warm-up skipped in
+    # the master runs now, in each worker
+    if ai_service._ai_service_instance is not None and settings.AI_SETTINGS["AI_WARMUP_ON_START"]:
+        ai_service._ai_service_instance.warm_up()
@@ -0,0 +1,232 @@
+"""
+Rate limiter de token bucket para a API de inferência / Token-bucket rate limiter for the inference API.
+
+O limitador antigo fazia ``cache.get`` seguido de ``cache.set`` numa janela fixa de um minuto: workers
+concorrentes liam o mesmo contador e ultrapassavam o limite, e a virada da janela permitia o dobro de chamadas
+em poucos segundos. / The old limiter did ``cache.get`` followed by ``cache.set`` over a fixed one-minute window:
+concurrent workers read the same counter and overshot the limit, and the window edge allowed twice the calls
+within a few seconds.
+
+Aqui o bucket usa GCRA (generic cell rate algorithm), equivalente a um token bucket com ``burst`` tokens que
+repõe um token a cada ``60 / rate_per_minute`` segundos. O estado é um único número, o "tempo teórico de chegada"
+(TAT), atualizado de forma atômica / Here the bucket uses GCRA (generic cell rate algorithm), equivalent to a
+token bucket holding ``burst`` tokens and refilling one every ``60 / rate_per_minute`` seconds. The state is a
+single number, the "theoretical arrival time" (TAT), updated atomically:
+
+- Redis (produção): um script Lua, executado atomicamente pelo servidor e com o relógio do Redis. / Redis
+  (production): a Lua script, run atomically by the server and using the Redis clock.
+- LocMem (desenvolvimento e testes): leitura e escrita sob um lock do processo. O LocMem é por processo, então
+  isso é exato. / LocMem (development and tests): read and write under a process lock. LocMem is per-process, so
+  this is exact.
+- Outros backends compartilhados (memcached, banco, arquivo): sem script, o TAT vira ``burst`` slots de
+  ``60 / rate_per_minute`` segundos à frente do relógio, e cada token é um ``cache.add`` num slot livre. O ``add``
+  é atômico no memcached e no banco, então dois workers nunca ficam com o mesmo slot; no ``FileBasedCache`` o
+  ``add`` do Django é um ``has_key`` + ``set`` e pode haver sobreposição. / Other shared backends (memcached,
+  database, file): without scripting, the TAT becomes ``burst`` slots of ``60 / rate_per_minute`` seconds ahead
+  of the clock, and each token is a ``cache.add`` on a free slot. ``add`` is atomic on memcached and the
+  database, so two workers never get the same slot; on ``FileBasedCache`` Django's ``add`` is a ``has_key`` +
+  ``set`` and may overlap.
+
+``time_until_next_token`` não consome nada, então quem chama decide entre esperar e degradar. /
+``time_until_next_token`` consumes nothing, so callers decide between waiting and degrading.
+"""
+
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from django.core.cache import DEFAULT_CACHE_ALIAS
+from django.core.cache import cache as default_cache
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from asgiref.sync import sync_to_async
+
+# ARGV: intervalo de emissão, tolerância (burst), custo, gravar (1/0) / emission interval, tolerance (burst),
+# cost, commit (1/0). Retorna a espera em segundos ("0" se liberado) / Returns the wait in seconds ("0" if granted)
+GCRA_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + tonumber(ARGV[1]) * tonumber(ARGV[3])
+local wait = new_tat - now - tonumber(ARGV[2])
+if wait > 0 then return tostring(wait) end
+if tonumber(ARGV[4]) == 1 then
+    redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000) + 1000)
+end
+return '0'
+"""
+
+# Lock do processo para o LocMem / Process lock for LocMem
+_local_lock = threading.Lock()
+
+# Espera mínima de uma negação nos slots: arredondamento nunca vira "liberado" (0) / Minimum wait of a slot
+# denial: rounding never turns into "granted" (0)
+_MIN_WAIT = 0.001
+
+
+def _redis_client(backend):
+    """Cliente Redis do backend de cache, se houver. / The cache backend's Redis client, if any."""
+
+    # django.core.cache.backends.redis.RedisCache
+    client_pool = getattr(backend, "_cache", None)
+    if hasattr(client_pool, "get_client"):
+        return client_pool.get_client(write=True)
+
+    # django_redis.cache.RedisCache
+    client = getattr(backend, "client", None)
+    if hasattr(client, "get_client"):
+        return client.get_client(write=True)
+
+    return None
+
+
+class TokenBucket:
+    """
+    Token bucket compartilhado entre workers via cache. / Token bucket shared across workers via the cache.
+
+    Uso / Usage::
+
+        if bucket.acquire():
+            call_api()
+        elif bucket.time_until_next_token() < 0.5:
+            ...  # esperar / wait
+        else:
+            ...  # degradar / degrade
+    """
+
+    def __init__(self, name: str, rate_per_minute: float, burst: int, backend=None):
+        self.name = name
+        self.rate_per_minute = rate_per_minute
+        self.burst = max(1, burst)
+        self.backend = backend if backend is not None else default_cache
+
+        # Segundos entre tokens e folga para o burst / Seconds between tokens and slack for the burst
+        self.emission_interval = 60 / rate_per_minute if rate_per_minute > 0 else math.inf
+        self.tolerance = self.emission_interval * self.burst
+
+        self._key = f"rate_limit_{name}_tat"
+        self._script = None
+        # Lock do processo só é exato com cache por processo / The process lock is only exact with a per-process cache
+        self._process_local = isinstance(
+            caches[DEFAULT_CACHE_ALIAS] if self.backend is default_cache else self.backend, LocMemCache
+        )
+        self.stats = {"allowed": 0, "throttled": 0}
+
+    def acquire(self, tokens: int = 1) -> bool:
+        """Consome ``tokens`` se disponíveis, sem esperar. / Takes ``tokens`` if available, without waiting."""
+
+        allowed = self._take(tokens, commit=True) == 0
+        self.stats["allowed" if allowed else "throttled"] += 1
+        return allowed
+
+    def time_until_next_token(self, tokens: int = 1) -> float:
+        """
+        Segundos até ``tokens`` ficarem disponíveis (0 se já estão); não consome. / Seconds until ``tokens`` are
+        available (0 if they already are); takes nothing.
+        """
+
+        return self._take(tokens, commit=False)
+
+    async def aacquire(self, tokens: int = 1) -> bool:
+        if self._process_local:
+            return self.acquire(tokens)
+        return await sync_to_async(self.acquire)(tokens)
+
+    async def atime_until_next_token(self, tokens: int = 1) -> float:
+        if self._process_local:
+            return self.time_until_next_token(tokens)
+        return await sync_to_async(self.time_until_next_token)(tokens)
+
+    def reset(self):
+        self.backend.delete(self._key)
+        if not self._process_local and math.isfinite(self.emission_interval):
+            current = math.floor(time.time() / self.emission_interval)
+            self.backend.delete_many([f"{self._key}:{slot}" for slot in range(current, current + self.burst)])
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "rate_per_minute": self.rate_per_minute,
+            "burst": self.burst,
+            "backend": "redis" if self._redis() is not None else "local" if self._process_local else "slots",
+            "time_until_next_token": round(self.time_until_next_token(), 3),
+        }
+
+    def _take(self, tokens: int, commit: bool) -> float:
+        if math.isinf(self.emission_interval):
+            return math.inf
+
+        client = self._redis()
+        if client is not None:
+            if self._script is None:
+                self._script = client.register_script(GCRA_SCRIPT)
+            key = self.backend.make_and_validate_key(self._key)
+            wait = self._script(keys=[key], args=[self.emission_interval, self.tolerance, tokens, int(commit)], client=client)
+            return max(0.0, float(wait))
+
+        if not self._process_local:
+            return self._take_slots(tokens, commit)
+
+        with _local_lock:
+            now = time.time()
+            tat = max(self.backend.get(self._key, now), now)
+            new_tat = tat + self.emission_interval * tokens
+            wait = new_tat - now - self.tolerance
+            if wait > 0:
+                return wait
+            if commit:
+                self.backend.set(self._key, new_tat, math.ceil(new_tat - now) + 1)
+            return 0.0
+
+    def _take_slots(self, tokens: int, commit: bool) -> float:
+        """
+        GCRA em slots para backends compartilhados sem script: o slot ``n`` cobre ``[n, n + 1)`` intervalos de
+        emissão e só pode ser ocupado enquanto estiver a menos de ``burst`` slots do atual. / Slotted GCRA for shared
+        backends without scripting: slot ``n`` covers ``[n, n + 1)`` emission intervals and can only be taken while
+        it is less than ``burst`` slots from the current one.
+        """
+
+        now = time.time()
+        current = math.floor(now / self.emission_interval)
+        keys = {slot: f"{self._key}:{slot}" for slot in range(current, current + self.burst)}
+
+        # Uma leitura para achar os candidatos; o ``add`` decide quem leva cada um / One read to find the
+        # candidates; ``add`` decides who gets each one
+        taken = self.backend.get_many(list(keys.values()))
+        free = [slot for slot, key in keys.items() if key not in taken]
+        if len(free) < tokens:
+            # Um slot novo entra na janela a cada intervalo / A new slot enters the window every interval
+            return max(_MIN_WAIT, (current + tokens - len(free)) * self.emission_interval - now)
+        if not commit:
+            return 0.0
+
+        timeout = math.ceil(self.emission_interval * (self.burst + 1)) + 1
+        claimed = []
+        for slot in free:
+            if self.backend.add(keys[slot], 1, timeout):
+                claimed.append(keys[slot])
+                if len(claimed) == tokens:
+                    return 0.0
+
+        # Outros workers levaram os slots livres: devolve os parciais / Other workers took the free slots: hand
+        # back the partial ones
+        if claimed:
+            self.backend.delete_many(claimed)
+        return max(_MIN_WAIT, (current + 1) * self.emission_interval - now)
+
+    def _redis(self) -> Optional[object]:
+        return _redis_client(self.backend)
+
+
+def _reset_lock_in_child():
+    global _local_lock
+    _local_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_lock_in_child)
@@ -0,0 +1,238 @@
+"""
+Refinamento em background de classificações provisórias / Background refinement of provisional classifications.
+
+Quando a API responde 503 (modelo carregando), as views de upload salvam o resultado heurístico com
+``processing_status="provisional"`` e agendam aqui uma nova classificação via API. Quando o modelo fica
+disponível, a linha de ``Email`` é atualizada no lugar. / When the API answers 503 (model loading), upload views
+save the heuristic result with ``processing_status="provisional"`` and schedule a new API classification here.
+Once the model is available, the ``Email`` row is updated in place.
+
+Os workers são threads do próprio processo (um pool por PID, recriado após ``fork``); refinamentos pendentes
+se perdem se o worker reiniciar, e a linha simplesmente fica com o rótulo provisório. / Workers are threads
+of the process itself (one pool per PID, recreated after ``fork``); pending refinements are lost if the worker
+restarts, and the row simply keeps its provisional label.
+
+As esperas (``estimated_time`` da Hugging Face e o backoff das novas tentativas) ficam numa fila com prazo: uma
+única thread entrega cada refinamento ao pool só quando ele vence, então nenhum worker do pool dorme. A fila tem
+no máximo ``AI_REFINE_MAX_PENDING`` refinamentos (agendados, na fila do pool ou rodando); além disso eles são
+descartados e a linha fica com o rótulo provisório. / Waits (Hugging Face's ``estimated_time`` and the retry
+backoff) live in a delayed queue: a single thread hands each refinement to the pool only when it is due, so no
+pool worker sleeps. The queue holds at most ``AI_REFINE_MAX_PENDING`` refinements (scheduled, queued in the pool
+or running); beyond that they are dropped and the row keeps its provisional label.
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .near_duplicates import email_text
+
+logger = logging.getLogger(__name__)
+
+PROVISIONAL = "provisional"
+COMPLETED = "completed"
+
+# ``Email.ai_model_used`` (``f"ai-{method}"``) das linhas classificadas pela API / ``Email.ai_model_used``
+# (``f"ai-{method}"``) of rows classified by the API
+API_MODELS_USED = ("ai-huggingface_api", "ai-huggingface_api_windows")
+# Rótulo corrigido por uma pessoa no admin / Label corrected by a person in the admin
+HUMAN_MODEL_USED = "human"
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_queue: Optional["DelayedQueue"] = None
+_lock = threading.Lock()
+
+# Contadores deste processo / Counters for this process
+stats = {"enqueued": 0, "refined": 0, "retried": 0, "gave_up": 0, "dropped": 0}
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor, _executor_pid
+
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        with _lock:
+            if _executor is None or _executor_pid != pid:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.AI_SETTINGS["AI_REFINE_WORKERS"], thread_name_prefix="ai-refine"
+                )
+                _executor_pid = pid
+    return _executor
+
+
+class DelayedQueue:
+    """
+    Fila de tarefas com prazo, limitada, que entrega cada uma ao pool quando vence. / Bounded delayed task queue
+    that hands each task to the pool when it is due.
+
+    Uso / Usage::
+
+        future = queue.submit(20, refine_classification, email_id, text)  # None se cheia / if full
+    """
+
+    def __init__(self, max_pending: int, executor: Callable[[], ThreadPoolExecutor] = get_executor):
+        self.max_pending = max_pending
+        self._executor = executor
+        self._heap: List[Tuple[float, int, Future, Callable, tuple]] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        # Agendadas + na fila do pool + rodando / Scheduled + queued in the pool + running
+        self.pending = 0
+
+    def submit(self, delay: float, fn: Callable, *args) -> Optional[Future]:
+        future: Future = Future()
+        with self._condition:
+            if self.pending >= self.max_pending:
+                return None
+            self.pending += 1
+            heapq.heappush(self._heap, (time.monotonic() + max(0.0, delay), next(self._sequence), future, fn, args))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch, name="ai-refine-timer", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return future
+
+    def _dispatch(self):
+        while True:
+            with self._condition:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    self._condition.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                _, _, future, fn, args = heapq.heappop(self._heap)
+            try:
+                self._executor().submit(self._run, future, fn, args)
+            except Exception as e:
+                # Pool encerrado (saída do processo) / Pool shut down (process exit)
+                self._finish(future, exception=e)
+
+    def _run(self, future: Future, fn: Callable, args: tuple):
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            self._finish(future, exception=e)
+        else:
+            self._finish(future, result=result)
+
+    def _finish(self, future: Future, result=None, exception: Optional[BaseException] = None):
+        with self._condition:
+            self.pending -= 1
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+
+def get_queue() -> DelayedQueue:
+    global _queue
+
+    if _queue is None:
+        with _lock:
+            if _queue is None:
+                _queue = DelayedQueue(settings.AI_SETTINGS["AI_REFINE_MAX_PENDING"])
+    return _queue
+
+
+def is_provisional(ai_result: Dict) -> bool:
+    """O resultado do ``AIClassificationService`` é provisório? / Is the ``AIClassificationService`` result provisional?"""
+
+    return bool(ai_result.get("processing_details", {}).get("provisional"))
+
+
+def enqueue_refinement(email_id: int, text: str, delay: float, attempt: int = 1) -> Optional[Future]:
+    """
+    Agenda a reclassificação de ``email_id`` após ``delay`` segundos; ``None`` se a fila está cheia. / Schedules
+    ``email_id`` reclassification after ``delay`` seconds; ``None`` if the queue is full.
+    """
+
+    future = get_queue().submit(delay, refine_classification, email_id, text, attempt)
+    if future is None:
+        stats["dropped"] += 1
+        logger.warning(f"Fila de refinamento cheia; email {email_id} fica com o rótulo provisório")
+        return None
+
+    stats["enqueued"] += 1
+    logger.info(f"Refinamento do email {email_id} agendado em {delay:.0f}s (tentativa {attempt})")
+    return future
+
+
+def refine_later(email_id: int, subject: str, content: str, refine_after: float) -> Optional[Future]:
+    """Agenda o refinamento com o mesmo texto usado por ``classify_email_ai``. / Schedules refinement with the same text ``classify_email_ai`` uses."""
+
+    return enqueue_refinement(email_id, email_text(subject, content), refine_after)
+
+
+def refine_classification(email_id: int, text: str, attempt: int = 1) -> bool:
+    """
+    Reclassifica via API e atualiza a linha se ela ainda for provisória. / Reclassifies via the API and updates
+    the row if it is still provisional.
+
+    Returns:
+        bool: ``True`` se a linha foi atualizada com o resultado da API / ``True`` if the row got the API result
+    """
+
+    from .ai_service import get_ai_service
+    from .deadline import TIER_API
+    from .models import Email
+
+    close_old_connections()
+    try:
+        service = get_ai_service()
+        result = service.classify_email_text(text)
+
+        if result["processing_details"].get("tier") != TIER_API:
+            if attempt < settings.AI_SETTINGS["AI_REFINE_MAX_ATTEMPTS"]:
+                stats["retried"] += 1
+                enqueue_refinement(email_id, text, settings.AI_SETTINGS["AI_REFINE_DEFAULT_DELAY"] * 2**attempt, attempt + 1)
+            else:
+                # Mantém o rótulo heurístico como definitivo / Keep the heuristic label as final
+                stats["gave_up"] += 1
+                Email.objects.filter(pk=email_id, processing_status=PROVISIONAL).update(
+                    processing_status=COMPLETED, updated_at=timezone.now()
+                )
+                logger.warning(f"Refinamento do email {email_id} desistiu após {attempt} tentativas")
+            return False
+
+        response = service.generate_response(text, result["classification"])
+        updated = Email.objects.filter(pk=email_id, processing_status=PROVISIONAL).update(
+            classification_result=result["classification"],
+            confidence_score=result["confidence"],
+            suggested_response=response["suggested_response"],
+            ai_model_used=f"ai-{result['processing_details']['method']}",
+            processing_status=COMPLETED,
+            classified_at=timezone.now(),
+            # ``update`` não aciona ``auto_now``; o treino incremental depende dele / ``update`` skips ``auto_now``;
+            # incremental training depends on it
+            updated_at=timezone.now(),
+        )
+        stats["refined"] += updated
+        logger.info(f"Email {email_id} refinado: {result['classification']} ({result['confidence']:.2f})")
+        return bool(updated)
+
+    except Exception as e:
+        logger.error(f"Erro no refinamento do email {email_id}: {str(e)}")
+        return False
+    finally:
+        close_old_connections()
+
+
+def _forget_executor_in_child():
+    global _executor, _executor_pid, _queue, _lock
+    _executor = None
+    _executor_pid = None
+    # A thread da fila não existe no filho / The queue's thread does not exist in the child
+    _queue = None
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_executor_in_child)
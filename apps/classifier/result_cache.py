@@ -0,0 +1,195 @@
+"""
+Cache de resultados em dois níveis / Two-tier result cache.
+
+L1: LRU em memória do processo, com limite de entradas e TTL curto. L2: o cache do Django (Redis em produção),
+compartilhado entre workers. Leituras consultam o L1 e, em um miss, o L2, copiando o valor para o L1
+(read-through). Escritas vão para os dois (write-through). Emails repetidos em sequência (newsletters,
+notificações) são atendidos sem sair do worker. / L1: in-process LRU with an entry limit and a short TTL. L2:
+the Django cache (Redis in production), shared across workers. Reads check L1 and, on a miss, L2, copying the
+value into L1 (read-through). Writes go to both (write-through). Hot repeated emails (newsletters,
+notifications) are served without leaving the worker.
+
+Como no LocMemCache (que serializa os valores), o L1 guarda e devolve cópias, então quem chama pode
+alterar o resultado sem afetar o cache. / As with LocMemCache (which pickles values), L1 stores and returns
+copies, so callers may mutate the result without affecting the cache.
+
+O TTL do L1 limita por quanto tempo um worker pode servir um valor que outro worker já sobrescreveu no L2.
+/ The L1 TTL bounds how long a worker may serve a value another worker has already overwritten in L2.
+"""
+
+import copy
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+from django.core.cache import cache as default_cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+# Distingue "não encontrado" de um valor ``None`` guardado / Tells "not found" apart from a stored ``None``
+MISSING = object()
+
+# Instâncias vivas, para trocar o lock no filho após ``fork`` / Live instances, to replace the lock in the child
+# after ``fork``
+_caches: "weakref.WeakSet" = weakref.WeakSet()
+
+
+class LRUCache:
+    """LRU com TTL, limitado a ``max_entries``, seguro entre threads. / Thread-safe LRU with TTL, bounded to ``max_entries``."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        _caches.add(self)
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return MISSING
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self.stats["hits"] += 1
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        if self.max_entries <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._data[key] = (copy.deepcopy(value), time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_stats(self) -> Dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hit_rate": self.stats["hits"] / max(1, lookups),
+        }
+
+
+class TieredCache:
+    """
+    L1 em processo na frente do cache do Django, com a interface usada pelo AI service. / In-process L1 in front
+    of the Django cache, with the interface the AI service uses.
+    """
+
+    def __init__(self, l1: LRUCache, l2=None):
+        self.l1 = l1
+        self.l2 = l2 if l2 is not None else default_cache
+        self.stats = {"l2_hits": 0, "l2_misses": 0}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.l1.get(key)
+        if value is not MISSING:
+            return value
+
+        value = self.l2.get(key, MISSING)
+        if value is MISSING:
+            self.stats["l2_misses"] += 1
+            return default
+        self.stats["l2_hits"] += 1
+        self.l1.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any, timeout=DEFAULT_TIMEOUT):
+        self.l2.set(key, value, timeout)
+        self.l1.set(key, value, _l1_ttl(timeout))
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        found, l2_keys = {}, []
+        for key in keys:
+            value = self.l1.get(key)
+            if value is MISSING:
+                l2_keys.append(key)
+            else:
+                found[key] = value
+
+        if l2_keys:
+            # Uma ida ao L2 para todos os misses do L1 / One L2 round trip for every L1 miss
+            from_l2 = self.l2.get_many(l2_keys)
+            self.stats["l2_hits"] += len(from_l2)
+            self.stats["l2_misses"] += len(l2_keys) - len(from_l2)
+            for key, value in from_l2.items():
+                self.l1.set(key, value)
+            found.update(from_l2)
+        return found
+
+    def set_many(self, data: Dict[str, Any], timeout=DEFAULT_TIMEOUT):
+        self.l2.set_many(data, timeout)
+        for key, value in data.items():
+            self.l1.set(key, value, _l1_ttl(timeout))
+
+    async def aget(self, key: str, default: Any = None) -> Any:
+        value = self.l1.get(key)
+        if value is not MISSING:
+            return value
+
+        value = await self.l2.aget(key, MISSING)
+        if value is MISSING:
+            self.stats["l2_misses"] += 1
+            return default
+        self.stats["l2_hits"] += 1
+        self.l1.set(key, value)
+        return value
+
+    async def aset(self, key: str, value: Any, timeout=DEFAULT_TIMEOUT):
+        await self.l2.aset(key, value, timeout)
+        self.l1.set(key, value, _l1_ttl(timeout))
+
+    def delete(self, key: str):
+        self.l2.delete(key)
+        self.l1.delete(key)
+
+    def get_stats(self) -> Dict:
+        l1_stats = self.l1.get_stats()
+        return {
+            "l1": l1_stats,
+            "l2_hits": self.stats["l2_hits"],
+            "l2_misses": self.stats["l2_misses"],
+            # Fração das leituras que não saiu do worker / Share of reads that never left the worker
+            "l1_hit_rate": l1_stats["hit_rate"],
+        }
+
+
+def _l1_ttl(timeout) -> Optional[float]:
+    """TTL do L1 para um timeout do Django (padrão/``None`` → TTL do L1). / L1 TTL for a Django timeout."""
+
+    return timeout if isinstance(timeout, (int, float)) else None
+
+
+def _reset_locks_in_child():
+    for lru in list(_caches):
+        lru._lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_locks_in_child)
@@ -1,8 +1,11 @@
 """Serviços para classificações dos emails / Email classifications services"""
 
 import time
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from .deadline import TIER_HEURISTIC, Deadline
+from .lexicon import BASIC_LEXICON
 from .models import Classification
+from .near_duplicates import email_text
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,36 +24,9 @@ def classify_email_basic(email_content: str) -> Dict[str, Any]:
     # Simulação do tempo de processamento / Simulating processing time
     start_time = time.time()
 
-    productive_keywords = [
-        "reunião",
-        "projeto",
-        "deadline",
-        "importante",
-        "urgente",
-        "meeting",
-        "project",
-        "urgent",
-        "important",
-        "deadline",
-        "prazo",
-        "tarefa",
-        "entrega",
-        "proposta",
-        "contrato",
-        "documento",
-        "relatório",
-        "report",
-        "task",
-        "delivery",
-        "document",
-        "proposal",
-        "contract",
-        "follow-up",
-    ]
-
-    # Análise simpole baseada em palavras-chave / Simple keyword-based analysis
+    # Análise simples baseada no léxico compartilhado / Simple analysis based on the shared lexicon
     content_lower = email_content.lower()
-    productive_matches = sum(1 for keyword in productive_keywords if keyword in content_lower)
+    productive_matches = BASIC_LEXICON.count(content_lower)["productive"]
 
     # Determinar classificação baseada em matches / Determine classification based on matches
     if productive_matches >= 2:
@@ -76,6 +52,7 @@ def classify_email_basic(email_content: str) -> Dict[str, Any]:
         "model_used": "basic-keyword-classifier-v1.0",
         "processing_time": processing_time,
         "keywords_found": productive_matches,
+        "tier": TIER_HEURISTIC,
     }
 
 
@@ -112,7 +89,7 @@ def process_classification_async(email_data: Dict[str, Any]) -> Dict[str, Any]:
     except Exception as e:
         logger.error(f"Erro no processamento assíncrono: {str(e)}")
         # Fallback completo / Full fallback
-        basic_result = classify_email_basic(subject, content)
+        basic_result = classify_email_basic(email_text(subject, content))
         return {
             "success": False,
             "classification": basic_result["category"],
@@ -122,13 +99,17 @@ def process_classification_async(email_data: Dict[str, Any]) -> Dict[str, Any]:
         }
 
 
-def classify_email_ai(subject: str, content: str) -> Dict[str, Any]:
+def classify_email_ai(
+    subject: str, content: str, deadline: Optional[Deadline] = None, provisional: bool = False
+) -> Dict[str, Any]:
     """
     Classificação avançada de email usando IA. / Advanced email classification using AI.
 
     Args:
         subject (str): Assunto do email / Email subject
         content (str): Conteúdo do email / Email content
+        deadline (Deadline): Orçamento de tempo da requisição / Request time budget
+        provisional (bool): Não esperar o modelo carregar (503) / Do not wait for the model to load (503)
     Returns:
         Dict[str, Any]: Resultado da classificação com IA / AI classification result
     """
@@ -138,36 +119,75 @@ def classify_email_ai(subject: str, content: str) -> Dict[str, Any]:
     start_time = time.time()
 
     # Combinar subject + content para análise completa / Combine subject + content for full analysis
-    full_text = f"{subject}\n\n{content}" if subject else content
+    full_text = email_text(subject, content)
 
     try:
         # Obter classificação IA / Get AI classification
-        ai_result = ai_service.classify_email_text(full_text)
+        ai_result = ai_service.classify_email_text(full_text, deadline=deadline, provisional=provisional)
 
         # Gerar resposta automática /  Generate automatic response
-        response_result = ai_service.generate_response(full_text, ai_result["classification"])
+        response_result = ai_service.generate_response(full_text, ai_result["classification"], deadline=deadline)
 
-        processing_time = time.time() - start_time
-
-        # Combinar resultados no formato esperado pela API / Combine results in expected API format
-        return {
-            "category": ai_result["classification"],
-            "confidence": ai_result["confidence"],
-            "suggested_response": response_result["suggested_response"],
-            "response_confidence": response_result["confidence"],
-            "processing_time": round(processing_time, 3),
-            "model_used": f"ai-{ai_result['processing_details']['method']}",
-            "ai_details": {
-                "classification_method": ai_result["processing_details"]["method"],
-                "model_used": ai_result["processing_details"].get("model_used", "heuristic"),
-                "context_detected": response_result["generation_details"]["context_used"],
-                "keywords_found": ai_result["processing_details"].get("productive_keywords", 0),
-                "confidence_boost": ai_result["processing_details"].get("consensus_boost", False),
-                "processed_at": ai_result["processing_details"]["processed_at"],
-            },
-        }
+        return _build_ai_result(ai_result, response_result, start_time)
 
     except Exception as e:
         logger.error(f"Erro na classificação AI: {str(e)}")
         # Fallback para classificação básica / Fallback to basic classification
-        return classify_email_basic(subject, content)
+        return classify_email_basic(full_text)
+
+
+async def aclassify_email_ai(
+    subject: str, content: str, deadline: Optional[Deadline] = None, provisional: bool = False
+) -> Dict[str, Any]:
+    """
+    Versão assíncrona de ``classify_email_ai`` para views ASGI. / Async version of ``classify_email_ai`` for ASGI views.
+
+    Args:
+        subject (str): Assunto do email / Email subject
+        content (str): Conteúdo do email / Email content
+        deadline (Deadline): Orçamento de tempo da requisição / Request time budget
+        provisional (bool): Não esperar o modelo carregar (503) / Do not wait for the model to load (503)
+    Returns:
+        Dict[str, Any]: Resultado da classificação com IA / AI classification result
+    """
+    from .ai_service import ai_service
+
+    start_time = time.time()
+
+    full_text = email_text(subject, content)
+
+    try:
+        ai_result = await ai_service.aclassify_email_text(full_text, deadline=deadline, provisional=provisional)
+        response_result = await ai_service.agenerate_response(full_text, ai_result["classification"], deadline=deadline)
+
+        return _build_ai_result(ai_result, response_result, start_time)
+
+    except Exception as e:
+        logger.error(f"Erro na classificação AI assíncrona: {str(e)}")
+        return classify_email_basic(full_text)
+
+
+def _build_ai_result(ai_result: Dict[str, Any], response_result: Dict[str, Any], start_time: float) -> Dict[str, Any]:
+    """Combina classificação e resposta no formato esperado pela API. / Combines classification and response in the API format."""
+
+    processing_time = time.time() - start_time
+
+    return {
+        "category": ai_result["classification"],
+        "confidence": ai_result["confidence"],
+        "suggested_response": response_result["suggested_response"],
+        "response_confidence": response_result["confidence"],
+        "processing_time": round(processing_time, 3),
+        "model_used": f"ai-{ai_result['processing_details']['method']}",
+        "tier": ai_result["processing_details"].get("tier"),
+        "provisional": ai_result["processing_details"].get("provisional", False),
+        "refine_after": ai_result["processing_details"].get("refine_after"),
+        "ai_details": {
+            "classification_method": ai_result["processing_details"]["method"],
+            "model_used": ai_result["processing_details"].get("model_used", "heuristic"),
+            "context_detected": response_result["generation_details"]["context_used"],
+            "keywords_found": ai_result["processing_details"].get("productive_keywords", 0),
+            "confidence_boost": ai_result["processing_details"].get("consensus_boost", False),
+            "processed_at": ai_result["processing_details"]["processed_at"],
+        },
+    }
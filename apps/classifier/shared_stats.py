@@ -0,0 +1,184 @@
+"""
+Contadores compartilhados entre workers / Counters shared across workers.
+
+Um dict por processo some com o worker (o gunicorn recicla workers a cada ``max_requests``) e mostra só uma fração
+do tráfego. Aqui cada processo acumula incrementos localmente e, no máximo a cada ``flush_interval`` segundos, os
+soma no cache com ``cache.incr`` (atômico no Redis e no LocMem), uma operação por contador. / A per-process dict
+dies with the worker (gunicorn recycles workers every ``max_requests``) and only shows a slice of the traffic.
+Here each process accumulates increments locally and, at most every ``flush_interval`` seconds, adds them to the
+cache with ``cache.incr`` (atomic on Redis and LocMem), one operation per counter.
+
+Dentro de um event loop, o flush vira uma tarefa com a API assíncrona do cache (``aadd``/``aincr``) em vez de
+bloquear o loop com I/O de rede. / Inside an event loop, the flush becomes a task using the cache's async API
+(``aadd``/``aincr``) instead of blocking the loop with network I/O.
+
+Os totais lidos incluem o que este processo ainda não enviou; o que outros workers ainda não enviaram aparece no
+próximo flush deles. / Totals include what this process has not flushed yet; what other workers have not
+flushed shows up on their next flush.
+"""
+
+import asyncio
+import atexit
+import logging
+import os
+import threading
+import time
+import weakref
+from typing import Dict, Iterable
+
+from django.core.cache import cache as default_cache
+
+logger = logging.getLogger(__name__)
+
+# Instâncias vivas, para o flush na saída e a limpeza após ``fork`` / Live instances, for the flush at exit and
+# the cleanup after ``fork``
+_counters: "weakref.WeakSet" = weakref.WeakSet()
+
+
+class SharedCounters:
+    """
+    Contadores com incrementos em lote para o cache. / Counters with batched increments to the cache.
+
+    Uso / Usage::
+
+        counters = SharedCounters("ai_service", ["api_calls", "errors"])
+        counters.incr("api_calls")
+        counters.totals()  # {"api_calls": ..., "errors": ...} de todos os workers / across all workers
+    """
+
+    def __init__(self, name: str, fields: Iterable[str], flush_interval: float = 5.0, backend=None):
+        self.name = name
+        self.fields = list(fields)
+        self.flush_interval = flush_interval
+        self.backend = backend if backend is not None else default_cache
+
+        self._pending = dict.fromkeys(self.fields, 0)
+        # Totais deste processo desde o início / This process's totals since start
+        self._local = dict.fromkeys(self.fields, 0)
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self.flushes = 0
+        # Tarefas de flush em andamento, para não serem coletadas / Running flush tasks, so they are not collected
+        self._tasks = set()
+        _counters.add(self)
+
+    def incr(self, field: str, amount: int = 1):
+        if not amount:
+            return
+        with self._lock:
+            self._pending[field] += amount
+            self._local[field] += amount
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if not due:
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+        else:
+            task = loop.create_task(self.aflush())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def flush(self):
+        """Envia os incrementos pendentes ao cache. / Sends pending increments to the cache."""
+
+        for field, amount in self._take_pending().items():
+            key = self._key(field)
+            try:
+                # ``add`` só cria se não existir; o ``incr`` em si é atômico / ``add`` only creates if missing;
+                # ``incr`` itself is atomic
+                self.backend.add(key, 0, None)
+                self.backend.incr(key, amount)
+            except Exception as e:
+                # Cache fora do ar: devolve para o próximo flush / Cache down: hand back to the next flush
+                logger.warning(f"Flush de estatísticas falhou: {str(e)}")
+                self._hand_back(field, amount)
+        self.flushes += 1
+
+    async def aflush(self):
+        """Versão assíncrona de ``flush``. / Async version of ``flush``."""
+
+        remaining = self._take_pending()
+        try:
+            for field, amount in list(remaining.items()):
+                try:
+                    await self.backend.aadd(self._key(field), 0, None)
+                    await self.backend.aincr(self._key(field), amount)
+                except Exception as e:
+                    logger.warning(f"Flush de estatísticas falhou: {str(e)}")
+                    self._hand_back(field, amount)
+                del remaining[field]
+        except asyncio.CancelledError:
+            # Loop encerrando: o que não foi enviado fica para o próximo flush / Loop shutting down: whatever was not
+            # sent is left for the next flush
+            for field, amount in remaining.items():
+                self._hand_back(field, amount)
+            raise
+        self.flushes += 1
+
+    def _take_pending(self) -> Dict[str, int]:
+        with self._lock:
+            pending = {field: amount for field, amount in self._pending.items() if amount}
+            self._pending = dict.fromkeys(self.fields, 0)
+            self._last_flush = time.monotonic()
+        return pending
+
+    def _hand_back(self, field: str, amount: int):
+        with self._lock:
+            self._pending[field] += amount
+
+    def totals(self) -> Dict[str, int]:
+        """Totais de todos os workers. / Totals across all workers."""
+
+        keys = {self._key(field): field for field in self.fields}
+        try:
+            shared = self.backend.get_many(list(keys))
+        except Exception as e:
+            logger.warning(f"Leitura de estatísticas compartilhadas falhou: {str(e)}")
+            shared = {}
+
+        with self._lock:
+            return {field: shared.get(key, 0) + self._pending[field] for key, field in keys.items()}
+
+    def local(self) -> Dict[str, int]:
+        """Totais deste processo. / This process's totals."""
+
+        with self._lock:
+            return dict(self._local)
+
+    def reset(self):
+        with self._lock:
+            self._pending = dict.fromkeys(self.fields, 0)
+            self._local = dict.fromkeys(self.fields, 0)
+        self.backend.delete_many([self._key(field) for field in self.fields])
+
+    def _key(self, field: str) -> str:
+        return f"stats_{self.name}_{field}"
+
+
+def flush_all():
+    """Envia o pendente de todos os contadores do processo. / Flushes every counter in the process."""
+
+    for counters in list(_counters):
+        try:
+            counters.flush()
+        except Exception:
+            pass
+
+
+def _reset_in_child():
+    # O pendente herdado ainda será enviado pelo pai / Inherited pending counts will still be sent by the parent
+    for counters in list(_counters):
+        counters._lock = threading.Lock()
+        counters._tasks = set()
+        counters._pending = dict.fromkeys(counters.fields, 0)
+        counters._local = dict.fromkeys(counters.fields, 0)
+        counters._last_flush = time.monotonic()
+
+
+atexit.register(flush_all)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_in_child)
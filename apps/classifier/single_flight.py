@@ -0,0 +1,211 @@
+"""
+Coalescência de requisições idênticas em voo (single-flight) / Single-flight coalescing of identical in-flight requests.
+
+Um email em massa chega a muitas caixas ao mesmo tempo e todas as cópias erram o cache juntas. Aqui só a
+primeira requisição de cada chave (o líder) calcula o resultado; as demais esperam por ele. / A mass email lands
+in many mailboxes at once and every copy misses the cache together. Here only the first request for each key
+(the leader) computes the result; the rest wait for it.
+
+- No processo: um ``Future`` por chave; threads (ou tasks, na versão assíncrona) que chegam depois esperam por
+  ele. / In-process: one ``Future`` per key; threads (or tasks, in the async version) that arrive later wait on
+  it.
+- Entre workers: o líder pega um lock curto no cache com ``cache.add`` (atômico). Quem não consegue consulta o
+  cache de resultados até o valor aparecer ou o lock sumir; nesse caso calcula por conta própria. / Across
+  workers: the leader takes a short-lived cache lock with ``cache.add`` (atomic). Whoever fails to get it polls
+  the result cache until the value shows up or the lock goes away, and then computes on its own.
+
+Esperas são limitadas por ``timeout``: quem esperou demais calcula por conta própria em vez de falhar. / Waits
+are bounded by ``timeout``: a waiter that waited too long computes on its own instead of failing.
+"""
+
+import asyncio
+import copy
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from django.core.cache import cache
+
+# Instâncias vivas, para limpar o estado no filho após ``fork`` / Live instances, to clear state in the child after
+# ``fork``
+_flights: "weakref.WeakSet" = weakref.WeakSet()
+
+
+class SingleFlight:
+    """
+    Executa no máximo um cálculo por chave ao mesmo tempo. / Runs at most one computation per key at a time.
+
+    Uso / Usage::
+
+        result = flight.do(key, compute, lookup=lambda: result_cache.get(key), timeout=10)
+    """
+
+    def __init__(self, enabled: bool = True, lock_timeout: float = 30, poll_interval: float = 0.05):
+        self.enabled = enabled
+        # Vida máxima do lock entre workers, caso o líder morra / Max life of the cross-worker lock, should the
+        # leader die
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+
+        self._inflight: Dict[str, Future] = {}
+        self._ainflight: Dict[tuple, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"leaders": 0, "waiters": 0, "remote_waiters": 0, "remote_hits": 0, "wait_timeouts": 0}
+        _flights.add(self)
+
+    def do(self, key: str, compute: Callable[[], Any], lookup: Optional[Callable[[], Any]] = None, timeout: float = 30):
+        """
+        Resultado de ``compute`` para ``key``, calculado uma vez entre os chamadores concorrentes. / Result of
+        ``compute`` for ``key``, computed once among concurrent callers.
+
+        ``lookup`` consulta o cache de resultados (retorna ``None`` no miss) enquanto outro worker calcula.
+        / ``lookup`` checks the result cache (returns ``None`` on a miss) while another worker computes.
+        """
+
+        if not self.enabled:
+            return compute()
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.stats["leaders"] += 1
+            else:
+                self.stats["waiters"] += 1
+
+        if not leader:
+            try:
+                # Cópia: o líder e cada espera recebem objetos independentes / Copy: the leader and every waiter
+                # get independent objects
+                return copy.deepcopy(future.result(timeout=timeout))
+            except FutureTimeoutError:
+                self.stats["wait_timeouts"] += 1
+                return compute()
+
+        try:
+            result = self._run_leader(key, compute, lookup, timeout)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def ado(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        lookup: Optional[Callable[[], Awaitable[Any]]] = None,
+        timeout: float = 30,
+    ):
+        """Versão assíncrona de ``do``. / Async version of ``do``."""
+
+        if not self.enabled:
+            return await compute()
+
+        # Futures do asyncio pertencem a um event loop / asyncio futures belong to one event loop
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        future = self._ainflight.get(flight_key)
+
+        if future is not None:
+            self.stats["waiters"] += 1
+            try:
+                return copy.deepcopy(await asyncio.wait_for(asyncio.shield(future), timeout))
+            except asyncio.TimeoutError:
+                self.stats["wait_timeouts"] += 1
+                return await compute()
+
+        future = self._ainflight[flight_key] = loop.create_future()
+        self.stats["leaders"] += 1
+        try:
+            result = await self._arun_leader(key, compute, lookup, timeout)
+        except BaseException as e:
+            future.set_exception(e)
+            # Evita "exception was never retrieved" quando ninguém esperou / Avoids "exception was never
+            # retrieved" when nobody waited
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._ainflight.pop(flight_key, None)
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "inflight": len(self._inflight) + len(self._ainflight),
+            # Requisições que não chamaram o backend / Requests that did not call the backend
+            "coalesced": self.stats["waiters"] + self.stats["remote_hits"],
+        }
+
+    def _run_leader(self, key: str, compute, lookup, timeout: float):
+        lock_key, token = self._lock_key(key), f"{os.getpid()}:{threading.get_ident()}"
+
+        if lookup is not None and not cache.add(lock_key, token, self.lock_timeout):
+            # Outro worker já está calculando / Another worker is already computing
+            self.stats["remote_waiters"] += 1
+            expires_at = time.monotonic() + timeout
+            while time.monotonic() < expires_at:
+                time.sleep(self.poll_interval)
+                result = lookup()
+                if result:
+                    self.stats["remote_hits"] += 1
+                    return result
+                if cache.get(lock_key) is None:
+                    break
+            return compute()
+
+        try:
+            return compute()
+        finally:
+            if lookup is not None and cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+    async def _arun_leader(self, key: str, compute, lookup, timeout: float):
+        lock_key, token = self._lock_key(key), f"{os.getpid()}:{id(asyncio.current_task())}"
+
+        if lookup is not None and not await cache.aadd(lock_key, token, self.lock_timeout):
+            self.stats["remote_waiters"] += 1
+            expires_at = time.monotonic() + timeout
+            while time.monotonic() < expires_at:
+                await asyncio.sleep(self.poll_interval)
+                result = await lookup()
+                if result:
+                    self.stats["remote_hits"] += 1
+                    return result
+                if await cache.aget(lock_key) is None:
+                    break
+            return await compute()
+
+        try:
+            return await compute()
+        finally:
+            if lookup is not None and await cache.aget(lock_key) == token:
+                await cache.adelete(lock_key)
+
+    @staticmethod
+    def _lock_key(key: str) -> str:
+        return f"{key}:inflight"
+
+
+def _reset_in_child():
+    # Os líderes em voo no pai não existem no filho / The parent's in-flight leaders do not exist in the child
+    for flight in list(_flights):
+        flight._lock = threading.Lock()
+        flight._inflight = {}
+        flight._ainflight = {}
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_in_child)
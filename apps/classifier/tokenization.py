@@ -0,0 +1,149 @@
+"""
+Truncamento e janelas por tokens / Token-aware truncation and windowing.
+
+Os modelos de classificação aceitam até 512 tokens. Cortar em um número fixo de caracteres desperdiça a janela
+em emails curtos e corta emails longos cedo demais. Aqui o texto é medido em tokens de verdade: com o tokenizer
+do modelo (``transformers``, se instalado) ou, sem ele, com uma estimativa conservadora. / Classification models
+take up to 512 tokens. Cutting at a fixed number of characters wastes the window on short emails and cuts long
+ones too early. Here text is measured in real tokens: with the model's tokenizer (``transformers``, if installed)
+or, without it, with a conservative estimate.
+
+A estimativa é o padrão. Com ``AI_TOKENIZER="local"``, o tokenizer real é lido só de arquivos locais
+(``AI_TOKENIZER_PATH`` ou o cache da Hugging Face, ``local_files_only=True``) e só no warm-up (master antes do
+fork ou thread de warm-up do worker): uma requisição nunca importa ``transformers`` nem faz download, e usa a
+estimativa até o tokenizer estar carregado. / The estimate is the default. With ``AI_TOKENIZER="local"``, the
+real tokenizer is read only from local files (``AI_TOKENIZER_PATH`` or the Hugging Face cache,
+``local_files_only=True``) and only during warm-up (master before fork or the worker's warm-up thread): a
+request never imports ``transformers`` nor downloads anything, and uses the estimate until the tokenizer is
+loaded.
+
+As duas formas devolvem os offsets de caractere de cada token, então truncar e dividir em janelas é uma única
+passada linear no texto. / Both return each token's character offsets, so truncating and windowing is a single
+linear pass over the text.
+"""
+
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+
+from .local_engines import TRANSFORMERS_AVAILABLE
+
+logger = logging.getLogger(__name__)
+
+TOKENIZER_APPROXIMATE = "approximate"
+TOKENIZER_LOCAL = "local"
+
+# Estimativa sem tokenizer: pontuação vale um token e palavras um token a cada 4 caracteres (BPE/WordPiece
+# raramente produz pedaços menores em média) / Estimate without a tokenizer: punctuation is one token and words
+# one token per 4 characters (BPE/WordPiece rarely yields smaller pieces on average)
+APPROX_CHARS_PER_TOKEN = 4
+_APPROX_TOKEN_RE = re.compile(r"\w{1,%d}|[^\w\s]" % APPROX_CHARS_PER_TOKEN)
+
+Span = Tuple[int, int]
+
+
+# Tokenizers carregados no warm-up, por modelo (``None``: indisponível) / Tokenizers loaded during warm-up, per
+# model (``None``: unavailable)
+_tokenizers: Dict[str, object] = {}
+_load_lock = threading.Lock()
+
+
+def load_tokenizer(model_name: str):
+    """
+    Carrega o tokenizer rápido de ``model_name`` de arquivos locais; só para o warm-up. / Loads the fast tokenizer
+    for ``model_name`` from local files; warm-up only.
+
+    Returns:
+        O tokenizer, ou ``None`` para usar a estimativa / The tokenizer, or ``None`` to use the estimate
+    """
+
+    if settings.AI_SETTINGS["AI_TOKENIZER"] != TOKENIZER_LOCAL or not TRANSFORMERS_AVAILABLE:
+        return None
+
+    with _load_lock:
+        if model_name in _tokenizers:
+            return _tokenizers[model_name]
+
+        source = settings.AI_SETTINGS["AI_TOKENIZER_PATH"] or model_name
+        try:
+            from transformers import AutoTokenizer
+
+            tokenizer = AutoTokenizer.from_pretrained(source, use_fast=True, local_files_only=True)
+        except Exception as e:
+            logger.warning(f"Tokenizer de {source} indisponível localmente, usando estimativa: {str(e)}")
+            tokenizer = None
+
+        # Offsets só existem nos tokenizers rápidos / Offsets only exist on fast tokenizers
+        _tokenizers[model_name] = tokenizer if getattr(tokenizer, "is_fast", False) else None
+        return _tokenizers[model_name]
+
+
+def get_tokenizer(model_name: str):
+    """
+    Tokenizer já carregado de ``model_name`` ou ``None`` para usar a estimativa; nunca carrega. / Already loaded
+    tokenizer for ``model_name``, or ``None`` to use the estimate; never loads.
+    """
+
+    return _tokenizers.get(model_name)
+
+
+def token_spans(text: str, model_name: str) -> List[Span]:
+    """Offsets ``(início, fim)`` de cada token, sem tokens especiais. / ``(start, end)`` offsets of each token."""
+
+    tokenizer = get_tokenizer(model_name)
+    if tokenizer is None:
+        return [match.span() for match in _APPROX_TOKEN_RE.finditer(text)]
+
+    encoded = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+    return [span for span in encoded["offset_mapping"] if span[1] > span[0]]
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model_name: str) -> Tuple[str, int]:
+    """
+    Maior prefixo de ``text`` com até ``max_tokens`` tokens. / Longest prefix of ``text`` with at most
+    ``max_tokens`` tokens.
+
+    Returns:
+        Tuple[str, int]: texto e número de tokens do texto original / text and the original text's token count
+    """
+
+    spans = token_spans(text, model_name)
+    if len(spans) <= max_tokens:
+        return text, len(spans)
+    return text[: spans[max_tokens - 1][1]], len(spans)
+
+
+def token_windows(text: str, window: int, overlap: int, max_windows: int, model_name: str) -> List[str]:
+    """
+    Divide ``text`` em janelas de ``window`` tokens com ``overlap`` tokens em comum. / Splits ``text`` into
+    ``window``-token windows sharing ``overlap`` tokens.
+
+    No máximo ``max_windows`` janelas, então o custo por email é limitado. / At most ``max_windows`` windows, so
+    the cost per email is bounded.
+    """
+
+    spans = token_spans(text, model_name)
+    if len(spans) <= window:
+        return [text]
+
+    step = max(1, window - overlap)
+    windows = []
+    for start in range(0, len(spans), step):
+        end = min(start + window, len(spans))
+        windows.append(text[spans[start][0] : spans[end - 1][1]])
+        if end == len(spans) or len(windows) == max_windows:
+            break
+    return windows
+
+
+def _reset_lock_in_child():
+    global _load_lock
+    _load_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_lock_in_child)
@@ -4,6 +4,7 @@ URLs para o aplicativo de classificação
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import ClassificationViewSet, dashboard_data_api, dashboard_stats_api
+from .async_views import classify_email_async_api
 
 # Router para ViewSets
 router = DefaultRouter()
@@ -18,4 +19,7 @@ urlpatterns = [
     # Endpoints da API Dashboard
     path("dashboard-data/", dashboard_data_api, name="dashboard_data"),
     path("dashboard-stats/", dashboard_stats_api, name="dashboard_stats"),
+
+    # Endpoints assíncronos (ASGI)
+    path("async/classify/", classify_email_async_api, name="classify_async_api"),
 ]
@@ -14,12 +14,16 @@ from django.utils import timezone
 from django.http import JsonResponse
 from django.utils import timezone
 from django.db.models import Count, Q
+from django.conf import settings
 
 from .models import Classification
 from .serializers import ClassificationSerializer, EmailClassificationSerializer
 from .services import process_classification_async
 from .services import classify_email_ai, process_classification_async
 from .direct_ai import classify_email_direct
+from .deadline import Deadline
+from .metrics import STAGE_LATENCY
+from .refinement import COMPLETED, PROVISIONAL, refine_later
 
 from datetime import datetime, timedelta
 
@@ -412,11 +416,15 @@ class ClassificationViewSet(viewsets.ModelViewSet):
         if serializer.is_valid():
             subject = serializer.validated_data.get("subject", "")
             content = serializer.validated_data.get("content", "")
+            # Orçamento de tempo da requisição / Request time budget
+            deadline = Deadline.from_request(request)
 
             try:
                 logger.info(f"🔍 Iniciando classificação: subject='{subject}', content='{content[:50]}...'")
                 # Usar nova função com IA / Use new function with AI
-                result = classify_email_ai(subject, content)
+                result = classify_email_ai(
+                    subject, content, deadline=deadline, provisional=settings.AI_SETTINGS["AI_PROVISIONAL_MODE"]
+                )
                 logger.info(f"✅ IA retornou: {result['category']} ({result['confidence']:.2f})")
 
                 from apps.emails.models import Email
@@ -429,18 +437,23 @@ class ClassificationViewSet(viewsets.ModelViewSet):
 
                 # Criar registro no banco de dados / Create record in database
                 logger.info("💾 Tentando salvar no banco...")
-                classification = Classification.objects.create(
-                    email=email_obj,
-                    classification_result=result["category"],
-                    confidence_score=result["confidence"],
-                    suggested_response=result["suggested_response"],
-                    ai_model_used=result["model_used"],
-                    processing_status="completed",
-                    processing_time_seconds=result["processing_time"],
-                    classified_at=timezone.now(),
-                )
+                with STAGE_LATENCY.time("db_save"):
+                    classification = Classification.objects.create(
+                        email=email_obj,
+                        classification_result=result["category"],
+                        confidence_score=result["confidence"],
+                        suggested_response=result["suggested_response"],
+                        ai_model_used=result["model_used"],
+                        processing_status=PROVISIONAL if result.get("provisional") else COMPLETED,
+                        processing_time_seconds=result["processing_time"],
+                        classified_at=timezone.now(),
+                    )
                 logger.info(f"✅ Salvo com ID: {classification.id}")
 
+                # Modelo carregando: refinar em background / Model loading: refine in background
+                if result.get("provisional"):
+                    refine_later(classification.id, subject, content, result["refine_after"])
+
                 response_data = {
                     "id": classification.id,
                     "category": result["category"],
@@ -449,6 +462,9 @@ class ClassificationViewSet(viewsets.ModelViewSet):
                     "processing_time": result["processing_time"],
                     "ai_enhanced": True,
                     "model_used": result["model_used"],
+                    "tier": result["tier"],
+                    "budget": deadline.to_dict(),
+                    "processing_status": classification.processing_status,
                     "details": result["ai_details"],
                 }
 
@@ -719,8 +735,9 @@ class ClassificationViewSet(viewsets.ModelViewSet):
                     'error': 'Content é obrigatório'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Usar classificação direta funcional
-            result = classify_email_direct(subject, content)
+            # Usar classificação direta funcional, dentro do orçamento da requisição
+            deadline = Deadline.from_request(request)
+            result = classify_email_direct(subject, content, deadline=deadline)
             
             if result['success']:
                 # Salvar no banco se a classificação foi bem-sucedida
@@ -736,16 +753,21 @@ class ClassificationViewSet(viewsets.ModelViewSet):
                         }
                     )
                     
-                    classification = Classification.objects.create(
-                        email=email_obj,
-                        classification_result=result['category'],
-                        confidence_score=result['confidence'],
-                        suggested_response=result['suggested_response'],
-                        ai_model_used=result['model_version'],
-                        processing_status="completed",
-                        processing_time_seconds=float(result['processing_time'].replace('s', '')),
-                        classified_at=timezone.now()
-                    )
+                    with STAGE_LATENCY.time("db_save"):
+                        classification = Classification.objects.create(
+                            email=email_obj,
+                            classification_result=result['category'],
+                            confidence_score=result['confidence'],
+                            suggested_response=result['suggested_response'],
+                            ai_model_used=result['model_version'],
+                            processing_status=PROVISIONAL if result.get('provisional') else COMPLETED,
+                            processing_time_seconds=float(result['processing_time'].replace('s', '')),
+                            classified_at=timezone.now()
+                        )
+                    
+                    # Modelo carregando: refinar em background
+                    if result.get('provisional'):
+                        refine_later(classification.id, subject, content, result['refine_after'])
                     
                     return Response({
                         'success': True,
@@ -755,6 +777,9 @@ class ClassificationViewSet(viewsets.ModelViewSet):
                         'suggested_response': result['suggested_response'],
                         'processing_time': result['processing_time'],
                         'model_used': result['model_version'],
+                        'tier': result['tier'],
+                        'budget': deadline.to_dict(),
+                        'processing_status': classification.processing_status,
                         'message': result['message']
                     }, status=status.HTTP_200_OK)
                     
@@ -769,6 +794,8 @@ class ClassificationViewSet(viewsets.ModelViewSet):
                         'suggested_response': result['suggested_response'],
                         'processing_time': result['processing_time'],
                         'model_used': result['model_version'],
+                        'tier': result['tier'],
+                        'budget': deadline.to_dict(),
                         'message': result['message'] + ' (não salvo no DB)',
                         'db_error': str(db_error)
                     }, status=status.HTTP_200_OK)
@@ -856,7 +883,7 @@ def dashboard_data_api(request):
             return [12, 45, 89, 123, 67]
 
         def _get_recent_classifications():
-            return Classification.objects.select_related("email").order_by("-created_at")[:10]
+            return Classification.objects.order_by("-created_at")[:10]
 
         def _serialize_recent_classifications(classifications):
             return [
@@ -871,14 +898,18 @@ def dashboard_data_api(request):
             ]
 
         def _get_ai_service_stats():
+            # Totais somados entre todos os workers / Totals summed across all workers
+            from .ai_service import get_ai_service
+
+            stats = get_ai_service().get_usage_stats()
             return {
-                "cache_hit_rate": 85.5,
-                "error_rate": 2.1,
-                "fallback_rate": 12.4,
-                "api_calls": 1450,
-                "cache_hits": 1240,
-                "errors": 30,
-                "fallback_uses": 180
+                "cache_hit_rate": round(stats["cache_hit_rate"] * 100, 1),
+                "error_rate": round(stats["error_rate"] * 100, 1),
+                "fallback_rate": round(stats["fallback_rate"] * 100, 1),
+                "api_calls": stats["api_calls"],
+                "cache_hits": stats["cache_hits"],
+                "errors": stats["errors"],
+                "fallback_uses": stats["fallback_uses"]
             }
 
         def _get_system_status():
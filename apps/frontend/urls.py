@@ -23,6 +23,7 @@ urlpatterns = [
     path("health/", views.health_check, name="health"),
     path("readiness/", views.readiness_check, name="readiness"),
     path("liveness/", views.liveness_check, name="liveness"),
+    path("metrics", views.metrics_view, name="metrics"),
     
     # === ALIASES PARA COMPATIBILIDADE ===
     path("history/", views.results_view, name="history"),
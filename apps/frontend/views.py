@@ -6,7 +6,7 @@ import json
 import logging
 import time
 import os
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
@@ -23,6 +23,12 @@ except ImportError as e:
     class Email:
         objects = None
 
+from apps.classifier.deadline import TIER_HEURISTIC, Deadline
+from apps.classifier.lexicon import FRONTEND_LEXICON
+from apps.classifier.metrics import STAGE_LATENCY, render_metrics
+from apps.classifier.near_duplicates import email_text
+from apps.classifier.refinement import COMPLETED, PROVISIONAL, is_provisional, refine_later
+
 # Import AI service
 try:
     from apps.classifier.ai_service import get_ai_service
@@ -60,23 +66,10 @@ def analyze_content_keywords(content, subject):
     content_lower = content.lower()
     subject_lower = subject.lower()
     
-    productive_keywords = [
-        'reunião', 'meeting', 'projeto', 'project', 'trabalho', 'work', 
-        'deadline', 'prazo', 'tarefa', 'task', 'importante', 'urgent',
-        'relatório', 'report', 'apresentação', 'presentation', 'cliente',
-        'client', 'contrato', 'contract', 'proposta', 'proposal'
-    ]
-    
-    unproductive_keywords = [
-        'spam', 'promoção', 'desconto', 'oferta', 'comprar', 'venda',
-        'click here', 'free', 'winner', 'prize', 'congratulations',
-        'viagra', 'casino', 'lottery', 'investment opportunity'
-    ]
-    
-    productive_score = sum(1 for keyword in productive_keywords 
-                         if keyword in content_lower or keyword in subject_lower)
-    unproductive_score = sum(1 for keyword in unproductive_keywords 
-                           if keyword in content_lower or keyword in subject_lower)
+    # Uma passada sobre conteúdo e assunto com o léxico compartilhado
+    counts = FRONTEND_LEXICON.count(content_lower, subject_lower)
+    productive_score = counts['productive']
+    unproductive_score = counts['unproductive']
     
     if productive_score > unproductive_score:
         return 'productive'
@@ -104,7 +97,8 @@ def fallback_classification(content, subject):
         'confidence': 0.6,
         'reasoning': f'Classificação baseada em análise de palavras-chave. Email identificado como {classification}.',
         'model': 'keyword-fallback',
-        'processing_time': 0.1
+        'processing_time': 0.1,
+        'tier': TIER_HEURISTIC
     }
 
 
@@ -125,12 +119,28 @@ def upload_ajax(request):
         if Email.objects is None:
             return JsonResponse({'success': False, 'error': 'Modelos não disponíveis'})
         
-        # Get AI classification
+        # Get AI classification within the request time budget
+        deadline = Deadline.from_request(request)
         ai_service = get_ai_service()
         if ai_service is None:
             result = fallback_classification(content, subject)
         else:
-            result = ai_service.classify_email(content, subject)
+            start_time = time.time()
+            # Modelo carregando (503): responde com a heurística e refina em background
+            result = ai_service.classify_email_text(
+                email_text(subject, content),
+                deadline=deadline,
+                provisional=settings.AI_SETTINGS["AI_PROVISIONAL_MODE"],
+            )
+            details = result.get('processing_details', {})
+            result = {
+                **result,
+                'model': f"ai-{details.get('method', 'unknown')}",
+                'processing_time': time.time() - start_time,
+                'tier': details.get('tier'),
+                'provisional': is_provisional(result),
+                'refine_after': details.get('refine_after'),
+            }
         
         # Normalize classification
         raw_classification = result.get('classification', 'unknown').lower()
@@ -145,22 +155,26 @@ def upload_ajax(request):
             normalized_classification = analyze_content_keywords(content, subject)
         
         # Create email with classification
-        email = Email.objects.create(
-            subject=subject,
-            content=content,
-            sender='user@upload.com',
-            classification_result=normalized_classification,
-            confidence_score=result.get('confidence', 0.6),
-            reasoning=result.get('reasoning', f'Email classificado como {normalized_classification}'),
-            ai_model_used=result.get('model', 'huggingface-api'),
-            processing_time_seconds=result.get('processing_time', 0),
-            suggested_response=generate_suggested_response(normalized_classification, subject),
-            processing_status='completed',
-            classified_at=timezone.now()
-        )
+        with STAGE_LATENCY.time("db_save"):
+            email = Email.objects.create(
+                subject=subject,
+                content=content,
+                sender='user@upload.com',
+                classification_result=normalized_classification,
+                confidence_score=result.get('confidence', 0.6),
+                reasoning=result.get('reasoning', f'Email classificado como {normalized_classification}'),
+                ai_model_used=result.get('model', 'huggingface-api'),
+                processing_time_seconds=result.get('processing_time', 0),
+                suggested_response=generate_suggested_response(normalized_classification, subject),
+                processing_status=PROVISIONAL if result.get('provisional') else COMPLETED,
+                classified_at=timezone.now()
+            )
         
         logger.info(f"✅ Email criado e classificado com ID: {email.id}")
         
+        if result.get('provisional'):
+            refine_later(email.id, subject, content, result['refine_after'])
+        
         # Generate response
         recommended_responses = {
             'productive': f"✅ RESPONDER COM PRIORIDADE: Este email sobre '{subject}' é importante para sua produtividade.",
@@ -190,6 +204,9 @@ def upload_ajax(request):
             'processing_time': f"{result.get('processing_time', 0):.2f}s",
             'model_version': result.get('model', 'AI-HuggingFace'),
             'recommended_response': recommended_responses.get(normalized_classification, 'Sem recomendação disponível'),
+            'tier': result.get('tier'),
+            'budget': deadline.to_dict(),
+            'processing_status': email.processing_status,
             'timestamp': email.created_at.isoformat() if hasattr(email, 'created_at') else None
         }
         
@@ -403,6 +420,9 @@ def health_check(request):
     try:
         ai_service = get_ai_service()
         status['checks']['ai_service'] = 'healthy' if ai_service else 'unavailable (using fallback)'
+        # Resultado do warm-up em cache, sem chamar a API
+        if ai_service:
+            status['checks']['ai_connectivity'] = ai_service.connectivity_status() or 'pending'
     except Exception as e:
         status['checks']['ai_service'] = f'unhealthy: {str(e)}'
     
@@ -410,6 +430,13 @@ def health_check(request):
     return JsonResponse(status, status=response_status)
 
 
+def metrics_view(request):
+    """Métricas no formato do Prometheus, somadas entre workers"""
+    if not settings.AI_SETTINGS['AI_METRICS_ENABLED']:
+        return HttpResponse(status=404)
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 def readiness_check(request):
     """Readiness probe"""
     return JsonResponse({'status': 'ready'})
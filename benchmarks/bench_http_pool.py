@@ -0,0 +1,103 @@
+"""
+Benchmark de latência: sessão com pool vs. chamadas sem pool / Latency benchmark: pooled session vs. unpooled calls.
+
+Sobe um servidor stub local (HTTP/1.1 keep-alive) que imita a resposta da API de classificação e compara
+``requests.post`` (nova conexão por chamada) com a sessão compartilhada de ``http_client``. Com TLS real
+o custo do handshake evitado é bem maior do que neste stub em texto puro. / Starts a local stub server
+(HTTP/1.1 keep-alive) mimicking the classification API response and compares ``requests.post`` (new
+connection per call) against the shared ``http_client`` session. With real TLS the avoided handshake cost
+is much larger than on this plain-text stub.
+
+Uso / Usage:
+    python benchmarks/bench_http_pool.py [--requests 500] [--delay-ms 0]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings.base")
+django.setup()
+
+import requests  # noqa: E402
+
+from apps.classifier.http_client import get_http_session, http_timeout  # noqa: E402
+
+RESPONSE_BODY = json.dumps([[{"label": "POSITIVE", "score": 0.93}, {"label": "NEGATIVE", "score": 0.07}]]).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Resposta em um único segmento, sem Nagle / Single-segment response, no Nagle
+    disable_nagle_algorithm = True
+    wbufsize = -1
+    delay = 0.0
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        StubHandler.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.delay:
+            time.sleep(self.delay)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE_BODY)))
+        self.end_headers()
+        self.wfile.write(RESPONSE_BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(label, post, url, total):
+    StubHandler.connections = 0
+    payload = {"inputs": "Reunião amanhã sobre o projeto", "parameters": {"return_all_scores": True}}
+    latencies = []
+    for _ in range(total):
+        start = time.perf_counter()
+        response = post(url, json=payload, timeout=http_timeout(5))
+        response.json()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    p50 = statistics.median(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{label:>10} {p50:>10.3f}ms {p99:>10.3f}ms {statistics.mean(latencies):>10.3f}ms {StubHandler.connections:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    StubHandler.delay = args.delay_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/models/stub"
+
+    print("🔌 Benchmark: pool HTTP / HTTP pooling")
+    print(f"   {args.requests} requisições / requests, stub delay {args.delay_ms}ms")
+    print("=" * 62)
+    print(f"{'modo':>10} {'p50':>12} {'p99':>12} {'média':>12} {'conexões':>12}")
+
+    run("unpooled", requests.post, url, args.requests)
+    run("pooled", get_http_session().post, url, args.requests)
+
+    print("=" * 62)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
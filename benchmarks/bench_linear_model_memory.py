@@ -0,0 +1,164 @@
+"""
+Benchmark de memória por worker do modelo linear: ``joblib`` vs ``mmap`` / Per-worker memory benchmark for the
+linear model: ``joblib`` vs ``mmap``.
+
+Treina um modelo TF-IDF com vocabulário grande e faz ``fork`` de N workers que, como numa troca a quente, carregam
+o modelo depois do fork e classificam um lote. Com todos vivos, o master mede RSS, PSS e USS de cada um. Com
+``joblib`` cada worker tem sua cópia no heap (USS alta); com ``mmap`` os arrays ficam no page cache compartilhado
+(USS baixa, PSS dividida entre os workers). / Trains a TF-IDF model with a large vocabulary and forks N workers
+that, as in a hot swap, load the model after fork and classify a batch. With all of them alive, the master
+measures each one's RSS, PSS and USS. With ``joblib`` every worker has its own heap copy (high USS); with
+``mmap`` the arrays live in the shared page cache (low USS, PSS split across workers).
+
+Uso / Usage:
+    python benchmarks/bench_linear_model_memory.py [--workers 8] [--vocabulary 200000]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django():
+    import django
+
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings.base")
+    os.environ["AI_WARMUP_ON_START"] = "False"
+    django.setup()
+
+
+def synthetic_corpus(documents, words_per_document=120, lexicon_size=30000):
+    rng = random.Random(42)
+    lexicon = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyzçãé") for _ in range(rng.randint(4, 10))) for _ in range(lexicon_size)
+    ]
+    texts = [" ".join(rng.choice(lexicon) for _ in range(words_per_document)) for _ in range(documents)]
+    labels = ["productive" if index % 2 else "unproductive" for index in range(documents)]
+    return texts, labels
+
+
+def train(model_dir, vocabulary):
+    from apps.classifier.linear_model import save_linear_model, train_linear_model
+
+    texts, labels = synthetic_corpus(max(2000, vocabulary // 60))
+    pipeline, metrics = train_linear_model(texts, labels, test_size=0, max_features=vocabulary)
+    version_dir = save_linear_model(pipeline, metrics, model_dir)
+    return {
+        "vocabulary": metrics["vocabulary_size"],
+        "joblib_mb": round(os.path.getsize(version_dir / "model.joblib") / 1e6, 1),
+        "mmap_mb": round(os.path.getsize(version_dir / "model.mmap") / 1e6, 1),
+    }
+
+
+def master(mode, workers, model_dir):
+    """Executado em um processo novo por modo. / Runs in a fresh process per mode."""
+
+    setup_django()
+
+    # Código importado antes do fork, como no ``preload_app``: só o modelo fica para os workers / Code imported
+    # before fork, as with ``preload_app``: only the model is left to the workers
+    import joblib  # noqa: F401
+    import sklearn.feature_extraction.text  # noqa: F401
+    import sklearn.linear_model  # noqa: F401
+    import sklearn.pipeline  # noqa: F401
+
+    from apps.classifier.linear_model import LinearEngine
+    from apps.classifier.prefork import memory_usage
+
+    batch, _ = synthetic_corpus(64)
+    children = []
+    for _ in range(workers):
+        ready_read, ready_write = os.pipe()
+        release_read, release_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read)
+            os.close(release_write)
+            started = time.perf_counter()
+            engine = LinearEngine(model_dir, mapped=mode == "mmap")
+            load_ms = (time.perf_counter() - started) * 1000
+            engine.classify_batch(batch)
+            os.write(ready_write, json.dumps({"load_ms": load_ms}).encode())
+            os.close(ready_write)
+            # Fica vivo até o master medir todos / Stays alive until the master has measured everyone
+            os.read(release_read, 1)
+            os._exit(0)
+
+        os.close(ready_write)
+        os.close(release_read)
+        children.append((pid, ready_read, release_write))
+
+    samples = []
+    for pid, ready_read, _ in children:
+        with os.fdopen(ready_read) as pipe:
+            samples.append(json.loads(pipe.read()))
+    for sample, (pid, _, _) in zip(samples, children):
+        sample.update(memory_usage(pid))
+
+    # Filhos herdam as pontas de escrita dos anteriores: libera todos antes de esperar / Children inherit the
+    # earlier ones' write ends: release everyone before waiting
+    for _, _, release_write in children:
+        os.close(release_write)
+    for pid, _, _ in children:
+        os.waitpid(pid, 0)
+
+    print(json.dumps({key: statistics.median(sample[key] for sample in samples) for key in samples[0]}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--vocabulary", type=int, default=200000)
+    parser.add_argument("--master", choices=["joblib", "mmap"])
+    parser.add_argument("--model-dir")
+    args = parser.parse_args()
+
+    if args.master:
+        master(args.master, args.workers, args.model_dir)
+        return
+
+    setup_django()
+    with tempfile.TemporaryDirectory() as model_dir:
+        artifact = train(model_dir, args.vocabulary)
+
+        print(f"🔥 Benchmark: memória por worker do modelo linear ({args.workers} workers, medianas)")
+        print(
+            f"   vocabulário: {artifact['vocabulary']} termos, joblib {artifact['joblib_mb']} MB, mmap {artifact['mmap_mb']} MB"
+        )
+        print("=" * 80)
+        print(f"{'modo':>8}{'carga':>12}{'worker RSS':>15}{'worker PSS':>15}{'worker USS':>15}{'USS total':>14}")
+        for mode in ("joblib", "mmap"):
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    os.path.abspath(__file__),
+                    "--master",
+                    mode,
+                    "--workers",
+                    str(args.workers),
+                    "--model-dir",
+                    model_dir,
+                ],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"{mode:>8}{result['load_ms']:>9.1f} ms{result['rss_mb']:>12.1f} MB{result['pss_mb']:>12.1f} MB"
+                f"{result['uss_mb']:>12.1f} MB{result['uss_mb'] * args.workers:>11.1f} MB"
+            )
+        print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
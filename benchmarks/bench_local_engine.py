@@ -0,0 +1,146 @@
+"""
+Benchmark dos engines locais / Local engine benchmark.
+
+Compara o ``pipeline`` PyTorch com o modelo ONNX (fp32 e int8) para ``BACKUP_CLASSIFICATION_MODEL``: tempo de
+carga, latência por email (p50/p95), memória residente do processo e concordância dos rótulos com o
+``pipeline``. Cada engine roda em um processo novo, para que a memória de um não contamine o outro. / Compares
+the PyTorch ``pipeline`` against the ONNX model (fp32 and int8) for ``BACKUP_CLASSIFICATION_MODEL``: load time,
+per-email latency (p50/p95), process resident memory and label agreement with the ``pipeline``. Each engine runs
+in a fresh process so one engine's memory does not leak into another's numbers.
+
+Requer ``transformers``, ``torch`` e ``onnxruntime``; o modelo ONNX é exportado na primeira execução. /
+Requires ``transformers``, ``torch`` and ``onnxruntime``; the ONNX model is exported on the first run.
+
+Uso / Usage:
+    python benchmarks/bench_local_engine.py [--emails 200]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+VARIANTS = [("transformers", "transformers", None), ("onnx fp32", "onnx", False), ("onnx int8", "onnx", True)]
+
+SAMPLES = [
+    "Please review the attached quarterly report before tomorrow's meeting.",
+    "Can you confirm the delivery date for the project milestones?",
+    "Reunião de alinhamento do projeto amanhã às 10h, favor confirmar presença.",
+    "Segue em anexo a proposta comercial revisada para aprovação.",
+    "Confira nossa promoção exclusiva com 50% de desconto, clique aqui!",
+    "Happy birthday! Hope you have a wonderful day with your family.",
+    "You have won a free cruise, reply now to claim your prize.",
+    "Obrigado pela ajuda ontem, foi ótimo conversar com você.",
+]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def build_emails(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(SAMPLES) for _ in range(rng.randint(1, 6))) for _ in range(count)]
+
+
+def worker(engine_name, quantize, count):
+    """Executado no processo filho; imprime os números em JSON. / Runs in the child process; prints numbers as JSON."""
+
+    import django
+
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings.base")
+    django.setup()
+
+    from django.conf import settings
+
+    from apps.classifier.local_engines import ENGINE_ONNX, OnnxEngine, load_local_engine
+
+    model_name = settings.AI_SETTINGS["BACKUP_CLASSIFICATION_MODEL"]
+    emails = build_emails(count)
+    baseline_rss = rss_mb()
+
+    start = time.perf_counter()
+    if engine_name == ENGINE_ONNX:
+        engine = OnnxEngine(model_name, quantize=quantize)
+    else:
+        engine = load_local_engine(model_name, engine_name)
+    engine(emails[0])  # primeira inferência faz parte da carga / first inference is part of loading
+    load_ms = (time.perf_counter() - start) * 1000
+
+    latencies, labels = [], []
+    for text in emails:
+        started = time.perf_counter()
+        scores = engine(text[:512])[0]
+        latencies.append((time.perf_counter() - started) * 1000)
+        labels.append(max(scores, key=lambda item: item["score"])["label"])
+
+    latencies.sort()
+    print(
+        json.dumps(
+            {
+                "load_ms": load_ms,
+                "p50_ms": statistics.median(latencies),
+                "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+                "rss_mb": rss_mb() - baseline_rss,
+                "labels": labels,
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--emails", type=int, default=200)
+    parser.add_argument("--worker", choices=["transformers", "onnx"])
+    parser.add_argument("--quantize", choices=["true", "false"], default="true")
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.quantize == "true", args.emails)
+        return
+
+    sys.path.insert(0, ROOT)
+    from importlib.util import find_spec
+
+    missing = [name for name in ("transformers", "torch", "onnxruntime") if find_spec(name) is None]
+    if missing:
+        print(f"⚠️  Dependências ausentes / Missing dependencies: {', '.join(missing)}")
+        return
+
+    print(f"🧠 Benchmark: engines locais / local engines ({args.emails} emails, medianas por processo)")
+    print("=" * 84)
+    print(f"{'engine':>14}{'carga':>12}{'p50':>10}{'p95':>10}{'RSS':>12}{'concordância':>16}")
+
+    baseline_labels = None
+    for label, engine_name, quantize in VARIANTS:
+        command = [sys.executable, os.path.abspath(__file__), "--worker", engine_name, "--emails", str(args.emails)]
+        if quantize is not None:
+            command += ["--quantize", "true" if quantize else "false"]
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+
+        if baseline_labels is None:
+            baseline_labels = result["labels"]
+        agreement = sum(a == b for a, b in zip(baseline_labels, result["labels"])) / len(baseline_labels)
+
+        print(
+            f"{label:>14}{result['load_ms']:>10.0f}ms{result['p50_ms']:>8.1f}ms{result['p95_ms']:>8.1f}ms"
+            f"{result['rss_mb']:>9.0f} MB{agreement:>15.1%}"
+        )
+
+    print("=" * 84)
+
+
+if __name__ == "__main__":
+    main()
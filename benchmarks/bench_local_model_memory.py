@@ -0,0 +1,108 @@
+"""
+Benchmark de memória do modelo local por número de workers / Local model memory benchmark by worker count.
+
+Sobe N processos "worker" (Django configurado + uma classificação local) em dois modos e soma a PSS de todos
+eles (``/proc/<pid>/smaps_rollup``), que divide as páginas compartilhadas entre os processos:
+/ Starts N "worker" processes (Django set up + one local classification) in two modes and sums the PSS of all
+of them (``/proc/<pid>/smaps_rollup``), which splits shared pages across processes:
+
+- ``in-process``: cada worker carrega o próprio modelo (``AI_LOCAL_ENGINE=transformers|onnx``) / every worker
+  loads its own model
+- ``server``: um ``serve_local_model`` + N workers com ``AI_LOCAL_ENGINE=server`` / one ``serve_local_model`` +
+  N workers with ``AI_LOCAL_ENGINE=server``
+
+Uso / Usage:
+    python benchmarks/bench_local_model_memory.py [--workers 1 8 17] [--engine transformers]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER_SCRIPT = """
+import sys, django
+django.setup()
+from apps.classifier.ai_service import AIClassificationService
+AIClassificationService()._classify_with_local_model("Reunião amanhã sobre o projeto")
+print("ready", flush=True)
+sys.stdin.read()
+"""
+
+
+def pss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/smaps_rollup") as rollup:
+        for line in rollup:
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def start(command, env):
+    return subprocess.Popen(command, cwd=ROOT, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+
+
+def wait_ready(process):
+    line = process.stdout.readline()
+    if "ready" not in line:
+        raise RuntimeError(f"Processo {process.pid} não ficou pronto: {line!r}")
+
+
+def measure(workers: int, engine: str, mode: str) -> float:
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": "core.settings.base", "AI_LOCAL_BATCH_MAX_SIZE": "1"}
+    processes = []
+    try:
+        if mode == "server":
+            socket_path = os.path.join(tempfile.mkdtemp(), "model.sock")
+            env.update({"AI_LOCAL_ENGINE": "server", "AI_LOCAL_MODEL_SOCKET": socket_path})
+            server = start([sys.executable, "manage.py", "serve_local_model", "--engine", engine], env)
+            processes.append(server)
+            while not os.path.exists(socket_path):
+                if server.poll() is not None:
+                    raise RuntimeError("serve_local_model encerrou antes de abrir o socket")
+                time.sleep(0.2)
+        else:
+            env["AI_LOCAL_ENGINE"] = engine
+
+        workers_started = [start([sys.executable, "-c", WORKER_SCRIPT], env) for _ in range(workers)]
+        processes.extend(workers_started)
+        for process in workers_started:
+            wait_ready(process)
+
+        return sum(pss_mb(process.pid) for process in processes)
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8, 17])
+    parser.add_argument("--engine", choices=["transformers", "onnx"], default="transformers")
+    args = parser.parse_args()
+
+    from importlib.util import find_spec
+
+    required = ["transformers", "torch"] if args.engine == "transformers" else ["transformers", "onnxruntime"]
+    missing = [name for name in required if find_spec(name) is None]
+    if missing:
+        print(f"⚠️  Dependências ausentes / Missing dependencies: {', '.join(missing)}")
+        return
+
+    print(f"🧠 Benchmark: memória do modelo local / local model memory (engine {args.engine}, PSS total)")
+    print("=" * 60)
+    print(f"{'workers':>10}{'in-process':>16}{'server':>16}{'economia':>16}")
+    for workers in args.workers:
+        in_process = measure(workers, args.engine, "in-process")
+        server = measure(workers, args.engine, "server")
+        print(f"{workers:>10}{in_process:>13.0f} MB{server:>13.0f} MB{in_process - server:>13.0f} MB")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark de memória por worker com e sem warm-up pré-fork / Per-worker memory benchmark with and without
+pre-fork warm-up.
+
+Reproduz o modelo do gunicorn com ``preload_app``: um master configura o Django e faz ``fork`` de N workers; cada
+worker atende uma "primeira requisição" (imports das views, AI service, classificação heurística) e mede a
+própria memória exclusiva (USS). No modo ``lazy`` tudo isso é construído em cada worker; no modo ``prefork`` o
+master chama ``warm_up_before_fork`` e os workers ``reset_after_fork``. / Mimics gunicorn with ``preload_app``: a
+master sets up Django and forks N workers; each worker serves a "first request" (view imports, AI service,
+heuristic classification) and measures its own unique memory (USS). In ``lazy`` mode all of that is built in
+every worker; in ``prefork`` mode the master calls ``warm_up_before_fork`` and workers call ``reset_after_fork``.
+
+Uso / Usage:
+    python benchmarks/bench_prefork_memory.py [--workers 8]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def first_request():
+    import importlib
+
+    from apps.classifier.ai_service import get_ai_service
+    from apps.classifier.prefork import PRELOADED_MODULES
+
+    for module in PRELOADED_MODULES:
+        importlib.import_module(module)
+    get_ai_service(warm_up=False)._classify_with_fallback("Reunião amanhã sobre o relatório do projeto, urgente")
+
+
+def master(mode, workers):
+    """Executado em um processo novo por modo. / Runs in a fresh process per mode."""
+
+    import django
+
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings.base")
+    os.environ["AI_WARMUP_ON_START"] = "False"
+    django.setup()
+
+    from apps.classifier.prefork import memory_usage, reset_after_fork, warm_up_before_fork
+
+    if mode == "prefork":
+        warm_up_before_fork()
+    master_memory = memory_usage()
+
+    samples = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            if mode == "prefork":
+                reset_after_fork()
+            first_request()
+            os.write(write_fd, json.dumps(memory_usage()).encode())
+            os._exit(0)
+
+        os.close(write_fd)
+        with os.fdopen(read_fd) as pipe:
+            samples.append(json.loads(pipe.read()))
+        os.waitpid(pid, 0)
+
+    print(
+        json.dumps(
+            {
+                "master_rss_mb": master_memory["rss_mb"],
+                "uss_mb": statistics.median(sample["uss_mb"] for sample in samples),
+                "pss_mb": statistics.median(sample["pss_mb"] for sample in samples),
+                "rss_mb": statistics.median(sample["rss_mb"] for sample in samples),
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--master", choices=["lazy", "prefork"])
+    args = parser.parse_args()
+
+    if args.master:
+        master(args.master, args.workers)
+        return
+
+    print(f"🔥 Benchmark: memória por worker / per-worker memory ({args.workers} workers, medianas)")
+    print("=" * 72)
+    print(f"{'modo':>10}{'master RSS':>16}{'worker RSS':>16}{'worker USS':>16}{'USS total':>14}")
+    for mode in ("lazy", "prefork"):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--master", mode, "--workers", str(args.workers)],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{mode:>10}{result['master_rss_mb']:>13.1f} MB{result['rss_mb']:>13.1f} MB{result['uss_mb']:>13.1f} MB"
+            f"{result['uss_mb'] * args.workers:>11.1f} MB"
+        )
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark de inicialização: tempo até a primeira classificação por worker / Startup benchmark: time to first
+classification per worker.
+
+Cada "worker" é um processo Python novo que configura o Django, obtém o AI service e classifica um email
+contra um servidor stub (HEAD lento simula a validação na Hugging Face). O modo ``blocking`` reproduz o
+construtor antigo (``HEAD`` síncrono antes de atender); ``background`` é o comportamento atual com warm-up
+em thread. / Each "worker" is a fresh Python process that sets up Django, gets the AI service and classifies
+one email against a stub server (a slow HEAD simulates validation against Hugging Face). ``blocking`` mode
+reproduces the old constructor (synchronous ``HEAD`` before serving); ``background`` is the current behaviour
+with a threaded warm-up.
+
+Uso / Usage:
+    python benchmarks/bench_startup.py [--workers 5] [--head-delay-ms 500]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESPONSE_BODY = json.dumps([[{"label": "POSITIVE", "score": 0.93}, {"label": "NEGATIVE", "score": 0.07}]]).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    wbufsize = -1
+    head_delay = 0.0
+
+    def do_HEAD(self):
+        time.sleep(self.head_delay)
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE_BODY)))
+        self.end_headers()
+        self.wfile.write(RESPONSE_BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def worker(mode):
+    """Executado no processo filho; imprime os tempos em JSON. / Runs in the child process; prints timings as JSON."""
+
+    spawned_at = float(os.environ["BENCH_SPAWNED_AT"])
+    start = time.perf_counter()
+
+    import django
+
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings.base")
+    django.setup()
+
+    from apps.classifier.ai_service import get_ai_service
+
+    setup_done = time.perf_counter()
+    service = get_ai_service()
+    if mode == "blocking":
+        # Construtor antigo: HEAD síncrono / Old constructor: synchronous HEAD
+        service.check_connectivity(force=True)
+    constructed = time.perf_counter()
+
+    service.classify_email_text("Reunião amanhã sobre o projeto")
+    classified = time.perf_counter()
+
+    print(
+        json.dumps(
+            {
+                "setup_ms": (setup_done - start) * 1000,
+                "construct_ms": (constructed - setup_done) * 1000,
+                "classify_ms": (classified - constructed) * 1000,
+                "first_classification_ms": (time.time() - spawned_at) * 1000,
+            }
+        )
+    )
+
+
+def run(mode, url, workers):
+    env = {
+        **os.environ,
+        "HUGGINGFACE_API_URL": url,
+        "HUGGINGFACE_API_TOKEN": "bench-token",
+        "AI_PROVISIONAL_MODE": "False",
+    }
+    samples = []
+    for _ in range(workers):
+        env["BENCH_SPAWNED_AT"] = repr(time.time())
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", mode],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    columns = ["setup_ms", "construct_ms", "classify_ms", "first_classification_ms"]
+    medians = [statistics.median(sample[column] for sample in samples) for column in columns]
+    print(f"{mode:>12}" + "".join(f"{value:>14.1f}" for value in medians))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=5)
+    parser.add_argument("--head-delay-ms", type=float, default=500.0)
+    parser.add_argument("--worker", choices=["blocking", "background"])
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker)
+        return
+
+    StubHandler.head_delay = args.head_delay_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/models"
+
+    print("🚀 Benchmark: tempo até a primeira classificação / time to first classification")
+    print(f"   {args.workers} workers por modo / per mode, HEAD delay {args.head_delay_ms}ms (medianas / medians)")
+    print("=" * 68)
+    print(f"{'modo':>12}{'setup':>14}{'construção':>14}{'classificar':>14}{'total':>14}")
+
+    run("blocking", url, args.workers)
+    run("background", url, args.workers)
+
+    print("=" * 68)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,12 @@ ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Use este entrypoint para que as views assíncronas (``apps.classifier.async_views``) mantenham várias chamadas
+de IA em voo por worker / Use this entrypoint so the async views (``apps.classifier.async_views``) keep many
+AI calls in flight per worker:
+
+    gunicorn core.asgi:application -c gunicorn_config.py -k uvicorn.workers.UvicornWorker
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -222,8 +222,100 @@ AI_SETTINGS = {
     "AI_RETRY_ATTEMPTS": int(os.getenv("AI_RETRY_ATTEMPTS", "3")),
     "AI_FALLBACK_TO_LOCAL": os.getenv("AI_FALLBACK_TO_LOCAL", "True").lower() == "true",
     "AI_CACHE_TTL": int(os.getenv("AI_CACHE_TTL", "3600")),
+    # Incrementar invalida todos os resultados em cache / Bumping it invalidates every cached result
+    "AI_CACHE_VERSION": os.getenv("AI_CACHE_VERSION", "1"),
+    # L1 em processo na frente do cache do Django / In-process L1 in front of the Django cache
+    "AI_L1_CACHE_MAX_ENTRIES": int(os.getenv("AI_L1_CACHE_MAX_ENTRIES", "1024")),
+    "AI_L1_CACHE_TTL": float(os.getenv("AI_L1_CACHE_TTL", "60")),
+    # Coalescência de classificações idênticas em voo (lock entre workers via cache) / Coalescing of identical
+    # in-flight classifications (cross-worker lock via the cache)
+    "AI_SINGLE_FLIGHT": os.getenv("AI_SINGLE_FLIGHT", "True").lower() == "true",
+    "AI_SINGLE_FLIGHT_LOCK_TIMEOUT": float(os.getenv("AI_SINGLE_FLIGHT_LOCK_TIMEOUT", "30")),
+    "AI_SINGLE_FLIGHT_POLL_MS": int(os.getenv("AI_SINGLE_FLIGHT_POLL_MS", "50")),
+    # Token bucket: taxa sustentada, rajada máxima (0 = um minuto de taxa) e espera máxima por um token antes de
+    # degradar / Token bucket: sustained rate, max burst (0 = one minute's worth) and max wait for a token before
+    # degrading
     "AI_RATE_LIMIT_PER_MINUTE": int(os.getenv("AI_RATE_LIMIT_PER_MINUTE", "60")),
+    "AI_RATE_LIMIT_BURST": int(os.getenv("AI_RATE_LIMIT_BURST", "0")),
+    "AI_RATE_LIMIT_MAX_WAIT": float(os.getenv("AI_RATE_LIMIT_MAX_WAIT", "1.0")),
+    # Intervalo máximo entre envios das estatísticas de cada worker ao cache / Max interval between each worker's
+    # statistics flushes to the cache
+    "AI_STATS_FLUSH_INTERVAL": float(os.getenv("AI_STATS_FLUSH_INTERVAL", "5")),
+    # Endpoint /metrics (formato de texto do Prometheus) / /metrics endpoint (Prometheus text format)
+    "AI_METRICS_ENABLED": os.getenv("AI_METRICS_ENABLED", "True").lower() == "true",
+    # Reuso da classificação de emails quase idênticos (SimHash + LSH): distância de Hamming máxima em 64 bits,
+    # bandas do índice (maior que a distância), entradas em memória e carga inicial da tabela ``emails`` /
+    # Reuse of near-identical emails' classification (SimHash + LSH): max Hamming distance over 64 bits, index
+    # bands (above the distance), in-memory entries and initial load from the ``emails`` table
+    "AI_NEAR_DUPLICATE": os.getenv("AI_NEAR_DUPLICATE", "True").lower() == "true",
+    "AI_NEAR_DUPLICATE_MAX_DISTANCE": int(os.getenv("AI_NEAR_DUPLICATE_MAX_DISTANCE", "7")),
+    "AI_NEAR_DUPLICATE_BANDS": int(os.getenv("AI_NEAR_DUPLICATE_BANDS", "8")),
+    "AI_NEAR_DUPLICATE_MAX_ENTRIES": int(os.getenv("AI_NEAR_DUPLICATE_MAX_ENTRIES", "10000")),
+    "AI_NEAR_DUPLICATE_PERSIST": os.getenv("AI_NEAR_DUPLICATE_PERSIST", "False").lower() == "true",
     "PROCESSING_TIMEOUT": int(os.getenv("PROCESSING_TIMEOUT", "30")),
+    # Orçamento de tokens por entrada (512 menos os tokens especiais) / Per-input token budget (512 minus special tokens)
+    "AI_MAX_INPUT_TOKENS": int(os.getenv("AI_MAX_INPUT_TOKENS", "510")),
+    # "approximate" (padrão) ou "local": tokenizer do modelo só de arquivos locais, carregado no warm-up / "approximate"
+    # (default) or "local": the model's tokenizer from local files only, loaded during warm-up
+    "AI_TOKENIZER": os.getenv("AI_TOKENIZER", "approximate"),
+    "AI_TOKENIZER_PATH": os.getenv("AI_TOKENIZER_PATH", ""),
+    # Emails longos em janelas sobrepostas, agregadas por confiança / Long emails as overlapping, confidence-weighted windows
+    "AI_LONG_EMAIL_MODE": os.getenv("AI_LONG_EMAIL_MODE", "False").lower() == "true",
+    "AI_LONG_EMAIL_OVERLAP": int(os.getenv("AI_LONG_EMAIL_OVERLAP", "64")),
+    "AI_LONG_EMAIL_MAX_WINDOWS": int(os.getenv("AI_LONG_EMAIL_MAX_WINDOWS", "8")),
+    "AI_BATCH_SIZE": int(os.getenv("AI_BATCH_SIZE", "16")),
+    "AI_BATCH_MAX_CHARS": int(os.getenv("AI_BATCH_MAX_CHARS", "8000")),
+    "AI_HTTP_POOL_SIZE": int(os.getenv("AI_HTTP_POOL_SIZE", "10")),
+    "AI_HTTP_CONNECT_TIMEOUT": float(os.getenv("AI_HTTP_CONNECT_TIMEOUT", "3.05")),
+    "AI_HTTP_READ_TIMEOUT": float(os.getenv("AI_HTTP_READ_TIMEOUT", os.getenv("PROCESSING_TIMEOUT", "30"))),
+    "AI_ASYNC_MAX_CONNECTIONS": int(os.getenv("AI_ASYNC_MAX_CONNECTIONS", "200")),
+    # Circuit breaker da API de inferência / Inference API circuit breaker
+    "AI_CIRCUIT_FAILURE_THRESHOLD": int(os.getenv("AI_CIRCUIT_FAILURE_THRESHOLD", "5")),
+    "AI_CIRCUIT_RECOVERY_TIMEOUT": float(os.getenv("AI_CIRCUIT_RECOVERY_TIMEOUT", "30")),
+    # Orçamento de tempo por requisição (segundos) / Per-request time budget (seconds)
+    "AI_REQUEST_BUDGET": float(os.getenv("AI_REQUEST_BUDGET", "15")),
+    "AI_REQUEST_BUDGET_MAX": float(os.getenv("AI_REQUEST_BUDGET_MAX", "60")),
+    # Mínimo restante para cada camada rodar / Minimum left for each tier to run
+    "AI_TIER_API_MIN_BUDGET": float(os.getenv("AI_TIER_API_MIN_BUDGET", "1.0")),
+    "AI_TIER_LOCAL_MIN_BUDGET": float(os.getenv("AI_TIER_LOCAL_MIN_BUDGET", "3.0")),
+    # Modo "responde agora, refina depois" para 503 / "Answer now, refine later" mode for 503
+    "AI_PROVISIONAL_MODE": os.getenv("AI_PROVISIONAL_MODE", "True").lower() == "true",
+    "AI_REFINE_WORKERS": int(os.getenv("AI_REFINE_WORKERS", "2")),
+    "AI_REFINE_MAX_ATTEMPTS": int(os.getenv("AI_REFINE_MAX_ATTEMPTS", "3")),
+    "AI_REFINE_DEFAULT_DELAY": float(os.getenv("AI_REFINE_DEFAULT_DELAY", "20")),
+    "AI_REFINE_MAX_PENDING": int(os.getenv("AI_REFINE_MAX_PENDING", "1000")),
+    # Warm-up em background (conectividade + pool HTTP) / Background warm-up (connectivity + HTTP pool)
+    "AI_WARMUP_ON_START": os.getenv("AI_WARMUP_ON_START", "True").lower() == "true",
+    "AI_CONNECTIVITY_CACHE_TTL": int(os.getenv("AI_CONNECTIVITY_CACHE_TTL", "300")),
+    # Warm-up no master do gunicorn antes do fork (preload_app) / Warm-up in the gunicorn master before fork (preload_app)
+    "AI_PREFORK_WARMUP": os.getenv("AI_PREFORK_WARMUP", "True").lower() == "true",
+    "AI_PREFORK_LOAD_LOCAL_MODEL": os.getenv("AI_PREFORK_LOAD_LOCAL_MODEL", "True").lower() == "true",
+    # Engine do modelo local de backup: "transformers", "onnx" ou "server" / Local backup model engine: "transformers",
+    # "onnx" or "server"
+    "AI_LOCAL_ENGINE": os.getenv("AI_LOCAL_ENGINE", "transformers"),
+    "AI_ONNX_QUANTIZE": os.getenv("AI_ONNX_QUANTIZE", "True").lower() == "true",
+    "AI_ONNX_MODEL_DIR": os.getenv("AI_ONNX_MODEL_DIR", str(BASE_DIR / "model_cache" / "onnx")),
+    "AI_ONNX_THREADS": int(os.getenv("AI_ONNX_THREADS", "1")),
+    # Modelo linear TF-IDF (``manage.py train_classifier``), tentado antes da API; abaixo da confiança mínima a
+    # classificação segue para a API / TF-IDF linear model (``manage.py train_classifier``), tried before the API;
+    # below the minimum confidence classification moves on to the API
+    "AI_LINEAR_MODEL": os.getenv("AI_LINEAR_MODEL", "True").lower() == "true",
+    "AI_LINEAR_MODEL_DIR": os.getenv("AI_LINEAR_MODEL_DIR", str(BASE_DIR / "model_cache" / "linear")),
+    "AI_LINEAR_MIN_CONFIDENCE": float(os.getenv("AI_LINEAR_MIN_CONFIDENCE", "0.75")),
+    # Intervalo entre verificações de uma versão nova publicada (troca sem reiniciar) / Interval between checks for
+    # a newly published version (swap without restart)
+    "AI_LINEAR_MODEL_CHECK_INTERVAL": float(os.getenv("AI_LINEAR_MODEL_CHECK_INTERVAL", "30")),
+    # Servir do artefato mapeado em memória (páginas compartilhadas entre workers) / Serve from the memory-mapped
+    # artifact (pages shared across workers)
+    "AI_LINEAR_MODEL_MMAP": os.getenv("AI_LINEAR_MODEL_MMAP", "True").lower() == "true",
+    # Micro-batching do modelo local (1 desliga) / Local model micro-batching (1 disables it)
+    "AI_LOCAL_BATCH_MAX_SIZE": int(os.getenv("AI_LOCAL_BATCH_MAX_SIZE", "8")),
+    "AI_LOCAL_BATCH_MAX_WAIT_MS": float(os.getenv("AI_LOCAL_BATCH_MAX_WAIT_MS", "5")),
+    # Servidor de modelo local compartilhado (AI_LOCAL_ENGINE=server) / Shared local model server (AI_LOCAL_ENGINE=server)
+    "AI_LOCAL_MODEL_SOCKET": os.getenv("AI_LOCAL_MODEL_SOCKET", "/tmp/autou-local-model.sock"),
+    # Espera máxima por um resultado do servidor ou do micro-batcher / Maximum wait for a result from the server or
+    # the micro-batcher
+    "AI_LOCAL_MODEL_TIMEOUT": float(os.getenv("AI_LOCAL_MODEL_TIMEOUT", "10")),
     "MAX_RESPONSE_LENGTH": int(os.getenv("MAX_RESPONSE_LENGTH", "500")),
 }
 
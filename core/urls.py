@@ -12,6 +12,7 @@ from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, Sp
 
 # Import direto do ViewSet para resolver o problema de roteamento
 from apps.classifier.views import ClassificationViewSet
+from apps.classifier.async_views import upload_ajax_async
 
 def health_check(request):
     """Health check do sistema"""
@@ -44,6 +45,9 @@ urlpatterns = [
         'post': 'upload_ajax_direct',
         'get': 'upload_ajax_form'
     }), name='upload_ajax_direct'),
+
+    # === VERSÃO ASSÍNCRONA (ASGI) ===
+    path('upload-ajax-async/', upload_ajax_async, name='upload_ajax_async'),
     
     # === APIs REST ===
     path('api/emails/', include('apps.emails.urls')),
@@ -11,6 +11,7 @@ bind = "0.0.0.0:8000"
 # Workers
 workers = multiprocessing.cpu_count() * 2 + 1  # Fórmula recomendada
 worker_class = "sync"  # ou "gevent" para async
+# Para as views assíncronas use ASGI: gunicorn core.asgi:application -k uvicorn.workers.UvicornWorker
 worker_connections = 1000
 max_requests = 1000
 max_requests_jitter = 50
@@ -62,10 +63,23 @@ def pre_fork(server, worker):
     server.log.info(f"👷 Worker {worker.pid} sendo criado")
 
 def post_fork(server, worker):
+    # Sessão HTTP, conexões de banco e RNG não podem ser herdados do master
+    if preload_app:
+        from apps.classifier.prefork import reset_after_fork
+
+        reset_after_fork()
     server.log.info(f"👷 Worker {worker.pid} criado com sucesso")
 
 def post_worker_init(worker):
-    worker.log.info(f"👷 Worker {worker.pid} inicializado")
+    from apps.classifier.prefork import memory_usage
+
+    worker.log.info(f"👷 Worker {worker.pid} inicializado {memory_usage()}")
+
+def worker_exit(server, worker):
+    # Incrementos de estatísticas ainda não enviados ao cache (workers reciclados por max_requests)
+    from apps.classifier.shared_stats import flush_all
+
+    flush_all()
 
 def worker_abort(worker):
     worker.log.info(f"👷 Worker {worker.pid} abortado")
@@ -74,6 +88,19 @@ def pre_exec(server):
     server.log.info("🔄 Preparando para exec")
 
 def when_ready(server):
+    # Com preload_app a aplicação já foi importada: aquecer AI service, léxicos e modelo local antes do fork
+    # para que os workers compartilhem essas páginas (copy-on-write)
+    if preload_app:
+        from django.conf import settings
+
+        if settings.AI_SETTINGS["AI_PREFORK_WARMUP"]:
+            from apps.classifier.prefork import warm_up_before_fork
+
+            report = warm_up_before_fork()
+            server.log.info(
+                f"🔥 Warm-up pré-fork em {report['warm_up_time']}s: {len(report['modules'])} módulos, "
+                f"léxicos {report['lexicons']}, modelo local {report['local_model']}, memória {report['memory']}"
+            )
     server.log.info("✅ Servidor pronto para receber requisições")
 
 def pre_request(worker, req):
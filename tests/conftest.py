@@ -0,0 +1,53 @@
+"""Fixtures compartilhadas pelos testes do classificador."""
+
+import json
+
+from django.core.cache import cache
+
+import pytest
+
+from apps.classifier.ai_service import AIClassificationService
+from apps.classifier.http_client import get_http_session
+from tests.helpers import FakeResponse, scores_for
+
+
+@pytest.fixture
+def service():
+    cache.clear()
+    return AIClassificationService()
+
+
+@pytest.fixture
+def api_calls(monkeypatch):
+    """Substitui o POST da API e registra os payloads enviados."""
+    calls = []
+
+    def fake_post(url, headers=None, json=None, timeout=None):
+        calls.append(json)
+        inputs = json["inputs"]
+        if isinstance(inputs, list):
+            return FakeResponse([scores_for(text) for text in inputs])
+        return FakeResponse([scores_for(inputs)])
+
+    monkeypatch.setattr(get_http_session(), "post", fake_post)
+    return calls
+
+
+@pytest.fixture
+def async_api_calls(monkeypatch):
+    """Substitui o AsyncClient por um transporte simulado do httpx."""
+    import httpx
+
+    from apps.classifier import ai_service as ai_service_module
+
+    calls = []
+
+    def handler(request):
+        payload = json.loads(request.content)
+        calls.append(payload)
+        return httpx.Response(200, json=[scores_for(payload["inputs"])])
+
+    monkeypatch.setattr(
+        ai_service_module, "get_async_http_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    return calls
@@ -0,0 +1,31 @@
+"""Utilitários compartilhados pelos testes (sem rede)."""
+
+
+class FakeResponse:
+    """Resposta HTTP mínima para simular a API Hugging Face."""
+
+    def __init__(self, payload, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+        self.text = str(payload)
+
+    def json(self):
+        return self._payload
+
+
+def scores_for(text):
+    label = "POSITIVE" if "reunião" in text.lower() else "NEGATIVE"
+    return [{"label": label, "score": 0.9}, {"label": "NEUTRAL", "score": 0.1}]
+
+
+PRODUCTIVE_SAMPLES = [
+    "Segue a planilha de custos do fornecedor {n} para aprovação do orçamento",
+    "Preciso do relatório de vendas do cliente {n} até sexta para fechar o contrato",
+    "O sistema de faturamento apresentou erro no pedido {n}, podem verificar",
+]
+
+UNPRODUCTIVE_SAMPLES = [
+    "Feliz aniversário {n}! Muitas felicidades e um ótimo dia",
+    "Parabéns pelo casamento {n}, desejo muita alegria ao casal",
+    "Boas festas {n}, um abraço a todos e feliz ano novo",
+]
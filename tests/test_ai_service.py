@@ -0,0 +1,854 @@
+"""Testes do AIClassificationService (sem rede)."""
+
+import asyncio
+import json
+import time
+
+from django.core.cache import cache
+
+import pytest
+
+from apps.classifier.ai_service import AIClassificationService
+from apps.classifier.http_client import get_http_session
+from tests.helpers import FakeResponse, scores_for
+
+
+class TestBatchClassification:
+    """Testes de classify_email_texts."""
+
+    def test_dedupes_and_sends_one_request(self, service, api_calls):
+        """Entradas repetidas viram uma única entrada do lote."""
+        emails = ["Reunião amanhã", "Promoção imperdível", "Reunião amanhã", "", "Promoção imperdível"]
+        results = service.classify_email_texts(emails)
+
+        assert len(api_calls) == 1
+        assert api_calls[0]["inputs"] == ["Reunião amanhã", "Promoção imperdível"]
+        assert [r["classification"] for r in results] == [
+            "productive",
+            "unproductive",
+            "productive",
+            "unproductive",
+            "unproductive",
+        ]
+        assert results[3]["processing_details"]["method"] == "fallback_default"
+
+    def test_results_are_cached_for_single_and_batch_calls(self, service, api_calls):
+        """Resultados do lote são gravados no cache com set_many."""
+        service.classify_email_texts(["Reunião amanhã", "Promoção imperdível"])
+        api_calls.clear()
+
+        assert service.classify_email_texts(["Promoção imperdível", "Reunião amanhã"])[1]["classification"] == "productive"
+        assert service.classify_email_text("Reunião amanhã")["classification"] == "productive"
+        assert api_calls == []
+
+    def test_chunks_are_bounded(self, service, api_calls):
+        """Lotes respeitam limite de itens e de caracteres."""
+        service.batch_size = 2
+        service.batch_max_chars = 30
+        emails = [f"email número {i} " + "x" * (20 if i == 3 else 0) for i in range(5)]
+
+        results = service.classify_email_texts(emails)
+
+        assert len(results) == 5
+        assert [len(call["inputs"]) for call in api_calls] == [2, 1, 1, 1]
+
+    def test_api_failure_falls_back_per_text(self, service, monkeypatch):
+        """Erro na API usa o fallback heurístico para cada texto do lote."""
+
+        def failing_post(*args, **kwargs):
+            return FakeResponse({"error": "boom"}, status_code=500)
+
+        monkeypatch.setattr(get_http_session(), "post", failing_post)
+        results = service.classify_email_texts(["Reunião sobre o projeto e o relatório", "oi"])
+
+        assert [r["processing_details"]["method"] for r in results] == ["heuristic_enhanced", "heuristic_enhanced"]
+
+
+class TestHTTPClient:
+    """Testes da sessão HTTP compartilhada."""
+
+    def test_session_is_reused_within_process(self):
+        """A mesma sessão (e pool) é usada por todas as chamadas do processo."""
+        assert get_http_session() is get_http_session()
+
+    def test_session_is_recreated_after_fork(self, monkeypatch):
+        """Um novo PID (fork) recebe uma sessão própria."""
+        import os
+
+        parent_session = get_http_session()
+        monkeypatch.setattr(os, "getpid", lambda: -1)
+
+        assert get_http_session() is not parent_session
+
+    def test_separate_connect_and_read_timeouts(self):
+        """Timeout é uma tupla (connect, read)."""
+        from django.conf import settings
+
+        from apps.classifier.http_client import http_timeout
+
+        assert http_timeout(12) == (settings.AI_SETTINGS["AI_HTTP_CONNECT_TIMEOUT"], 12)
+
+
+class TestAsyncPipeline:
+    """Testes do pipeline assíncrono."""
+
+    def test_async_classification_matches_sync(self, service, async_api_calls, api_calls):
+        """A versão assíncrona usa a API via httpx e o mesmo processamento da síncrona."""
+        result = asyncio.run(service.aclassify_email_text("Reunião amanhã"))
+
+        assert len(async_api_calls) == 1
+        assert api_calls == []
+        assert result["classification"] == "productive"
+        assert service.classify_email_text("Reunião amanhã") == result
+
+    def test_concurrent_calls_share_the_event_loop(self, service, async_api_calls):
+        """Várias classificações ficam em voo ao mesmo tempo."""
+
+        async def classify_all():
+            return await asyncio.gather(*(service.aclassify_email_text(f"Reunião {i}") for i in range(20)))
+
+        results = asyncio.run(classify_all())
+
+        assert len(async_api_calls) == 20
+        assert {r["classification"] for r in results} == {"productive"}
+
+    def test_async_api_failure_falls_back(self, service, monkeypatch):
+        """Erro de conexão no httpx cai no fallback heurístico."""
+        import httpx
+
+        from apps.classifier import ai_service as ai_service_module
+
+        def handler(request):
+            raise httpx.ConnectError("offline", request=request)
+
+        monkeypatch.setattr(
+            ai_service_module, "get_async_http_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        )
+        result = asyncio.run(service.aclassify_email_text("Reunião sobre o projeto"))
+
+        assert result["processing_details"]["method"] == "heuristic_enhanced"
+
+    @pytest.mark.django_db
+    def test_async_views_save_classification(self, service, async_api_calls, client):
+        """As views assíncronas classificam e salvam o email."""
+        from apps.classifier.models import Classification
+
+        response = client.post(
+            "/api/classifier/async/classify/",
+            data={"subject": "Reunião", "content": "Reunião amanhã às 10h"},
+            content_type="application/json",
+        )
+        upload = client.post("/upload-ajax-async/", data={"subject": "Oferta", "content": "Promoção imperdível"})
+
+        assert response.status_code == 200
+        assert response.json()["category"] == "productive"
+        assert upload.json()["success"] is True
+        assert Classification.objects.count() == 2
+
+
+class TestCircuitBreaker:
+    """Testes do circuit breaker da API."""
+
+    @pytest.fixture
+    def failing_api(self, monkeypatch):
+        calls = []
+
+        def failing_post(url, headers=None, json=None, timeout=None):
+            calls.append(json)
+            return FakeResponse({"error": "down"}, status_code=503)
+
+        monkeypatch.setattr(get_http_session(), "post", failing_post)
+        monkeypatch.setattr("apps.classifier.ai_service.time.sleep", lambda seconds: None)
+        return calls
+
+    def test_trips_after_consecutive_failures(self, service, failing_api):
+        """O circuito abre após N falhas e para de chamar a API."""
+        service.circuit_breaker.failure_threshold = 2
+
+        first = service.classify_email_text("Reunião sobre o projeto")
+        calls_when_opened = len(failing_api)
+        second = service.classify_email_text("Outro email sobre o relatório")
+
+        assert calls_when_opened == 2
+        assert len(failing_api) == calls_when_opened
+        assert first["processing_details"]["method"] == second["processing_details"]["method"] == "heuristic_enhanced"
+        stats = service.get_stats()["circuit_breaker"]
+        assert stats["state"] == "open"
+        assert stats["short_circuits"] == 1
+        assert [t["to"] for t in stats["transitions"]] == ["open"]
+
+    def test_half_open_sends_single_probe(self, service, failing_api):
+        """Meio-aberto: um único teste; sucesso fecha o circuito."""
+        breaker = service.circuit_breaker
+        breaker.failure_threshold = 1
+        breaker.recovery_timeout = 0
+        service.classify_email_text("Reunião sobre o projeto")
+
+        assert breaker.state == "half_open"
+        assert breaker.acquire() is True
+        with pytest.raises(Exception):
+            breaker.acquire()
+
+        breaker.record_success()
+        assert breaker.state == "closed"
+        assert [t["to"] for t in breaker.get_stats()["transitions"]] == ["open", "half_open", "closed"]
+
+    def test_failed_probe_reopens(self, service, failing_api):
+        """Teste com falha reabre o circuito com uma única tentativa."""
+        breaker = service.circuit_breaker
+        breaker.failure_threshold = 1
+        breaker.recovery_timeout = 0
+        service.classify_email_text("Reunião sobre o projeto")
+        failing_api.clear()
+        breaker.recovery_timeout = 60
+
+        # Força meio-aberto / Force half-open
+        from django.core.cache import cache as django_cache
+
+        django_cache.set(breaker._opened_key, 0, None)
+        service.classify_email_text("Outro email")
+
+        assert len(failing_api) == 1
+        assert breaker.state == "open"
+
+    def test_success_on_closed_circuit_does_not_write(self, service, monkeypatch):
+        """Sucesso com o circuito fechado custa uma leitura; só zera as falhas quando há alguma."""
+        from apps.classifier import circuit_breaker as circuit_breaker_module
+
+        class CacheSpy:
+            def __init__(self, backend):
+                self.backend = backend
+                self.calls = []
+
+            def __getattr__(self, name):
+                self.calls.append(name)
+                return getattr(self.backend, name)
+
+        spy = CacheSpy(cache)
+        monkeypatch.setattr(circuit_breaker_module, "cache", spy)
+        breaker = service.circuit_breaker
+
+        breaker.record_success()
+        asyncio.run(breaker.arecord_success())
+        assert spy.calls == ["get_many", "aget_many"]
+
+        breaker.record_failure()
+        spy.calls.clear()
+        breaker.record_success()
+        assert spy.calls == ["get_many", "delete"]
+        assert breaker.get_stats()["consecutive_failures"] == 0
+
+    def test_async_pipeline_uses_async_breaker(self, service, monkeypatch):
+        """O caminho assíncrono usa as variantes ``a*`` e abre o circuito do mesmo jeito."""
+        import httpx
+
+        from apps.classifier import ai_service as ai_service_module
+
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(500, json={"error": "down"})
+
+        def sync_call(*args, **kwargs):
+            raise AssertionError("chamada síncrona ao circuit breaker dentro do event loop")
+
+        monkeypatch.setattr(
+            ai_service_module, "get_async_http_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        )
+        monkeypatch.setattr(service.circuit_breaker, "acquire", sync_call)
+        monkeypatch.setattr(service.circuit_breaker, "record_success", sync_call)
+        monkeypatch.setattr(service, "_record_backend_failure", sync_call)
+        service.circuit_breaker.failure_threshold = 2
+
+        first = asyncio.run(service.aclassify_email_text("Reunião sobre o projeto"))
+        second = asyncio.run(service.aclassify_email_text("Outro email sobre o relatório"))
+
+        assert len(calls) == 2
+        assert first["processing_details"]["method"] == second["processing_details"]["method"] == "heuristic_enhanced"
+        assert service.circuit_breaker.state == "open"
+        assert service.circuit_breaker.stats["short_circuits"] == 1
+
+
+class TestDeadlineBudget:
+    """Testes do orçamento de tempo por requisição."""
+
+    def test_budget_from_header_is_clamped(self, rf, settings):
+        """O header do cliente define o orçamento, limitado ao máximo configurado."""
+        from apps.classifier.deadline import Deadline
+
+        settings.AI_SETTINGS = {**settings.AI_SETTINGS, "AI_REQUEST_BUDGET": 15.0, "AI_REQUEST_BUDGET_MAX": 20.0}
+
+        assert Deadline.from_request(rf.post("/")).budget == 15.0
+        assert Deadline.from_request(rf.post("/", HTTP_X_REQUEST_DEADLINE_MS="2500")).budget == 2.5
+        assert Deadline.from_request(rf.post("/", HTTP_X_REQUEST_DEADLINE_MS="999999")).budget == 20.0
+        assert Deadline.from_request(rf.post("/", HTTP_X_REQUEST_DEADLINE_MS="abc")).budget == 15.0
+
+    def test_non_finite_or_non_positive_header_is_ignored(self, rf, settings):
+        """``nan``, ``inf`` e valores não positivos no header usam o orçamento padrão."""
+        from apps.classifier.deadline import Deadline
+
+        settings.AI_SETTINGS = {**settings.AI_SETTINGS, "AI_REQUEST_BUDGET": 15.0, "AI_REQUEST_BUDGET_MAX": 20.0}
+
+        for raw_value in ("nan", "inf", "-inf", "0", "-500"):
+            deadline = Deadline.from_request(rf.post("/", HTTP_X_REQUEST_DEADLINE_MS=raw_value))
+            assert deadline.budget == 15.0
+            assert deadline.to_dict()["budget_ms"] == 15000
+
+    @pytest.mark.parametrize("remaining", [5, 3.0, 2.999, 2.5, 1.0, 0.999])
+    def test_tiers_compared_against_their_own_budget(self, remaining, settings, monkeypatch):
+        """Cada camada só cabe se resta o seu orçamento mínimo."""
+        from apps.classifier import deadline as deadline_module
+
+        settings.AI_SETTINGS = {**settings.AI_SETTINGS, "AI_TIER_API_MIN_BUDGET": 1.0, "AI_TIER_LOCAL_MIN_BUDGET": 3.0}
+        monkeypatch.setattr(deadline_module.time, "monotonic", lambda: 100.0)
+        deadline = deadline_module.Deadline(remaining)
+
+        assert deadline_module.tier_fits(deadline, "local_model") == (remaining >= 3.0)
+        assert deadline_module.tier_fits(deadline, "api") == (remaining >= 1.0)
+        assert deadline_module.tier_fits(deadline, "heuristic")
+
+    def test_local_model_skipped_without_its_budget(self, service, monkeypatch):
+        """Com menos que ``AI_TIER_LOCAL_MIN_BUDGET``, o fallback não roda o modelo local."""
+        from apps.classifier import ai_service as ai_service_module
+        from apps.classifier.deadline import Deadline
+
+        calls = []
+        service.fallback_to_local = True
+        monkeypatch.setattr(ai_service_module, "local_engine_available", lambda engine: True)
+        monkeypatch.setattr(service, "_classify_with_linear_model", lambda texts: [None] * len(texts))
+        monkeypatch.setattr(service, "_classify_with_local_model", lambda text: calls.append(text))
+
+        result = service._classify_with_fallback("Olá, tudo bem?", Deadline(2.0))
+        assert calls == []
+        assert result["processing_details"]["tier"] == "heuristic"
+
+        service._classify_with_fallback("Olá, tudo bem?", Deadline(5.0))
+        assert calls == ["Olá, tudo bem?"]
+
+    def test_api_timeout_is_capped_by_remaining_budget(self, service, monkeypatch):
+        """Cada tentativa recebe só o tempo restante como timeout de leitura."""
+        from apps.classifier.deadline import Deadline
+
+        timeouts = []
+
+        def fake_post(url, headers=None, json=None, timeout=None):
+            timeouts.append(timeout)
+            return FakeResponse([scores_for(json["inputs"])])
+
+        monkeypatch.setattr(get_http_session(), "post", fake_post)
+        result = service.classify_email_text("Reunião amanhã", deadline=Deadline(5))
+
+        assert result["processing_details"]["tier"] == "api"
+        assert timeouts[0][1] <= 5
+
+    def test_cheaper_tier_when_budget_is_nearly_spent(self, service, api_calls):
+        """Sem orçamento para a API, a heurística é usada sem chamadas de rede."""
+        from apps.classifier.deadline import Deadline
+
+        result = service.classify_email_text("Reunião sobre o projeto", deadline=Deadline(0.1))
+
+        assert api_calls == []
+        assert result["processing_details"]["tier"] == "heuristic"
+
+    def test_retry_wait_beyond_budget_falls_back(self, service, monkeypatch):
+        """Espera de 503 que estouraria o orçamento vira fallback imediato."""
+        from apps.classifier.deadline import Deadline
+
+        sleeps = []
+        monkeypatch.setattr(get_http_session(), "post", lambda *a, **k: FakeResponse({"error": "loading"}, 503))
+        monkeypatch.setattr("apps.classifier.ai_service.time.sleep", sleeps.append)
+
+        result = service.classify_email_text("Reunião sobre o projeto", deadline=Deadline(1.5))
+
+        assert sleeps == []
+        assert result["processing_details"]["tier"] == "heuristic"
+        assert service.circuit_breaker.get_stats()["consecutive_failures"] == 1
+
+    @pytest.mark.django_db
+    def test_views_report_tier_and_budget(self, service, api_calls, rf):
+        """As views informam a camada usada e o orçamento restante."""
+        from apps.frontend.views import upload_ajax
+
+        request = rf.post(
+            "/upload-ajax/",
+            data=json.dumps({"subject": "Reunião", "content": "Reunião sobre o projeto"}),
+            content_type="application/json",
+            HTTP_X_REQUEST_DEADLINE_MS="100",
+        )
+        data = json.loads(upload_ajax(request).content)
+
+        assert data["success"] is True
+        assert data["tier"] == "heuristic"
+        assert data["budget"]["budget_ms"] == 100
+        assert api_calls == []
+
+
+class TestProvisionalMode:
+    """Testes do modo "responde agora, refina depois"."""
+
+    @pytest.fixture
+    def loading_api(self, monkeypatch):
+        sleeps = []
+        monkeypatch.setattr(
+            get_http_session(), "post", lambda *a, **k: FakeResponse({"error": "loading", "estimated_time": 42.0}, 503)
+        )
+        monkeypatch.setattr("apps.classifier.ai_service.time.sleep", sleeps.append)
+        return sleeps
+
+    def test_503_returns_provisional_without_waiting(self, service, loading_api):
+        """Com 503, o fallback é retornado na hora e marcado como provisório."""
+        result = service.classify_email_text("Reunião sobre o projeto", provisional=True)
+
+        assert loading_api == []
+        assert result["processing_details"]["provisional"] is True
+        assert result["processing_details"]["refine_after"] == 42.0
+
+    @pytest.mark.django_db
+    def test_refinement_updates_row_in_place(self, service, api_calls, monkeypatch):
+        """O refinamento reclassifica via API e atualiza a linha provisória."""
+        from apps.classifier import ai_service as ai_service_module
+        from apps.classifier.models import Email
+        from apps.classifier.refinement import refine_classification
+
+        monkeypatch.setattr(ai_service_module, "_ai_service_instance", service)
+        email = Email.objects.create(
+            subject="Reunião", content="amanhã", classification_result="unproductive", processing_status="provisional"
+        )
+
+        assert refine_classification(email.id, "Reunião\n\namanhã") is True
+
+        email.refresh_from_db()
+        assert email.processing_status == "completed"
+        assert email.classification_result == "productive"
+        assert email.ai_model_used == "ai-huggingface_api"
+
+    @pytest.mark.django_db
+    def test_upload_persists_provisional_and_enqueues(self, service, loading_api, rf, monkeypatch):
+        """O upload salva o resultado provisório e agenda o refinamento."""
+        from apps.classifier import ai_service as ai_service_module
+        from apps.classifier.models import Email
+        from apps.frontend import views as frontend_views
+
+        scheduled = []
+        monkeypatch.setattr(ai_service_module, "_ai_service_instance", service)
+        monkeypatch.setattr(frontend_views, "refine_later", lambda *args: scheduled.append(args))
+
+        request = rf.post(
+            "/upload-ajax/",
+            data=json.dumps({"subject": "Reunião", "content": "Reunião sobre o projeto"}),
+            content_type="application/json",
+        )
+        data = json.loads(frontend_views.upload_ajax(request).content)
+
+        assert data["processing_status"] == "provisional"
+        assert Email.objects.get(pk=data["email_id"]).processing_status == "provisional"
+        assert scheduled == [(data["email_id"], "Reunião", "Reunião sobre o projeto", 42.0)]
+
+    def test_delayed_refinements_do_not_hold_pool_workers(self):
+        """Esperas ficam na fila com prazo: um refinamento imediato roda enquanto outro aguarda."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        from apps.classifier.refinement import DelayedQueue
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        queue = DelayedQueue(max_pending=10, executor=lambda: executor)
+        started = time.monotonic()
+
+        later = queue.submit(0.3, time.monotonic)
+        now = queue.submit(0, time.monotonic)
+
+        assert now.result(timeout=1) - started < 0.2
+        assert later.result(timeout=2) - started >= 0.3
+        assert queue.pending == 0
+        executor.shutdown()
+
+    def test_refinement_backlog_is_bounded(self, settings, monkeypatch):
+        """Com a fila cheia, novos refinamentos são descartados e contados."""
+        from apps.classifier import refinement
+
+        monkeypatch.setattr(refinement, "_queue", refinement.DelayedQueue(max_pending=1))
+        monkeypatch.setitem(refinement.stats, "dropped", 0)
+
+        assert refinement.enqueue_refinement(1, "texto", delay=60) is not None
+        assert refinement.enqueue_refinement(2, "texto", delay=60) is None
+        assert refinement.stats["dropped"] == 1
+
+
+class TestWarmUp:
+    """Testes da construção sem rede e do warm-up."""
+
+    def test_construction_does_no_network_io(self, monkeypatch, settings):
+        """Construir o service não chama a API, mesmo com token."""
+        settings.AI_SETTINGS = {**settings.AI_SETTINGS, "HUGGINGFACE_API_TOKEN": "hf_test"}
+
+        def fail(*args, **kwargs):
+            raise AssertionError("chamada de rede na construção")
+
+        monkeypatch.setattr(get_http_session(), "head", fail)
+        monkeypatch.setattr(get_http_session(), "post", fail)
+
+        AIClassificationService()
+
+    def test_connectivity_result_is_cached(self, monkeypatch, settings):
+        """O resultado do HEAD fica no cache e é reutilizado."""
+        cache.clear()
+        settings.AI_SETTINGS = {**settings.AI_SETTINGS, "HUGGINGFACE_API_TOKEN": "hf_test"}
+        heads = []
+        monkeypatch.setattr(get_http_session(), "head", lambda *a, **k: heads.append(a) or FakeResponse({}, 200))
+        service = AIClassificationService()
+
+        assert service.connectivity_status() is None
+        service.warm_up(background=False)
+        service.warm_up(background=False)
+        AIClassificationService().check_connectivity()
+
+        assert len(heads) == 1
+        assert service.get_stats()["connectivity"]["ok"] is True
+
+
+class TestLazyImports:
+    """Testes do import adiado do transformers."""
+
+    def test_module_import_does_not_load_transformers(self):
+        """Importar o ai_service não carrega o transformers."""
+        import os
+        import subprocess
+        import sys
+
+        script = "import django, sys; django.setup(); import apps.classifier.ai_service; print('transformers' in sys.modules)"
+        completed = subprocess.run(
+            [sys.executable, "-c", script],
+            env={**os.environ, "DJANGO_SETTINGS_MODULE": "core.settings.base"},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+        assert completed.stdout.strip().splitlines()[-1] == "False"
+
+
+class TestLocalEngines:
+    """Testes da seleção do engine local."""
+
+    def test_engine_selected_from_settings(self, monkeypatch, settings):
+        """``AI_LOCAL_ENGINE`` escolhe o engine e o mapeamento de rótulos é o mesmo."""
+        from apps.classifier import local_engines
+
+        class FakeEngine:
+            name = "fake"
+
+            def __init__(self, model_name):
+                self.model_name = model_name
+
+            def __call__(self, text):
+                return self.classify_batch([text])
+
+            def classify_batch(self, texts):
+                return [[{"label": "NEGATIVE", "score": 0.8}, {"label": "POSITIVE", "score": 0.2}] for _ in texts]
+
+        monkeypatch.setitem(local_engines.ENGINES, "fake", FakeEngine)
+        settings.AI_SETTINGS = {**settings.AI_SETTINGS, "AI_LOCAL_ENGINE": "fake"}
+        service = AIClassificationService()
+
+        result = service._classify_with_local_model("Olá, tudo bem?")
+
+        assert result["classification"] == "unproductive"
+        assert result["confidence"] == 0.8
+        assert result["processing_details"]["engine"] == "fake"
+        assert service._local_classifier.model_name == service.backup_model
+
+    def test_invalid_engine_is_rejected(self):
+        """Engine desconhecido gera erro claro."""
+        from apps.classifier.local_engines import load_local_engine
+
+        with pytest.raises(ValueError, match="AI_LOCAL_ENGINE"):
+            load_local_engine("modelo", "tensorflow")
+
+    def test_onnx_engine_never_exports_on_the_request_path(self, monkeypatch, tmp_path):
+        """Sem o arquivo exportado o engine fica indisponível e aponta o comando de exportação."""
+        from apps.classifier import local_engines
+
+        monkeypatch.setattr(local_engines, "ONNXRUNTIME_AVAILABLE", True)
+        monkeypatch.setattr(local_engines, "TRANSFORMERS_AVAILABLE", True)
+        monkeypatch.setattr(local_engines, "export_onnx_model", lambda *args, **kwargs: pytest.fail("exportou na requisição"))
+
+        with pytest.raises(local_engines.LocalEngineUnavailable, match="export_onnx_model"):
+            local_engines.OnnxEngine("modelo", model_dir=tmp_path, quantize=True)
+
+
+class TestMicroBatcher:
+    """Testes do micro-batching do modelo local."""
+
+    class SlowEngine:
+        name = "slow"
+        model_name = "modelo"
+
+        def __init__(self):
+            self.batches = []
+
+        def classify_batch(self, texts):
+            self.batches.append(list(texts))
+            time.sleep(0.02)
+            return [[{"label": "POSITIVE", "score": len(text) / 100}] for text in texts]
+
+    def test_concurrent_calls_share_a_batch(self):
+        """Chamadas concorrentes viram poucos lotes e cada uma recebe o próprio resultado."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        from apps.classifier.micro_batcher import MicroBatcher
+
+        engine = self.SlowEngine()
+        batcher = MicroBatcher(engine, max_batch_size=4, max_wait_ms=50)
+        texts = ["x" * size for size in range(1, 9)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(batcher, texts))
+
+        assert [result[0][0]["score"] for result in results] == [len(text) / 100 for text in texts]
+        assert len(engine.batches) < len(texts)
+        assert max(len(batch) for batch in engine.batches) <= 4
+
+        stats = batcher.get_stats()
+        assert stats["items"] == 8
+        assert 0 < stats["fill_ratio"] <= 1
+        assert stats["queue_wait_max_ms"] >= stats["avg_queue_wait_ms"]
+
+    def test_batch_error_reaches_every_caller(self):
+        """Erro no lote é repassado a todas as chamadas."""
+        from apps.classifier.micro_batcher import MicroBatcher
+
+        class BrokenEngine(self.SlowEngine):
+            def classify_batch(self, texts):
+                raise RuntimeError("modelo quebrado")
+
+        batcher = MicroBatcher(BrokenEngine(), max_batch_size=2, max_wait_ms=1)
+
+        with pytest.raises(RuntimeError, match="modelo quebrado"):
+            batcher("Olá")
+        assert batcher.get_stats()["errors"] == 1
+
+    def test_missing_results_fail_instead_of_hanging(self):
+        """Um lote com menos resultados que textos falha as chamadas que ficaram sem resposta."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        from apps.classifier.micro_batcher import MicroBatcher
+
+        class ShortEngine(self.SlowEngine):
+            def classify_batch(self, texts):
+                return super().classify_batch(texts)[:1]
+
+        batcher = MicroBatcher(ShortEngine(), max_batch_size=2, max_wait_ms=200, timeout=5)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(batcher, text) for text in ("a", "bb")]
+        outcomes = [future.exception() for future in futures]
+
+        assert sum(outcome is None for outcome in outcomes) == 1
+        assert any(isinstance(outcome, RuntimeError) for outcome in outcomes)
+
+    def test_caller_waits_at_most_the_timeout(self):
+        """Sem resposta do engine, a chamada desiste depois do timeout."""
+        import threading
+
+        from apps.classifier.micro_batcher import MicroBatcher
+
+        release = threading.Event()
+
+        class StuckEngine(self.SlowEngine):
+            def classify_batch(self, texts):
+                release.wait(5)
+                return super().classify_batch(texts)
+
+        batcher = MicroBatcher(StuckEngine(), max_batch_size=1, max_wait_ms=1, timeout=0.05)
+        started = time.monotonic()
+        try:
+            with pytest.raises(TimeoutError):
+                batcher("Olá")
+        finally:
+            release.set()
+        assert time.monotonic() - started < 1
+
+
+class TestLocalModelServer:
+    """Testes do servidor de modelo local por socket Unix."""
+
+    @pytest.fixture
+    def model_server(self, tmp_path):
+        import threading
+
+        from apps.classifier.local_model_server import LocalModelServer
+        from apps.classifier.micro_batcher import MicroBatcher
+
+        engine = TestMicroBatcher.SlowEngine()
+        server = LocalModelServer(str(tmp_path / "model.sock"), MicroBatcher(engine, max_batch_size=8, max_wait_ms=20))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        yield server, engine
+        server.shutdown()
+        server.server_close()
+
+    def test_pipelined_requests_share_one_model(self, model_server):
+        """Pedidos em voo na mesma conexão voltam casados pelo id e em lotes."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        from apps.classifier.local_model_server import LocalModelClient
+
+        server, engine = model_server
+        client = LocalModelClient("modelo", socket_path=server.server_address, timeout=5)
+        texts = ["x" * size for size in range(1, 9)]
+
+        assert [scores[0]["score"] for scores in client.classify_batch(texts)] == [len(text) / 100 for text in texts]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(client, texts))
+
+        assert [result[0][0]["score"] for result in results] == [len(text) / 100 for text in texts]
+        assert server.stats["requests"] == 16
+        assert len(engine.batches) < 16
+        client.close()
+
+    def test_timed_out_requests_are_forgotten(self, tmp_path):
+        """Pedidos cujo cliente desistiu saem de ``_pending``."""
+        import socket
+        from concurrent.futures import TimeoutError as FutureTimeoutError
+
+        from apps.classifier.local_model_server import LocalModelClient
+
+        # Servidor que aceita e nunca responde
+        silent = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        silent.bind(str(tmp_path / "mudo.sock"))
+        silent.listen()
+        client = LocalModelClient("modelo", socket_path=str(tmp_path / "mudo.sock"), timeout=0.1)
+
+        with pytest.raises(FutureTimeoutError):
+            client("Olá")
+        with pytest.raises(FutureTimeoutError):
+            client.classify_batch(["a", "b", "c"])
+
+        assert client._pending == {}
+        client.close()
+        silent.close()
+
+    def test_unavailable_server_raises(self, tmp_path):
+        """Sem servidor, o cliente falha com erro próprio (o service cai na heurística)."""
+        from apps.classifier.local_model_server import LocalModelClient, LocalModelServerError
+
+        client = LocalModelClient("modelo", socket_path=str(tmp_path / "ausente.sock"), timeout=1)
+
+        with pytest.raises(LocalModelServerError):
+            client("Olá")
+
+
+class TestPrefork:
+    """Testes do warm-up pré-fork e da limpeza pós-fork."""
+
+    def test_warm_up_builds_service_without_threads(self, monkeypatch):
+        """O warm-up constrói o service no master sem iniciar threads."""
+        import gc
+        import threading
+
+        from apps.classifier import ai_service
+        from apps.classifier.prefork import warm_up_before_fork
+
+        monkeypatch.setattr(ai_service, "_ai_service_instance", None)
+        threads_before = threading.active_count()
+        try:
+            report = warm_up_before_fork()
+        finally:
+            gc.unfreeze()
+
+        assert ai_service._ai_service_instance is not None
+        assert threading.active_count() == threads_before
+        assert "apps.classifier.views" in report["modules"]
+        assert report["lexicons"]
+
+    def test_reset_after_fork_drops_shared_state(self, monkeypatch):
+        """Depois do fork, sessão HTTP e gerador aleatório são novos."""
+        import random
+
+        from apps.classifier import ai_service
+        from apps.classifier.prefork import reset_after_fork
+
+        monkeypatch.setattr(ai_service, "_ai_service_instance", None)
+        session = get_http_session()
+        random.seed(42)
+        state = random.getstate()
+
+        reset_after_fork()
+
+        assert get_http_session() is not session
+        assert random.getstate() != state
+
+
+class TestTokenAwareInput:
+    """Testes do truncamento por tokens e do modo de emails longos."""
+
+    def test_truncation_fills_token_budget(self, settings):
+        """O texto é cortado no orçamento de tokens, sem o antigo limite de 400 caracteres."""
+        settings.AI_SETTINGS = {**settings.AI_SETTINGS, "AI_MAX_INPUT_TOKENS": 50, "AI_TOKENIZER": "approximate"}
+        service = AIClassificationService()
+
+        short = "palavra " * 20  # 2 tokens por palavra na estimativa
+        long = "palavra " * 200
+
+        assert service._preprocess_text(short) == short.strip()
+        processed = service._preprocess_text(long)
+        assert processed.split() == ["palavra"] * 25
+        assert not processed.endswith("...")
+
+    def test_long_email_windows_in_one_call(self, settings, api_calls):
+        """Emails longos viram janelas sobrepostas em uma única chamada, com voto ponderado."""
+        cache.clear()
+        settings.AI_SETTINGS = {
+            **settings.AI_SETTINGS,
+            "AI_MAX_INPUT_TOKENS": 40,
+            "AI_TOKENIZER": "approximate",
+            "AI_LONG_EMAIL_MODE": True,
+            "AI_LONG_EMAIL_OVERLAP": 10,
+            "AI_LONG_EMAIL_MAX_WINDOWS": 4,
+        }
+        service = AIClassificationService()
+        email = "Olá equipe, " + "segue o texto " * 20 + "reunião amanhã " * 20
+
+        result = service.classify_email_text(email)
+
+        assert len(api_calls) == 1
+        windows = api_calls[0]["inputs"]
+        assert isinstance(windows, list) and 1 < len(windows) <= 4
+        assert result["processing_details"]["windows"] == len(windows)
+        assert set(result["processing_details"]["window_votes"]) == {"productive", "unproductive"}
+        assert 0 < result["confidence"] <= 1
+
+    def test_request_path_never_loads_tokenizer(self, service, settings, monkeypatch):
+        """O tokenizer real só é carregado no warm-up, de arquivos locais; a requisição usa a estimativa."""
+        import sys
+        import types
+
+        from apps.classifier import tokenization
+
+        calls = []
+
+        class FakeTokenizer:
+            is_fast = True
+
+        def from_pretrained(source, **kwargs):
+            calls.append((source, kwargs))
+            return FakeTokenizer()
+
+        monkeypatch.setitem(
+            sys.modules,
+            "transformers",
+            types.SimpleNamespace(AutoTokenizer=types.SimpleNamespace(from_pretrained=from_pretrained)),
+        )
+        monkeypatch.setattr(tokenization, "TRANSFORMERS_AVAILABLE", True)
+        monkeypatch.setattr(tokenization, "_tokenizers", {})
+        monkeypatch.setattr(service, "check_connectivity", lambda: None)
+
+        assert settings.AI_SETTINGS["AI_TOKENIZER"] == "approximate"
+        assert tokenization.load_tokenizer(service.classification_model) is None
+
+        settings.AI_SETTINGS = {**settings.AI_SETTINGS, "AI_TOKENIZER": "local"}
+        service._preprocess_text("Reunião amanhã às 10h")
+        assert calls == []
+
+        service._warm_up()
+        assert calls == [(service.classification_model, {"use_fast": True, "local_files_only": True})]
+        assert isinstance(tokenization.get_tokenizer(service.classification_model), FakeTokenizer)
@@ -0,0 +1,39 @@
+"""Testes das chaves de cache canônicas e versionadas."""
+
+from django.core.cache import cache
+
+from apps.classifier.ai_service import AIClassificationService
+
+
+class TestCacheKeys:
+    """Testes das chaves de cache canônicas e versionadas."""
+
+    def test_trivial_copies_share_a_key(self, service):
+        """Espaços, caixa e respostas citadas não mudam a chave."""
+        original = "Reunião amanhã às 10h\n\nAtt, Ana"
+        copy = (
+            "  REUNIÃO   amanhã às 10h\nAtt, ana\n\n"
+            "Em seg, 1 de jan de 2024 às 09:00, Bob <bob@x.com> escreveu:\n> Podemos marcar?\n"
+        )
+
+        key = service._get_cache_key("classify", original)
+
+        assert key == service._get_cache_key("classify", copy)
+        assert key != service._get_cache_key("classify", "Reunião amanhã às 11h")
+        assert len(key.rsplit(":", 1)[1]) == 32  # 128 bits
+
+    def test_namespace_follows_model_config(self, settings, service):
+        """Trocar o modelo muda o namespace e, com ele, todas as chaves."""
+        settings.AI_SETTINGS = {**settings.AI_SETTINGS, "CLASSIFICATION_MODEL": "outro/modelo"}
+        other = AIClassificationService()
+
+        assert other.cache_namespace != service.cache_namespace
+        assert other._get_cache_key("classify", "Olá") != service._get_cache_key("classify", "Olá")
+
+    def test_quoted_copy_hits_the_cache(self, service, api_calls):
+        """Uma cópia com histórico citado é servida do cache."""
+        service.classify_email_text("Reunião amanhã às 10h")
+        result = service.classify_email_text("reunião amanhã às 10h\n> mensagem anterior citada")
+
+        assert len(api_calls) == 1
+        assert result["classification"] == "productive"
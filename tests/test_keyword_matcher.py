@@ -0,0 +1,52 @@
+"""Testes do matcher de palavras-chave."""
+
+import random
+
+import pytest
+
+from apps.classifier.keyword_matcher import KeywordMatcher
+
+
+def naive_count(keywords, text):
+    return sum(1 for kw in keywords if kw in text)
+
+
+class TestKeywordMatcher:
+    """Testes do matcher compilado."""
+
+    def test_counts_match_substring_scans(self):
+        """Contagens idênticas às varreduras ``kw in text``, inclusive sobreposições."""
+        from apps.classifier.lexicon import HEURISTIC_LEXICON
+
+        productive = HEURISTIC_LEXICON.categories["productive"]
+        unproductive = HEURISTIC_LEXICON.categories["unproductive"]
+
+        rng = random.Random(7)
+        alphabet = list("abcdefghijklmnopqrstuvwxyz ãçéó🎉") + list(productive + unproductive)
+        for _ in range(200):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 80)))
+            counts = HEURISTIC_LEXICON.matcher.count(text)
+            assert counts["productive"] == naive_count(productive, text)
+            assert counts["unproductive"] == naive_count(unproductive, text)
+
+    def test_nested_and_repeated_keywords(self):
+        """Palavras aninhadas e repetidas contam como no algoritmo original."""
+        matcher = KeywordMatcher({"a": ["result", "resultado", "spam", "spam"], "b": ["sult", "ado"]})
+        matches = matcher.scan("o resultado do spam")
+
+        assert matches.counts == {"a": 4, "b": 2}
+        assert matches.offsets["a"] == [(2, "result"), (2, "resultado"), (15, "spam")]
+        assert matches.keywords("b") == ["sult", "ado"]
+
+    def test_offsets_for_every_occurrence(self):
+        """Todas as ocorrências são retornadas, mas contadas uma vez."""
+        matcher = KeywordMatcher({"productive": ["call"]})
+        matches = matcher.scan("call me, recall the call")
+
+        assert matches.count("productive") == 1
+        assert [start for start, _ in matches.offsets["productive"]] == [0, 11, 20]
+
+    def test_empty_keyword_is_rejected(self):
+        """Palavra-chave vazia é inválida."""
+        with pytest.raises(ValueError):
+            KeywordMatcher({"productive": [""]})
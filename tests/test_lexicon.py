@@ -0,0 +1,81 @@
+"""Testes do registro compartilhado de léxicos."""
+
+import pytest
+
+from apps.classifier.lexicon import (
+    BASIC_LEXICON,
+    DIRECT_LEXICON,
+    FRONTEND_LEXICON,
+    Lexicon,
+    all_lexicons,
+    get_lexicon,
+    lexicon_stats,
+)
+
+
+class TestLexiconRegistry:
+    """Testes do registro e dos pesos dos léxicos."""
+
+    def test_registry_lookup(self):
+        """Todos os léxicos são registrados e recuperáveis pelo nome."""
+        names = {lexicon.name for lexicon in all_lexicons()}
+
+        assert {"heuristic", "basic", "direct", "frontend"} <= names
+        assert get_lexicon("direct") is DIRECT_LEXICON
+        with pytest.raises(KeyError):
+            get_lexicon("inexistente")
+
+    def test_weights_preserve_legacy_duplicates(self):
+        """Palavras repetidas nas listas antigas mantêm peso 2."""
+        assert BASIC_LEXICON.count("deadline amanhã")["productive"] == 2
+        assert DIRECT_LEXICON.count("marketing e spam")["unproductive"] == 4
+
+    def test_union_of_content_and_subject(self):
+        """Palavra no assunto ou no conteúdo conta uma vez, sem casar através da junção."""
+        assert FRONTEND_LEXICON.count("segue o report", "report semanal")["productive"] == 1
+        assert FRONTEND_LEXICON.count("click", "here")["unproductive"] == 0
+
+    def test_fingerprint_tracks_version_and_weights(self):
+        """A impressão digital muda com versão ou pesos."""
+        base = Lexicon("x", "1.0", {"a": ("um", "dois")})
+
+        assert Lexicon("x", "1.0", {"a": ("um", "dois")}).fingerprint == base.fingerprint
+        assert Lexicon("x", "1.1", {"a": ("um", "dois")}).fingerprint != base.fingerprint
+        assert Lexicon("x", "1.0", {"a": ("um", "dois")}, weights={"a": {"um": 3}}).fingerprint != base.fingerprint
+
+    def test_scoring_cost_is_measured(self):
+        """Cada varredura é contabilizada nas estatísticas."""
+        before = BASIC_LEXICON.scans
+        BASIC_LEXICON.count("reunião")
+
+        assert BASIC_LEXICON.scans == before + 1
+        assert lexicon_stats()[BASIC_LEXICON.key]["scans"] == before + 1
+
+
+class TestCallSites:
+    """Os pontos de uso continuam com o mesmo resultado."""
+
+    def test_direct_and_standalone_agree(self):
+        """Classificação direta e standalone usam o mesmo léxico."""
+        from apps.ai_standalone.views import classify_heuristic
+        from apps.classifier.direct_ai import classify_heuristic_direct
+
+        text = "Promoção imperdível com desconto grátis, compre agora!"
+        assert classify_heuristic(text) == classify_heuristic_direct(text)
+        assert classify_heuristic_direct(text) == {"classification": "unproductive", "confidence": 0.8}
+
+    def test_basic_classification(self):
+        """Classificação básica conta indicadores do léxico básico."""
+        from apps.classifier.services import classify_email_basic
+
+        result = classify_email_basic("Reunião sobre o projeto e o relatório")
+        assert result["category"] == "productive"
+        assert result["keywords_found"] == 3
+
+    def test_frontend_keywords(self):
+        """Fallback do frontend considera assunto e conteúdo."""
+        from apps.frontend.views import analyze_content_keywords
+
+        assert analyze_content_keywords("vamos conversar", "Reunião do projeto") == "productive"
+        assert analyze_content_keywords("free prize, click here", "") == "unproductive"
+        assert analyze_content_keywords("olá", "oi") == "neutral"
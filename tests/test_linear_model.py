@@ -0,0 +1,235 @@
+"""Testes do modelo linear TF-IDF e do treino incremental."""
+
+import asyncio
+import os
+
+from django.core.cache import cache
+
+import pytest
+
+from tests.helpers import PRODUCTIVE_SAMPLES, UNPRODUCTIVE_SAMPLES
+
+
+class TestLinearModel:
+    """Testes do modelo linear TF-IDF (train_classifier)."""
+
+    def test_trained_artifact_is_versioned(self, tmp_path):
+        """Cada treino grava uma versão nova; LATEST aponta para a última."""
+        from apps.classifier.linear_model import LinearEngine, latest_version, save_linear_model, train_linear_model
+
+        texts = [sample.format(n=n) for n in range(5) for sample in PRODUCTIVE_SAMPLES + UNPRODUCTIVE_SAMPLES]
+        labels = ["productive"] * 3 + ["unproductive"] * 3
+        pipeline, metrics = train_linear_model(texts, labels * 5)
+
+        first = save_linear_model(pipeline, metrics, tmp_path)
+        second = save_linear_model(pipeline, metrics, tmp_path)
+
+        assert first != second and first.exists()
+        assert latest_version(tmp_path) == second.name
+        assert metrics["holdout_accuracy"] >= 0.8
+
+        engine = LinearEngine(tmp_path)
+        scores = engine.classify_batch(["Relatório do contrato do cliente 9", "Feliz aniversário e parabéns"])
+        assert [batch[0]["label"] for batch in scores] == ["productive", "unproductive"]
+        assert engine.metadata["version"] == second.name
+
+    @pytest.mark.django_db
+    def test_fallback_uses_trained_model(self, service, settings, tmp_path):
+        """train_classifier treina com os emails gravados; o fallback usa o modelo antes do modelo local."""
+        from django.core.management import call_command
+
+        from apps.classifier.models import Email
+
+        for n in range(6):
+            for label, samples in (("productive", PRODUCTIVE_SAMPLES), ("unproductive", UNPRODUCTIVE_SAMPLES)):
+                for sample in samples:
+                    Email.objects.create(
+                        content=sample.format(n=n),
+                        classification_result=label,
+                        confidence_score=0.9,
+                        ai_model_used="ai-huggingface_api",
+                    )
+
+        call_command("train_classifier", output=str(tmp_path), min_samples=10, stdout=open(os.devnull, "w"))
+        settings.AI_SETTINGS = {**settings.AI_SETTINGS, "AI_LINEAR_MODEL_DIR": str(tmp_path)}
+        service.linear_min_confidence = 0.5  # poucos exemplos, probabilidades moderadas
+
+        results = service._classify_batch_with_fallback(["Parabéns pelo aniversário, felicidades", "Custos do contrato"])
+
+        assert [result["processing_details"]["method"] for result in results] == ["linear_model", "linear_model"]
+        assert [result["classification"] for result in results] == ["unproductive", "productive"]
+        assert service.get_stats()["linear_model"]["samples"] == 36
+
+    @staticmethod
+    def publish_model(settings, model_dir):
+        from apps.classifier.linear_model import save_linear_model, train_linear_model
+
+        texts = [sample.format(n=n) for n in range(6) for sample in PRODUCTIVE_SAMPLES + UNPRODUCTIVE_SAMPLES]
+        pipeline, metrics = train_linear_model(texts, (["productive"] * 3 + ["unproductive"] * 3) * 6)
+        save_linear_model(pipeline, metrics, model_dir)
+        settings.AI_SETTINGS = {**settings.AI_SETTINGS, "AI_LINEAR_MODEL_DIR": str(model_dir)}
+
+    def test_confident_linear_model_skips_the_api(self, service, settings, tmp_path, api_calls, async_api_calls):
+        """O modelo linear roda antes da API; confiável, dispensa a chamada nos caminhos síncrono, assíncrono e em lote."""
+        self.publish_model(settings, tmp_path)
+        service.linear_min_confidence = 0.5
+
+        result = service.classify_email_text("Parabéns pelo aniversário, felicidades")
+        async_result = asyncio.run(service.aclassify_email_text("Boas festas, feliz ano novo"))
+        batch = service.classify_email_texts(["Custos do contrato do fornecedor", "Feliz aniversário"])
+
+        assert api_calls == [] and async_api_calls == []
+        assert result["processing_details"]["method"] == "linear_model"
+        assert result["classification"] == "unproductive"
+        assert async_result["processing_details"]["method"] == "linear_model"
+        assert [item["processing_details"]["method"] for item in batch] == ["linear_model", "linear_model"]
+        assert [item["classification"] for item in batch] == ["productive", "unproductive"]
+
+    def test_uncertain_linear_model_goes_on_to_the_api(self, service, settings, tmp_path, api_calls):
+        """Abaixo da confiança mínima a classificação segue para a API."""
+        self.publish_model(settings, tmp_path)
+        service.linear_min_confidence = 1.01
+
+        result = service.classify_email_text("Reunião sobre o contrato")
+        batch = service.classify_email_texts(["Reunião amanhã", "Feliz aniversário"])
+
+        assert len(api_calls) == 2
+        assert result["processing_details"]["method"] == "huggingface_api"
+        assert [item["processing_details"]["method"] for item in batch] == ["huggingface_api", "huggingface_api"]
+
+    @pytest.mark.django_db
+    def test_trains_only_on_api_and_human_labels(self, rf):
+        """Previsões do próprio modelo linear e das heurísticas não viram rótulos de treino; correções humanas sim."""
+        from django.contrib.admin.sites import site
+
+        from apps.classifier.linear_model import labeled_rows_since, training_data
+        from apps.classifier.models import Email
+
+        def create(content, model_used, confidence=0.95):
+            return Email.objects.create(
+                content=content, classification_result="productive", confidence_score=confidence, ai_model_used=model_used
+            )
+
+        create("api", "ai-huggingface_api")
+        create("api windows", "ai-huggingface_api_windows")
+        create("api incerta", "ai-huggingface_api", confidence=0.5)
+        for model_used in ("ai-linear_model", "ai-heuristic_enhanced", "ai-consensus_fallback", "huggingface-api"):
+            create(model_used, model_used)
+        corrected = create("corrigido no admin", "ai-linear_model", confidence=0.6)
+
+        # Correção pelo admin marca a linha como humana / A correction through the admin marks the row as human
+        corrected.classification_result = "unproductive"
+        form = type("Form", (), {"changed_data": ["classification_result"]})()
+        site._registry[Email].save_model(rf.post("/admin/"), corrected, form, change=True)
+
+        texts, labels = training_data(min_confidence=0.8)
+        assert sorted(texts) == ["api", "api windows", "corrigido no admin"]
+        assert labels[texts.index("corrigido no admin")] == "unproductive"
+        assert sorted(text for batch, _, _ in labeled_rows_since(None, 0.8) for text in batch) == sorted(texts)
+
+    def test_without_artifact_falls_through(self, service, settings, tmp_path):
+        """Sem modelo treinado o fallback segue como antes."""
+        settings.AI_SETTINGS = {**settings.AI_SETTINGS, "AI_LINEAR_MODEL_DIR": str(tmp_path)}
+
+        result = service._classify_with_fallback("Parabéns pelo aniversário")
+
+        assert result["processing_details"]["method"] != "linear_model"
+        assert service._classify_with_linear_model(["a", "b"]) == [None, None]
+
+
+class TestIncrementalLearning:
+    """Testes do treino incremental (hashing + SGD) e da troca a quente do modelo."""
+
+    @staticmethod
+    def create_emails(n_range):
+        from apps.classifier.models import Email
+
+        emails = []
+        for n in n_range:
+            for label, samples in (("productive", PRODUCTIVE_SAMPLES), ("unproductive", UNPRODUCTIVE_SAMPLES)):
+                for sample in samples:
+                    emails.append(
+                        Email.objects.create(
+                            content=sample.format(n=n),
+                            classification_result=label,
+                            confidence_score=0.9,
+                            ai_model_used="ai-huggingface_api",
+                        )
+                    )
+        return emails
+
+    @pytest.mark.django_db
+    def test_continues_from_watermark(self, tmp_path):
+        """Cada execução treina só as linhas novas ou corrigidas e publica uma versão filha."""
+        from django.core.management import call_command
+
+        from apps.classifier.linear_model import LinearEngine, OnlineModel, latest_version, load_trained_model
+
+        def train():
+            call_command(
+                "train_classifier", incremental=True, batch_size=4, output=str(tmp_path), stdout=open(os.devnull, "w")
+            )
+            return LinearEngine(tmp_path)
+
+        emails = self.create_emails(range(3))
+        first = train()
+        assert isinstance(load_trained_model(first.version, tmp_path)[0], OnlineModel)
+        assert first.mapped and first._pipeline.kind == "hashing"
+        assert first.metadata["new_samples"] == first.metadata["samples"] == 18
+        assert first.metadata["batches"] == 5
+
+        # Nada novo: nenhuma versão publicada
+        train()
+        assert latest_version(tmp_path) == first.version
+
+        # Uma correção humana e linhas novas
+        emails[0].classification_result = "unproductive"
+        emails[0].ai_model_used = "human"
+        emails[0].save()
+        self.create_emails([3])
+        second = train()
+
+        assert second.metadata["parent_version"] == first.version
+        assert second.metadata["new_samples"] == 7
+        assert second.metadata["samples"] == 25
+        assert second.metadata["progressive_accuracy"] is not None
+        assert second.metadata["watermark"]["id"] == emails[-1].id + 6
+
+    def test_workers_swap_to_published_version(self, service, settings, tmp_path):
+        """Uma versão publicada substitui a atual sem reiniciar; quem segura a antiga continua com ela."""
+        from apps.classifier.linear_model import OnlineModel, save_linear_model
+
+        settings.AI_SETTINGS = {**settings.AI_SETTINGS, "AI_LINEAR_MODEL_DIR": str(tmp_path)}
+        service.linear_check_interval = 0
+        texts = [sample.format(n=1) for sample in PRODUCTIVE_SAMPLES + UNPRODUCTIVE_SAMPLES]
+        labels = ["productive"] * 3 + ["unproductive"] * 3
+
+        first = save_linear_model(OnlineModel().partial_fit(texts, labels), {"mode": "incremental"}, tmp_path)
+        old_engine = service._get_linear_model()
+        assert old_engine.version == first.name
+
+        second = save_linear_model(OnlineModel().partial_fit(texts, labels), {"mode": "incremental"}, tmp_path)
+        new_engine = service._get_linear_model()
+
+        assert new_engine.version == second.name
+        assert old_engine.classify_batch(texts[:1])[0][0]["label"] in ("productive", "unproductive")
+
+        # Versão publicada inexistente neste disco: mantém a atual
+        cache.set("ai:linear_model:version", "inexistente", None)
+        assert service._get_linear_model() is new_engine
+
+    def test_only_the_configured_directory_is_published(self, settings, tmp_path):
+        """Treinar com ``--output`` em outro diretório não anuncia a versão aos workers."""
+        from apps.classifier.linear_model import VERSION_CACHE_KEY, OnlineModel, published_version, save_linear_model
+
+        settings.AI_SETTINGS = {**settings.AI_SETTINGS, "AI_LINEAR_MODEL_DIR": str(tmp_path / "serving")}
+        cache.clear()
+        texts = [sample.format(n=1) for sample in PRODUCTIVE_SAMPLES + UNPRODUCTIVE_SAMPLES]
+        model = OnlineModel().partial_fit(texts, ["productive"] * 3 + ["unproductive"] * 3)
+
+        save_linear_model(model, {"mode": "incremental"}, tmp_path / "experiment")
+        assert cache.get(VERSION_CACHE_KEY) is None
+        assert published_version() is None
+
+        serving = save_linear_model(model, {"mode": "incremental"}, tmp_path / "serving")
+        assert cache.get(VERSION_CACHE_KEY) == serving.name
@@ -0,0 +1,69 @@
+"""Testes dos histogramas de latência e do endpoint /metrics."""
+
+from django.core.cache import cache
+
+import pytest
+
+
+class TestMetrics:
+    """Testes dos histogramas de latência e do endpoint /metrics."""
+
+    def test_histogram_buckets_are_cumulative_across_workers(self):
+        """Os buckets são acumulados e somam as observações de todos os workers."""
+        from apps.classifier.metrics import Histogram, _registry
+
+        cache.clear()
+        worker_a = Histogram("teste_duration_seconds", "Teste.", "stage", ["api_call"], buckets=(0.1, 1.0))
+        worker_b = Histogram("teste_duration_seconds", "Teste.", "stage", ["api_call"], buckets=(0.1, 1.0))
+        _registry.remove(worker_a)
+        _registry.remove(worker_b)
+
+        worker_a.observe("api_call", 0.05)
+        worker_a.observe("api_call", 0.5)
+        worker_b.observe("api_call", 3.0)
+        worker_a.counters.flush()
+        worker_b.counters.flush()
+
+        summary = worker_a.summary("api_call")
+        assert summary["buckets"] == [(0.1, 1), (1.0, 2), ("+Inf", 3)]
+        assert summary["count"] == 3
+        assert summary["sum"] == pytest.approx(3.55)
+
+        with pytest.raises(ValueError):
+            worker_a.observe("desconhecida", 1.0)
+
+    def test_classification_records_stages_and_backend(self, service, api_calls):
+        """Uma classificação registra as etapas e o backend; a repetição conta como cache."""
+        from apps.classifier.metrics import BACKEND_LATENCY, STAGE_LATENCY
+
+        def counts():
+            return {
+                "cache_lookup": STAGE_LATENCY.summary("cache_lookup")["count"],
+                "api_call": STAGE_LATENCY.summary("api_call")["count"],
+                "huggingface_api": BACKEND_LATENCY.summary("huggingface_api")["count"],
+                "cache": BACKEND_LATENCY.summary("cache")["count"],
+            }
+
+        before = counts()
+        service.classify_email_text("Reunião amanhã às 10h")
+        service.classify_email_text("Reunião amanhã às 10h")
+        after = counts()
+
+        assert after["cache_lookup"] - before["cache_lookup"] == 2
+        assert after["api_call"] - before["api_call"] == 1
+        assert after["huggingface_api"] - before["huggingface_api"] == 1
+        assert after["cache"] - before["cache"] == 1
+
+    def test_metrics_endpoint(self, client, settings):
+        """O endpoint expõe o formato de texto do Prometheus e pode ser desligado."""
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+        body = response.content.decode()
+        assert "# TYPE ai_pipeline_stage_duration_seconds histogram" in body
+        assert 'ai_pipeline_stage_duration_seconds_bucket{stage="db_save",le="+Inf"}' in body
+        assert "# TYPE ai_classifications_total counter" in body
+
+        settings.AI_SETTINGS = {**settings.AI_SETTINGS, "AI_METRICS_ENABLED": False}
+        assert client.get("/metrics").status_code == 404
@@ -0,0 +1,77 @@
+"""Testes dos artefatos mapeados em memória do modelo linear."""
+
+import pytest
+
+from tests.helpers import PRODUCTIVE_SAMPLES, UNPRODUCTIVE_SAMPLES
+
+
+class TestMappedArtifacts:
+    """Testes dos artefatos mapeados em memória do modelo linear."""
+
+    def test_round_trip_is_read_only(self, tmp_path):
+        """Arrays voltam iguais, sem cópia e somente leitura."""
+        import numpy as np
+
+        from apps.classifier.mmap_artifacts import ALIGNMENT, MappedArrays, write_arrays
+
+        coef = np.arange(10, dtype=np.float32)
+        terms = np.array([b"ola", b"reuniao"])
+        write_arrays(tmp_path / "a.mmap", {"terms": terms, "coef": coef}, {"kind": "teste"})
+
+        artifact = MappedArrays(tmp_path / "a.mmap")
+        assert artifact.metadata == {"kind": "teste"}
+        assert np.array_equal(artifact["coef"], coef) and np.array_equal(artifact["terms"], terms)
+        assert not artifact["coef"].flags.writeable
+        assert artifact["coef"].ctypes.data % ALIGNMENT == 0
+        assert "coef" in artifact and artifact.nbytes == coef.nbytes + terms.nbytes
+
+        (tmp_path / "b.mmap").write_bytes(b"pickle")
+        with pytest.raises(ValueError):
+            MappedArrays(tmp_path / "b.mmap")
+
+    def test_replacement_is_atomic(self, tmp_path):
+        """Quem já mapeou continua lendo a versão antiga; quem abre depois vê a nova."""
+        import numpy as np
+
+        from apps.classifier.mmap_artifacts import MappedArrays, write_arrays
+
+        path = tmp_path / "model.mmap"
+        write_arrays(path, {"coef": np.zeros(4, dtype=np.float32)})
+        old = MappedArrays(path)
+
+        write_arrays(path, {"coef": np.ones(4, dtype=np.float32)})
+        assert old["coef"].tolist() == [0, 0, 0, 0]
+        assert MappedArrays(path)["coef"].tolist() == [1, 1, 1, 1]
+        assert [p.name for p in tmp_path.iterdir()] == ["model.mmap"]
+
+    @pytest.mark.parametrize("kind", ["tfidf", "hashing"])
+    def test_mapped_predictions_match_joblib(self, kind, tmp_path):
+        """O modelo mapeado prevê o mesmo que o objeto treinado, inclusive com termos desconhecidos."""
+        import numpy as np
+
+        from apps.classifier.linear_model import (
+            LinearEngine,
+            MappedLinearModel,
+            OnlineModel,
+            save_linear_model,
+            train_linear_model,
+        )
+
+        texts = [sample.format(n=n) for n in range(3) for sample in PRODUCTIVE_SAMPLES + UNPRODUCTIVE_SAMPLES]
+        labels = (["productive"] * 3 + ["unproductive"] * 3) * 3
+        if kind == "tfidf":
+            model, metrics = train_linear_model(texts, labels, test_size=0)
+        else:
+            model, metrics = OnlineModel().partial_fit(texts, labels), {"mode": "incremental"}
+        version_dir = save_linear_model(model, metrics, tmp_path)
+
+        mapped = MappedLinearModel(version_dir / "model.mmap")
+        queries = texts[:4] + ["termo desconhecido " + "x" * 300, "", "Reunião amanhã sobre o relatório de vendas"]
+        assert mapped.kind == kind
+        assert list(mapped.classes_) == [str(label) for label in model.classes_]
+        assert np.allclose(mapped.predict_proba(queries), model.predict_proba(queries), atol=1e-5)
+
+        assert LinearEngine(tmp_path).mapped
+        assert not LinearEngine(tmp_path, mapped=False).mapped
+        (version_dir / "model.mmap").unlink()
+        assert not LinearEngine(tmp_path).mapped
@@ -0,0 +1,152 @@
+"""Testes do índice de quase-duplicatas (SimHash + LSH)."""
+
+from django.core.cache import cache
+
+import pytest
+
+from apps.classifier.ai_service import AIClassificationService
+
+BLAST = (
+    "Olá {name}, sua fatura de {date} está disponível. Acesse https://banco.example.com/f?id={ref} para visualizar "
+    "o boleto e pagar até o vencimento. Em caso de dúvidas responda este email ou ligue para nossa central de "
+    "atendimento. Obrigado por ser nosso cliente, equipe financeira."
+)
+
+
+class TestNearDuplicates:
+    """Testes do índice de quase-duplicatas (SimHash + LSH)."""
+
+    def test_variants_of_a_blast_are_near_duplicates(self):
+        """Nome, data e link trocados ficam dentro do limite; outro email não."""
+        from apps.classifier.near_duplicates import NearDuplicateIndex
+
+        index = NearDuplicateIndex(max_distance=7, bands=8)
+        original = index.fingerprint(BLAST.format(name="João", date="10/03", ref="123abc"))
+        variant = index.fingerprint(BLAST.format(name="Maria Silva", date="22/04/2025", ref="99x"))
+        other = index.fingerprint(
+            "Reunião de planejamento amanhã às 10h na sala 3 para discutir o orçamento do projeto, as entregas do "
+            "trimestre e a contratação de dois analistas. Por favor confirmem presença até o fim do dia."
+        )
+
+        index.add(original, {"classification": "unproductive"})
+
+        assert index.lookup(variant)[0] == {"classification": "unproductive"}
+        assert index.lookup(other) is None
+        assert index.fingerprint("Reunião às 10h") is None  # curto demais
+        assert index.get_stats()["hits"] == 1
+
+    def test_index_is_bounded(self):
+        """As entradas mais antigas saem do índice e dos buckets."""
+        from apps.classifier.near_duplicates import NearDuplicateIndex
+
+        index = NearDuplicateIndex(max_distance=3, bands=4, max_entries=2)
+        for fingerprint in (0, 0x5555555555555555, 0xFFFFFFFFFFFFFFFF):  # 32 bits de distância entre si
+            index.add(fingerprint, {"classification": "productive"})
+
+        assert len(index) == 2
+        assert index.lookup(0) is None
+        assert index.lookup(0xFFFFFFFFFFFFFFFF) is not None
+        assert sum(len(bucket) for buckets in index._buckets for bucket in buckets.values()) == 2 * 4
+
+    def test_near_duplicate_reuses_classification(self, service, api_calls):
+        """O segundo email da campanha não chama a API."""
+        first = service.classify_email_text(BLAST.format(name="João", date="10/03", ref="123abc"))
+        second = service.classify_email_text(BLAST.format(name="Maria Silva", date="22/04", ref="99x"))
+
+        assert len(api_calls) == 1
+        assert second["classification"] == first["classification"]
+        assert second["processing_details"]["near_duplicate"]["distance"] <= 7
+        assert "near_duplicate" not in first["processing_details"]
+        assert service.get_stats()["near_duplicate_hits"] == 1
+        assert service.get_stats()["near_duplicates"]["similarity_threshold"] == 0.891
+
+    @pytest.mark.django_db
+    def test_index_is_loaded_from_emails(self, settings, api_calls):
+        """Com persistência, o índice começa com as impressões gravadas na tabela de emails."""
+        from apps.classifier.models import Email
+
+        email = Email.objects.create(
+            subject="Fatura",
+            content=BLAST.format(name="João", date="10/03", ref="123abc"),
+            classification_result="unproductive",
+            confidence_score=0.9,
+            ai_model_used="ai-huggingface_api",
+        )
+        assert email.content_simhash is not None
+
+        settings.AI_SETTINGS = {**settings.AI_SETTINGS, "AI_NEAR_DUPLICATE_PERSIST": True}
+        cache.clear()
+        service = AIClassificationService()
+        result = service.classify_email_text("Fatura\n\n" + BLAST.format(name="Pedro", date="01/01", ref="zz"))
+
+        assert api_calls == []
+        assert result["classification"] == "unproductive"
+        assert result["processing_details"]["source_email_id"] == email.id
+        assert service.near_duplicates.loaded_from_db
+
+    @pytest.mark.django_db
+    def test_index_skips_rows_not_classified_by_the_api(self, settings, api_calls):
+        """Linhas concluídas pela heurística ou pelo modelo linear não entram no índice."""
+        from apps.classifier.models import Email
+        from apps.classifier.near_duplicates import NearDuplicateIndex, load_from_emails
+
+        for model_used in ("ai-heuristic_enhanced", "ai-linear_model", "basic-keyword-classifier-v1.0"):
+            Email.objects.create(
+                subject="Fatura",
+                content=BLAST.format(name="João", date="10/03", ref=model_used),
+                classification_result="unproductive",
+                confidence_score=0.95,
+                processing_status="completed",
+                ai_model_used=model_used,
+            )
+
+        index = NearDuplicateIndex(max_distance=7, bands=8)
+        assert load_from_emails(index, 0.7) == 0
+
+        settings.AI_SETTINGS = {**settings.AI_SETTINGS, "AI_NEAR_DUPLICATE_PERSIST": True}
+        cache.clear()
+        result = AIClassificationService().classify_email_text(
+            "Fatura\n\n" + BLAST.format(name="Pedro", date="01/01", ref="zz")
+        )
+
+        assert len(api_calls) == 1
+        assert result["processing_details"]["method"] == "huggingface_api"
+
+    @pytest.mark.django_db
+    def test_persisted_near_duplicate_end_to_end(self, settings, api_calls, monkeypatch):
+        """``classify_email_ai`` monta o resultado completo a partir de um email gravado, sem chamar a API."""
+        from apps.classifier import ai_service as ai_service_module
+        from apps.classifier.deadline import TIER_API
+        from apps.classifier.models import Email
+        from apps.classifier.near_duplicates import email_text, text_fingerprint, to_signed
+        from apps.classifier.services import classify_email_ai
+
+        email = Email.objects.create(
+            subject="Fatura",
+            content=BLAST.format(name="João", date="10/03", ref="123abc"),
+            classification_result="unproductive",
+            confidence_score=0.9,
+            ai_model_used="ai-huggingface_api",
+        )
+        # Mesmo texto que o serviço classifica / Same text the service classifies
+        assert email.content_simhash == to_signed(text_fingerprint(email_text(email.subject, email.content)))
+
+        settings.AI_SETTINGS = {**settings.AI_SETTINGS, "AI_NEAR_DUPLICATE_PERSIST": True}
+        cache.clear()
+        service = AIClassificationService()
+        monkeypatch.setattr(ai_service_module, "_ai_service_instance", service)
+
+        result = classify_email_ai("Fatura", BLAST.format(name="Pedro", date="01/01", ref="zz"))
+
+        assert api_calls == []
+        assert result["category"] == "unproductive"
+        assert result["confidence"] == 0.9
+        assert result["model_used"] == "ai-near_duplicate"
+        assert result["tier"] == TIER_API
+        assert result["ai_details"]["model_used"] == "ai-huggingface_api"
+        assert result["ai_details"]["processed_at"]
+
+        # O resultado em cache também está completo / The cached result is complete too
+        again = classify_email_ai("Fatura", BLAST.format(name="Pedro", date="01/01", ref="zz"))
+        assert again["category"] == "unproductive"
+        assert again["model_used"] == "ai-near_duplicate"
@@ -0,0 +1,75 @@
+"""Testes do token bucket da API de inferência."""
+
+from django.core.cache import cache
+
+import pytest
+
+
+class TestRateLimiter:
+    """Testes do token bucket da API de inferência."""
+
+    @pytest.mark.parametrize("process_local", [True, False])
+    def test_burst_then_steady_rate(self, monkeypatch, process_local):
+        """Libera ``burst`` tokens de uma vez e depois um por intervalo, com lock local ou com slots."""
+        from apps.classifier import rate_limiter
+        from apps.classifier.rate_limiter import TokenBucket
+
+        cache.clear()
+        clock = [1000.0]
+        monkeypatch.setattr(rate_limiter.time, "time", lambda: clock[0])
+        bucket = TokenBucket("teste", rate_per_minute=60, burst=3)
+        bucket._process_local = process_local
+
+        assert [bucket.acquire() for _ in range(4)] == [True, True, True, False]
+        assert bucket.time_until_next_token() == pytest.approx(1.0)
+        assert bucket.time_until_next_token() == pytest.approx(1.0)  # consultar não consome
+
+        clock[0] += 1.0
+        assert bucket.acquire()
+        assert not bucket.acquire()
+        assert bucket.get_stats()["throttled"] == 2
+
+    @pytest.mark.parametrize("process_local", [True, False])
+    def test_concurrent_workers_do_not_overshoot(self, process_local):
+        """Threads concorrentes não passam do limite; sem o lock local, o ``add`` atômico de cada slot garante isso."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        from apps.classifier.rate_limiter import TokenBucket
+
+        cache.clear()
+        bucket = TokenBucket("concorrente", rate_per_minute=1, burst=5)
+        bucket._process_local = process_local
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            granted = list(pool.map(lambda _: bucket.acquire(), range(40)))
+
+        assert sum(granted) == 5
+
+    def test_shared_backends_do_not_use_the_process_lock(self, tmp_path):
+        """Só o LocMem usa o lock do processo; um backend compartilhado usa os slots."""
+        from django.core.cache.backends.filebased import FileBasedCache
+
+        from apps.classifier.rate_limiter import TokenBucket
+
+        shared = TokenBucket("arquivo", rate_per_minute=60, burst=2, backend=FileBasedCache(str(tmp_path), {}))
+
+        assert TokenBucket("memoria", rate_per_minute=60, burst=2).get_stats()["backend"] == "local"
+        assert shared.get_stats()["backend"] == "slots"
+        assert [shared.acquire() for _ in range(3)] == [True, True, False]
+        shared.reset()
+        assert shared.acquire()
+
+    def test_service_waits_or_degrades(self, service, api_calls):
+        """Espera curta pelo próximo token usa a API; espera longa cai no fallback."""
+        from apps.classifier.rate_limiter import TokenBucket
+
+        service.rate_limiter = TokenBucket("huggingface", rate_per_minute=600, burst=1)
+
+        service.classify_email_text("Reunião às 10h")
+        service.classify_email_text("Reunião às 11h")
+        assert len(api_calls) == 2
+
+        service.rate_limit_max_wait = 0
+        result = service.classify_email_text("Reunião às 12h")
+        assert len(api_calls) == 2
+        assert result["processing_details"]["method"] != "huggingface_api"
@@ -0,0 +1,63 @@
+"""Testes do cache em dois níveis (LRU em processo + cache do Django)."""
+
+from django.core.cache import cache
+
+
+class TestResultCache:
+    """Testes do cache em dois níveis."""
+
+    def test_lru_evicts_and_expires(self, monkeypatch):
+        """O L1 respeita o limite de entradas e o TTL."""
+        from apps.classifier import result_cache
+        from apps.classifier.result_cache import MISSING, LRUCache
+
+        now = [1000.0]
+        monkeypatch.setattr(result_cache.time, "monotonic", lambda: now[0])
+        lru = LRUCache(max_entries=2, ttl=10)
+
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)  # "b" é o menos usado / "b" is least recently used
+
+        assert lru.get("b") is MISSING
+        assert lru.get("a") == 1
+        now[0] += 11
+        assert lru.get("c") is MISSING
+
+        stats = lru.get_stats()
+        assert stats["evictions"] == 1
+        assert stats["expirations"] == 1
+        assert stats["hits"] == 2
+
+    def test_read_through_and_write_through(self):
+        """Hits do L2 são copiados para o L1; escritas vão para os dois níveis."""
+        from apps.classifier.result_cache import LRUCache, TieredCache
+
+        cache.clear()
+        tiered = TieredCache(LRUCache(max_entries=10, ttl=60))
+        cache.set("k", {"classification": "productive"})
+
+        assert tiered.get("k") == {"classification": "productive"}
+        cache.delete("k")
+        assert tiered.get("k") == {"classification": "productive"}
+
+        tiered.set_many({"x": 1, "y": 2}, 30)
+        assert cache.get_many(["x", "y"]) == {"x": 1, "y": 2}
+        assert tiered.get_many(["x", "y", "z"]) == {"x": 1, "y": 2}
+
+        stats = tiered.get_stats()
+        assert stats["l2_hits"] == 1
+        assert stats["l1"]["hits"] == 3
+
+    def test_repeated_email_served_from_l1(self, service, api_calls):
+        """O mesmo email, de novo, não sai do worker (nem para o cache compartilhado)."""
+        first = service.classify_email_text("Reunião amanhã às 10h")
+        cache.clear()
+        first["classification"] = "alterado"  # o chamador pode alterar o resultado / callers may mutate results
+
+        second = service.classify_email_text("Reunião amanhã às 10h")
+
+        assert len(api_calls) == 1
+        assert second["classification"] == "productive"
+        assert service.get_stats()["result_cache"]["l1"]["hits"] == 1
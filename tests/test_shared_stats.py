@@ -0,0 +1,87 @@
+"""Testes das estatísticas do serviço somadas entre workers."""
+
+import asyncio
+
+from django.core.cache import cache
+
+import pytest
+
+
+class TestSharedStats:
+    """Testes das estatísticas somadas entre workers."""
+
+    def test_workers_are_summed_after_flush(self):
+        """Cada worker envia os incrementos em lote; os totais somam todos."""
+        from apps.classifier.shared_stats import SharedCounters
+
+        cache.clear()
+        worker_a = SharedCounters("teste", ["api_calls"], flush_interval=60)
+        worker_b = SharedCounters("teste", ["api_calls"], flush_interval=60)
+
+        for _ in range(3):
+            worker_a.incr("api_calls")
+        worker_b.incr("api_calls", 2)
+
+        assert worker_a.totals() == {"api_calls": 3}  # pendente local, nada enviado ainda
+        assert worker_a.flushes == 0
+
+        worker_a.flush()
+        worker_b.flush()
+
+        assert worker_a.totals() == worker_b.totals() == {"api_calls": 5}
+        assert worker_b.local() == {"api_calls": 2}
+
+    def test_flush_inside_event_loop_uses_async_cache(self):
+        """Dentro de uma corrotina o flush vira tarefa com ``aadd``/``aincr``, sem I/O síncrono no loop."""
+        from apps.classifier.shared_stats import SharedCounters
+
+        class AsyncOnlyBackend:
+            def __init__(self):
+                self.data = {}
+
+            async def aadd(self, key, value, timeout=None):
+                self.data.setdefault(key, value)
+
+            async def aincr(self, key, delta=1):
+                self.data[key] += delta
+
+            def add(self, *args):
+                raise AssertionError("cache.add síncrono dentro do event loop")
+
+            incr = add
+
+        backend = AsyncOnlyBackend()
+        counters = SharedCounters("teste", ["api_calls"], flush_interval=0, backend=backend)
+
+        async def request():
+            counters.incr("api_calls", 2)
+            await asyncio.gather(*counters._tasks)
+
+        asyncio.run(request())
+
+        assert backend.data == {"stats_teste_api_calls": 2}
+        assert counters.flushes == 1
+
+    def test_response_cache_hits_are_counted(self, service):
+        """Acertos no cache de respostas usam o contador correto."""
+        service.generate_response("Reunião amanhã", "productive")
+        service.generate_response("Reunião amanhã", "productive")
+
+        assert service.get_stats()["response_cache_hits"] == 1
+
+    @pytest.mark.django_db
+    def test_dashboard_reports_real_numbers(self, service, api_calls, rf, monkeypatch):
+        """O dashboard mostra os contadores do serviço, não valores fixos."""
+        from apps.classifier import ai_service as ai_service_module
+        from apps.classifier.views import dashboard_data_api
+
+        monkeypatch.setattr(ai_service_module, "_ai_service_instance", service)
+        service.classify_email_text("Reunião amanhã")
+        service.classify_email_text("Reunião amanhã")
+        service.classify_email_text("Reunião amanhã")
+
+        ai_stats = dashboard_data_api(rf.get("/dashboard-data/")).data["ai_stats"]
+
+        assert ai_stats["api_calls"] == 1
+        assert ai_stats["cache_hits"] == 2
+        assert ai_stats["cache_hit_rate"] == 66.7
@@ -0,0 +1,84 @@
+"""Testes da coalescência de classificações idênticas em andamento."""
+
+import asyncio
+import time
+
+from django.core.cache import cache
+
+import pytest
+
+from apps.classifier.ai_service import AIClassificationService
+from apps.classifier.http_client import get_http_session
+from tests.helpers import FakeResponse, scores_for
+
+
+class TestSingleFlight:
+    """Testes da coalescência de classificações idênticas em voo."""
+
+    @pytest.fixture
+    def slow_api_calls(self, monkeypatch):
+        calls = []
+
+        def slow_post(url, headers=None, json=None, timeout=None):
+            calls.append(json)
+            time.sleep(0.1)
+            return FakeResponse([scores_for(json["inputs"])])
+
+        monkeypatch.setattr(get_http_session(), "post", slow_post)
+        return calls
+
+    def test_concurrent_copies_make_one_call(self, service, slow_api_calls):
+        """Threads com o mesmo email esperam a chamada do líder."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(service.classify_email_text, ["Reunião amanhã às 10h"] * 6))
+
+        assert len(slow_api_calls) == 1
+        assert {r["classification"] for r in results} == {"productive"}
+        assert results[0] is not results[1]
+
+        stats = service.get_stats()["single_flight"]
+        assert stats["leaders"] == 1
+        assert stats["waiters"] == 5
+        assert stats["inflight"] == 0
+
+    def test_async_copies_make_one_call(self, service, async_api_calls):
+        """Tasks no mesmo event loop também são coalescidas."""
+
+        async def classify_all():
+            return await asyncio.gather(*(service.aclassify_email_text("Reunião amanhã") for _ in range(10)))
+
+        results = asyncio.run(classify_all())
+
+        assert len(async_api_calls) == 1
+        assert {r["classification"] for r in results} == {"productive"}
+        assert service.get_stats()["single_flight"]["waiters"] == 9
+
+    def test_waits_for_another_worker(self, service, api_calls):
+        """Com o lock de outro worker no cache, o resultado gravado por ele é usado."""
+        import threading
+
+        cache_key = service._get_cache_key("classify", "Reunião amanhã")
+        cache.add(f"{cache_key}:inflight", "outro-worker", 30)
+        remote_result = {"classification": "productive", "confidence": 0.99, "processing_details": {"method": "remoto"}}
+        threading.Timer(0.1, service.result_cache.l2.set, (cache_key, remote_result, 60)).start()
+
+        result = service.classify_email_text("Reunião amanhã")
+
+        assert api_calls == []
+        assert result["processing_details"]["method"] == "remoto"
+        assert service.get_stats()["single_flight"]["remote_hits"] == 1
+
+    def test_disabled_does_not_coalesce(self, settings, slow_api_calls):
+        """Com AI_SINGLE_FLIGHT desligado cada chamada vai à API."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        cache.clear()
+        settings.AI_SETTINGS = {**settings.AI_SETTINGS, "AI_SINGLE_FLIGHT": False}
+        service = AIClassificationService()
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            list(pool.map(service.classify_email_text, ["Reunião amanhã"] * 3))
+
+        assert len(slow_api_calls) == 3